@@ -0,0 +1,58 @@
+"""
+Compares file size and encode / decode throughput of session log compression codecs.
+
+Usage: python -m benchmarks.bench_compression [--players 50] [--seconds 600] [--compact-player-positions]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import yaiba
+from benchmarks.synthetic import generate_vrchat_log
+from yaiba.log import compression
+
+EXTENSION_BY_COMPRESSION = {
+    None: ".json",
+    compression.GZIP: ".json.gz",
+    compression.XZ: ".json.xz",
+    compression.ZSTD: ".json.zst",
+}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--players", type=int, default=50)
+    arg_parser.add_argument("--seconds", type=int, default=600)
+    arg_parser.add_argument("--compact-player-positions", action="store_true")
+    args = arg_parser.parse_args()
+
+    options = yaiba.JsonEncoder.Options.default()
+    options.compact_player_positions = args.compact_player_positions
+
+    session_log = yaiba.parse_vrchat_log(generate_vrchat_log(players=args.players, seconds=args.seconds))
+    print(f"{len(session_log.log_entries)} entries")
+    print(f"{'codec':>6} {'size (MiB)':>11} {'ratio':>6} {'encode (s)':>11} {'decode (s)':>11}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        plain_size = None
+        for codec in [None] + compression.available_compressions():
+            path = os.path.join(directory, "session_log" + EXTENSION_BY_COMPRESSION[codec])
+
+            start = time.perf_counter()
+            yaiba.save_session_log(session_log, path, options)
+            encode_sec = time.perf_counter() - start
+
+            start = time.perf_counter()
+            yaiba.load_session_log(path)
+            decode_sec = time.perf_counter() - start
+
+            size = os.path.getsize(path)
+            if plain_size is None:
+                plain_size = size
+            print(f"{codec or 'none':>6} {size / 2 ** 20:>11.2f} {plain_size / size:>6.1f} "
+                  f"{encode_sec:>11.3f} {decode_sec:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
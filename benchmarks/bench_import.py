@@ -0,0 +1,49 @@
+"""
+Measures the time of a bare `import yaiba` in fresh interpreters, and checks that optional heavy dependencies are not
+imported by it.
+
+Usage: python -m benchmarks.bench_import [--runs 10] [--max-sec 0.5]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import List, Tuple
+
+HEAVY_MODULES = ["numpy", "pandas", "plotly", "ipywidgets", "zstandard"]
+
+_SCRIPT = f"""
+import sys, time
+start = time.perf_counter()
+import yaiba
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))
+"""
+
+
+def measure() -> Tuple[float, List[str]]:
+    output = subprocess.run([sys.executable, "-c", _SCRIPT], check=True, capture_output=True, text=True).stdout
+    elapsed, loaded = output.splitlines()
+    return float(elapsed), [m for m in loaded.split(",") if m]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--runs", type=int, default=10)
+    arg_parser.add_argument("--max-sec", type=float, default=None, help="Fails if the median is slower.")
+    args = arg_parser.parse_args()
+
+    results = [measure() for _ in range(args.runs)]
+    times = [elapsed for elapsed, _ in results]
+    loaded = sorted(set(m for _, modules in results for m in modules))
+    median = statistics.median(times)
+    print(f"import yaiba: median {median * 1000:.1f} ms, min {min(times) * 1000:.1f} ms, max {max(times) * 1000:.1f} ms")
+    print(f"heavy modules imported: {', '.join(loaded) if loaded else 'none'}")
+
+    if loaded or (args.max_sec is not None and median > args.max_sec):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
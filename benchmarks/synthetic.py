@@ -0,0 +1,63 @@
+"""
+Generates a synthetic VRChat log for benchmarks.
+"""
+import datetime
+import random
+from typing import List
+
+START = datetime.datetime(2022, 3, 4, 21, 0, 0)
+
+
+def _format_line(timestamp: datetime.datetime, message: str) -> str:
+    return f"{timestamp.strftime('%Y.%m.%d %H:%M:%S')} Log        -  {message}"
+
+
+def generate_vrchat_log(
+        players: int = 50,
+        seconds: int = 600,
+        idle_ratio: float = 0.6,
+        yodokoro_dump_interval_sec: int = 10,
+        seed: int = 0,
+) -> str:
+    """
+    :param idle_ratio: Probability that a player does not move in a second.
+    """
+    rng = random.Random(seed)
+    lines: List[str] = [
+        _format_line(START, "[Behaviour] Entering Room: Synthetic Room"),
+        _format_line(START, "[Player Position Version]1.0.0"),
+    ]
+    locations = [[rng.uniform(-20, 20), 0.0, rng.uniform(-20, 20)] for _ in range(players)]
+    yaws = [rng.uniform(0, 360) for _ in range(players)]
+    tags = [rng.getrandbits(22) for _ in range(players)]
+
+    for player in range(players):
+        lines.append(_format_line(START, f"[Behaviour] OnPlayerJoined Player {player}"))
+
+    for second in range(seconds):
+        timestamp = START + datetime.timedelta(seconds=second)
+        for player in range(players):
+            location = locations[player]
+            if rng.random() >= idle_ratio:
+                location[0] += rng.uniform(-0.5, 0.5)
+                location[2] += rng.uniform(-0.5, 0.5)
+                yaws[player] = (yaws[player] + rng.uniform(-30, 30)) % 360
+            lines.append(_format_line(
+                timestamp,
+                f'[Player Position]{player},"Player {player}",'
+                f'{location[0]:.6g},{location[1]:.6g},{location[2]:.6g},'
+                f'{rng.uniform(-10, 10):.6g},{yaws[player]:.6g},0,'
+                f'0,0,0,{player % 2 == 0}'
+            ))
+        if second % yodokoro_dump_interval_sec == 0:
+            dump = "".join(
+                f"[{player},{player},{tags[player]:08x}],"
+                for player in range(players)
+            )
+            lines.append(_format_line(timestamp, f"[Yodo][Dump]{dump}"))
+
+    end = START + datetime.timedelta(seconds=seconds)
+    for player in range(players):
+        lines.append(_format_line(end, f"[Behaviour] OnPlayerLeft Player {player}"))
+
+    return "\n".join(lines) + "\n"
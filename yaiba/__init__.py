@@ -1,11 +1,30 @@
-from typing import TextIO, Union
+import importlib
+import os
+from typing import BinaryIO, Optional, TextIO, Union
 
-from yaiba.log import JsonDecoder, JsonEncoder, SessionLog, VRCLogParser
+from yaiba.log import JsonDecoder, JsonEncoder, SessionLog, Stats, VRCLogParser
+from yaiba.log import compression as _compression
 
-try:
-    from yaiba.visualization.vrc import VRCPlayerLocationPlotter
-except ImportError as e:
-    pass
+# Loaded on first access, since they import numpy, pandas, plotly or ipywidgets. Keep `import yaiba` light for batch
+# parsing and process pool workers.
+_LAZY_ATTRIBUTES = {
+    "VRCPlayerLocationPlotter": "yaiba.visualization.vrc",
+}
+_LAZY_SUBMODULES = ["analysis", "visualization"]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + list(_LAZY_ATTRIBUTES.keys()) + _LAZY_SUBMODULES)
 
 
 def parse_vrchat_log(fp: Union[TextIO, str], config: VRCLogParser.Config = None) -> SessionLog:
@@ -17,18 +36,53 @@ def parse_vrchat_log(fp: Union[TextIO, str], config: VRCLogParser.Config = None)
     return session_log
 
 
-def save_session_log(session_log: SessionLog, fp: TextIO, options: JsonEncoder.Options = None):
-    encoder = JsonEncoder(options=options)
-    fp.write(encoder.encode(session_log))
+def save_session_log(
+        session_log: SessionLog,
+        fp: Union[TextIO, BinaryIO, str, os.PathLike],
+        options: JsonEncoder.Options = None,
+        compression: Optional[str] = None,
+        stats: Optional[Stats] = None,
+):
+    """
+    :param fp: A text file object, a path, or a binary file object (only with `compression`).
+    :param compression: "gzip", "xz" or "zstd" (requires `zstandard`). For a path, detected from the file extension
+        (".gz", ".xz", ".zst") if not specified.
+    :param stats: See `JsonEncoder`.
+    """
+    encoder = JsonEncoder(options=options, stats=stats)
+    if isinstance(fp, (str, os.PathLike)) or compression is not None:
+        with _open_session_log_file(fp, "w", compression) as compressed_fp:
+            encoder.write(session_log, compressed_fp)
+    else:
+        encoder.write(session_log, fp)
+
+
+def load_session_log(
+        fp: Union[TextIO, BinaryIO, str, os.PathLike],
+        options: JsonDecoder.Options = None,
+        compression: Optional[str] = None,
+        stats: Optional[Stats] = None,
+) -> SessionLog:
+    """
+    :param fp: A text file object, a path, or a binary file object (only with `compression`).
+    :param compression: See `save_session_log`.
+    :param stats: See `JsonDecoder`.
+    """
+    decoder = JsonDecoder(options, stats=stats)
+    if isinstance(fp, (str, os.PathLike)) or compression is not None:
+        with _open_session_log_file(fp, "r", compression) as compressed_fp:
+            return decoder.read(compressed_fp)
+    return decoder.read(fp)
 
 
-def load_session_log(fp: TextIO, options: JsonDecoder.Options = None) -> SessionLog:
-    decoder = JsonDecoder(options)
-    return decoder.decode(fp.read())
+def _open_session_log_file(fp: Union[BinaryIO, str, os.PathLike], mode: str, compression: Optional[str]) -> TextIO:
+    if compression is None:
+        compression = _compression.detect_compression(fp)
+    return _compression.open_text(fp, mode, compression)
 
 
 __all__ = [
-    JsonDecoder, JsonEncoder, SessionLog, VRCLogParser,
+    JsonDecoder, JsonEncoder, SessionLog, Stats, VRCLogParser,
     parse_vrchat_log,
     save_session_log,
     load_session_log,
@@ -0,0 +1,5 @@
+import sys
+
+from yaiba.cli import main
+
+sys.exit(main())
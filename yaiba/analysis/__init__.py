@@ -0,0 +1,5 @@
+"""
+Vectorized analysis of session logs.
+
+Note: Requires numpy (`analysis` group).
+"""
@@ -0,0 +1,36 @@
+from yaiba.analysis.vrc.facing import GazeDetector, facing_vectors, find_gazes
+from yaiba.analysis.vrc.groups import ConversationGroup, ConversationGroupTracker, GroupTimeline, detect_groups
+from yaiba.analysis.vrc.heatmap import Heatmap, HeatmapAccumulator
+from yaiba.analysis.vrc.movement import MovementStats, movement_stats
+from yaiba.analysis.vrc.positions import PlayerPositions
+from yaiba.analysis.vrc.presence import PresenceIndex, PresenceInterval
+from yaiba.analysis.vrc.proximity import ContactInterval, PairIntervalTracker, ProximityDetector, find_contacts
+from yaiba.analysis.vrc.snapshot import Snapshot, SnapshotIndex
+from yaiba.analysis.vrc.tags import YodokoroTagMatrix
+from yaiba.analysis.vrc.trajectory import ResampledTracks, resample_tracks
+
+__all__ = [
+    'ContactInterval',
+    'ConversationGroup',
+    'ConversationGroupTracker',
+    'GazeDetector',
+    'GroupTimeline',
+    'Heatmap',
+    'HeatmapAccumulator',
+    'MovementStats',
+    'PairIntervalTracker',
+    'PlayerPositions',
+    'PresenceIndex',
+    'PresenceInterval',
+    'ProximityDetector',
+    'ResampledTracks',
+    'Snapshot',
+    'SnapshotIndex',
+    'YodokoroTagMatrix',
+    'detect_groups',
+    'facing_vectors',
+    'find_contacts',
+    'find_gazes',
+    'movement_stats',
+    'resample_tracks',
+]
@@ -0,0 +1,138 @@
+"""
+Facing directions from head rotations, and gaze (facing) interactions between players.
+
+Rotations follow Unity: rotation_1 is the pitch (positive looks down), rotation_2 is the yaw (0 looks at +z,
+90 looks at +x), both in degrees.
+"""
+from __future__ import annotations
+
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from yaiba.analysis.vrc.positions import PlayerPositions, PositionSource
+from yaiba.analysis.vrc.proximity import ContactInterval, PairIntervalTracker, find_close_pairs
+from yaiba.analysis.vrc.trajectory import ResampledTracks, iter_track_windows
+
+
+def facing_vectors(rotations: np.ndarray) -> np.ndarray:
+    """
+    :param rotations: (..., 3) rotation_1 (pitch), rotation_2 (yaw), rotation_3 (roll) in degrees.
+    :return: (..., 3) Unit vectors (x, y, z). NaN where rotations are NaN.
+    """
+    pitch = np.radians(rotations[..., 0])
+    yaw = np.radians(rotations[..., 1])
+    cos_pitch = np.cos(pitch)
+    return np.stack((np.sin(yaw) * cos_pitch, -np.sin(pitch), np.cos(yaw) * cos_pitch), axis=-1)
+
+
+def find_facing_pairs(
+        locations: np.ndarray,
+        rotations: np.ndarray,
+        valid: np.ndarray,
+        max_angle_deg: float,
+        max_distance: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Finds all ordered pairs (a, b) where `a` faces `b` within `max_angle_deg` and `max_distance` at each time step.
+
+    Pairs are first narrowed down to the players within `max_distance` horizontally (`find_close_pairs`), then the
+    angles of both directions are computed at once for all candidate pairs. Distances and directions between players
+    are horizontal (x, z), since `location_y` is NaN in v0 logs. Occlusion by other players is ignored.
+
+    :return: (step, player a, player b, distance), each (K,).
+    """
+    steps, a, b, _ = find_close_pairs(locations, valid, max_distance)
+
+    ab = locations[steps, b][:, [0, 2]] - locations[steps, a][:, [0, 2]]
+    distances = np.linalg.norm(ab, axis=-1)
+    min_cos = np.cos(np.radians(max_angle_deg))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        directions = ab / distances[:, np.newaxis]
+        cos_a = np.einsum('ij,ij->i', facing_vectors(rotations[steps, a])[:, [0, 2]], directions)
+        cos_b = -np.einsum('ij,ij->i', facing_vectors(rotations[steps, b])[:, [0, 2]], directions)
+    is_near = distances <= max_distance
+    a_faces_b = is_near & (cos_a >= min_cos)
+    b_faces_a = is_near & (cos_b >= min_cos)
+
+    return (
+        np.concatenate((steps[a_faces_b], steps[b_faces_a])),
+        np.concatenate((a[a_faces_b], b[b_faces_a])),
+        np.concatenate((b[a_faces_b], a[b_faces_a])),
+        np.concatenate((distances[a_faces_b], distances[b_faces_a])),
+    )
+
+
+class GazeDetector(PairIntervalTracker):
+    """
+    Detects gaze intervals chunk by chunk (see `PairIntervalTracker`).
+
+    With `mutual`, intervals are of pairs facing each other, with `player_name_a` < `player_name_b` by player index.
+    Otherwise, intervals are of ordered pairs where `player_name_a` faces `player_name_b`.
+    """
+
+    def __init__(self, player_names: np.ndarray, max_angle_deg: float, max_distance: float, mutual: bool = True):
+        super().__init__(player_names)
+        self.max_angle_deg = max_angle_deg
+        self.max_distance = max_distance
+        self.mutual = mutual
+
+    def update(
+            self,
+            times: np.ndarray,
+            locations: np.ndarray,
+            rotations: np.ndarray,
+            valid: np.ndarray,
+    ) -> List[ContactInterval]:
+        steps, a, b, distances = find_facing_pairs(locations, rotations, valid, self.max_angle_deg, self.max_distance)
+        if self.mutual:
+            steps, a, b, distances = _mutual_pairs(steps, a, b, distances, len(self.player_names))
+        return self.add_pairs(times, steps, a, b, distances)
+
+
+def find_gazes(
+        source: Union[PositionSource, PlayerPositions, ResampledTracks],
+        max_angle_deg: float = 30.0,
+        max_distance: float = 3.0,
+        mutual: bool = True,
+        min_duration_sec: float = 0.0,
+        rate_hz: float = 1.0,
+        window_sec: float = 600.0,
+        **resample_options,
+) -> List[ContactInterval]:
+    """
+    Finds intervals where players face each other (or, without `mutual`, one faces the other) within `max_angle_deg`
+    and `max_distance` meters. See `GazeDetector`.
+
+    :return: Sorted by (start, player_name_a, player_name_b).
+    """
+    detector = None
+    gazes: List[ContactInterval] = []
+    for tracks in iter_track_windows(source, rate_hz, window_sec, **resample_options):
+        if detector is None:
+            detector = GazeDetector(tracks.player_names, max_angle_deg, max_distance, mutual)
+        gazes += detector.update(tracks.times, tracks.locations, tracks.rotations, tracks.valid)
+    if detector is not None:
+        gazes += detector.close()
+
+    gazes = [g for g in gazes if g.duration_sec >= min_duration_sec]
+    gazes.sort(key=lambda g: (g.start, g.player_name_a, g.player_name_b))
+    return gazes
+
+
+def _mutual_pairs(
+        steps: np.ndarray,
+        a: np.ndarray,
+        b: np.ndarray,
+        distances: np.ndarray,
+        player_count: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    :return: Pairs (a < b) found in both directions.
+    """
+    low = np.minimum(a, b)
+    high = np.maximum(a, b)
+    keys = (steps * player_count + low) * player_count + high
+    _, first, counts = np.unique(keys, return_index=True, return_counts=True)
+    mutual = first[counts == 2]
+    return steps[mutual], low[mutual], high[mutual], distances[mutual]
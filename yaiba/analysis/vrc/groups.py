@@ -0,0 +1,383 @@
+"""
+Conversation groups: players clustered in space, tracked over time.
+"""
+from __future__ import annotations
+
+import dataclasses
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from yaiba.analysis.vrc.positions import PlayerPositions, PositionSource
+from yaiba.analysis.vrc.proximity import find_close_pairs
+from yaiba.analysis.vrc.trajectory import ResampledTracks, iter_track_windows
+
+NO_GROUP = -1
+
+
+@dataclass
+class ConversationGroup:
+    group_id: int
+    start: float
+    end: float
+
+    """
+    The group this group split from, if any.
+    """
+    split_from: Optional[int] = None
+
+    """
+    Groups merged into this group.
+    """
+    merged_from: List[int] = field(default_factory=list)
+
+    @property
+    def duration_sec(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class GroupTimeline:
+    """
+    Group of each player at each time step. `labels` is `NO_GROUP` for players in no group.
+    """
+    times: np.ndarray  # (T,) float64
+    player_names: np.ndarray  # (P,) object
+    labels: np.ndarray  # (T, P) int32, group id
+    groups: Dict[int, ConversationGroup]
+
+    def membership_intervals(self) -> List[Tuple[int, str, float, float]]:
+        """
+        :return: (group id, player name, start, end) of each run of consecutive time steps, sorted by (start, group id).
+        """
+        intervals = []
+        if len(self.times) == 0:
+            return intervals
+        # Appends a row of NO_GROUP, so that every run ends before the last row
+        padded = np.vstack((self.labels, np.full((1, self.labels.shape[1]), NO_GROUP, dtype=self.labels.dtype)))
+        changed = np.vstack((np.ones((1, padded.shape[1]), dtype=bool), padded[1:] != padded[:-1]))
+        for player in range(padded.shape[1]):
+            change_steps = np.flatnonzero(changed[:, player])
+            for start, end in zip(change_steps[:-1].tolist(), (change_steps[1:] - 1).tolist()):
+                group_id = int(padded[start, player])
+                if group_id != NO_GROUP:
+                    intervals.append((group_id, self.player_names[player], float(self.times[start]),
+                                      float(self.times[end])))
+        intervals.sort(key=lambda i: (i[2], i[0]))
+        return intervals
+
+
+class ConversationGroupTracker:
+    """
+    Clusters players at each time step, and keeps the identity of groups over time.
+
+    Clustering is density-based (DBSCAN over horizontal distances): a player with at least `min_neighbors` players
+    within `radius` is a core player, core players within `radius` of each other are in the same cluster, and other
+    players within `radius` of a core player join its cluster. Clusters smaller than `min_size` are ignored.
+
+    Neighbour pairs of a whole chunk are found at once by `find_close_pairs`. Only time steps whose neighbour graph
+    changed since the previous step are clustered, at once; the other steps keep the clusters of the previous step.
+    The identity is then updated incrementally from the previous time step: if the partition did not change, the
+    previous group ids are reused as they are; otherwise each cluster takes the id of the previous group it shares the
+    most players with, and the other clusters become new groups which record splits and merges.
+    """
+
+    def __init__(
+            self,
+            player_names: np.ndarray,
+            radius: float = 1.5,
+            min_neighbors: int = 1,
+            min_size: int = 2,
+            facing_angle_deg: Optional[float] = None,
+    ):
+        """
+        :param facing_angle_deg: If set, players must face the center of the cluster within this angle (by yaw).
+        """
+        self.player_names = player_names
+        self.radius = radius
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+        self.facing_angle_deg = facing_angle_deg
+
+        self.groups: Dict[int, ConversationGroup] = {}
+        self._next_group_id = 0
+        self._last_clusters = np.full(len(player_names), NO_GROUP, dtype=np.int64)
+        self._last_labels = np.full(len(player_names), NO_GROUP, dtype=np.int32)
+
+    def update(self, times: np.ndarray, locations: np.ndarray, rotations: np.ndarray, valid: np.ndarray) -> np.ndarray:
+        """
+        :return: (T, P) group ids.
+        """
+        clusters = self._cluster(locations, rotations, valid)
+        labels = np.full(clusters.shape, NO_GROUP, dtype=np.int32)
+        for step in range(len(times)):
+            if np.array_equal(clusters[step], self._last_clusters):
+                labels[step] = self._last_labels
+            else:
+                labels[step] = self._assign_group_ids(clusters[step], float(times[step]))
+            for group_id in np.unique(labels[step]).tolist():
+                if group_id != NO_GROUP:
+                    self.groups[group_id].end = float(times[step])
+            self._last_clusters = clusters[step]
+            self._last_labels = labels[step]
+        return labels
+
+    def _cluster(self, locations: np.ndarray, rotations: np.ndarray, valid: np.ndarray) -> np.ndarray:
+        """
+        :return: (T, P) cluster of each player, as the index of a representative player, or `NO_GROUP`.
+        """
+        step_count, player_count = valid.shape
+        if step_count == 0:
+            return np.full((0, player_count), NO_GROUP, dtype=np.int64)
+        steps, a, b, _ = find_close_pairs(locations, valid, self.radius)
+        edge_keys = a * player_count + b
+        order = np.lexsort((edge_keys, steps))
+        steps, a, b, edge_keys = steps[order], a[order], b[order], edge_keys[order]
+
+        changed = self._changed_steps(steps, edge_keys, locations, rotations, valid)
+        changed_steps = np.flatnonzero(changed)
+        # The index in `changed_steps` of the last changed step at or before each step. The first step is changed.
+        source_steps = np.cumsum(changed) - 1
+        is_changed_edge = changed[steps]
+        clusters = self._cluster_steps(
+            len(changed_steps), player_count, source_steps[steps[is_changed_edge]], a[is_changed_edge],
+            b[is_changed_edge], locations[changed_steps], rotations[changed_steps])
+        return clusters[source_steps]
+
+    def _changed_steps(
+            self,
+            steps: np.ndarray,
+            edge_keys: np.ndarray,
+            locations: np.ndarray,
+            rotations: np.ndarray,
+            valid: np.ndarray,
+    ) -> np.ndarray:
+        """
+        :param steps: (K,) sorted, with `edge_keys` sorted within each step.
+        :return: (T,) Whether the clusters of each step may differ from the previous step. True for the first step.
+        """
+        step_count = len(valid)
+        changed = np.ones(step_count, dtype=bool)
+        changed[1:] = (valid[1:] != valid[:-1]).any(axis=1)
+
+        edge_counts = np.bincount(steps, minlength=step_count)
+        changed[1:] |= edge_counts[1:] != edge_counts[:-1]
+        # Each edge against the edge of the same rank in the previous step, which has as many edges
+        edge_indexes = np.flatnonzero((steps > 0) & ~changed[steps])
+        previous_edge_indexes = edge_indexes - edge_counts[steps[edge_indexes] - 1]
+        changed[steps[edge_indexes[edge_keys[edge_indexes] != edge_keys[previous_edge_indexes]]]] = True
+
+        if self.facing_angle_deg is not None:
+            # Facing the center depends on exact locations and rotations
+            for values in (locations, rotations):
+                differs = (values[1:] != values[:-1]) & ~(np.isnan(values[1:]) & np.isnan(values[:-1]))
+                changed[1:] |= differs.any(axis=(1, 2))
+        return changed
+
+    def _cluster_steps(
+            self,
+            step_count: int,
+            player_count: int,
+            steps: np.ndarray,
+            a: np.ndarray,
+            b: np.ndarray,
+            locations: np.ndarray,
+            rotations: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Clusters all time steps at once, from the neighbour pairs of each step.
+
+        :return: (T, P) See `_cluster`.
+        """
+        u = steps * player_count + a
+        v = steps * player_count + b
+        node_count = step_count * player_count
+
+        neighbor_counts = np.bincount(u, minlength=node_count) + np.bincount(v, minlength=node_count)
+        is_core = neighbor_counts >= self.min_neighbors
+
+        core_edges = is_core[u] & is_core[v]
+        roots = _connected_components(node_count, u[core_edges], v[core_edges])
+        roots = np.where(is_core, roots, -1)
+
+        # Border players join the cluster of a neighbouring core player
+        border_u = ~is_core[u] & is_core[v]
+        border_v = is_core[u] & ~is_core[v]
+        border_roots = np.full(node_count, node_count, dtype=np.int64)
+        np.minimum.at(border_roots, u[border_u], roots[v[border_u]])
+        np.minimum.at(border_roots, v[border_v], roots[u[border_v]])
+        has_border_root = border_roots < node_count
+        roots[has_border_root] = border_roots[has_border_root]
+
+        if self.facing_angle_deg is not None:
+            roots = self._keep_facing_center(roots, locations, rotations)
+        roots = _drop_small_clusters(roots, self.min_size)
+
+        # The smallest core player of the cluster, comparable between time steps
+        clusters = np.where(roots >= 0, roots % player_count, NO_GROUP)
+        return clusters.reshape(step_count, player_count)
+
+    def _keep_facing_center(self, roots: np.ndarray, locations: np.ndarray, rotations: np.ndarray) -> np.ndarray:
+        xz = locations[..., [0, 2]].reshape(-1, 2)
+        members = np.flatnonzero(roots >= 0)
+        member_roots = roots[members]
+        sizes = np.bincount(member_roots, minlength=len(roots))
+        centers = np.stack([
+            np.bincount(member_roots, weights=xz[members, axis], minlength=len(roots))
+            for axis in range(2)
+        ], axis=-1) / np.maximum(sizes, 1)[:, np.newaxis]
+
+        to_center = centers[member_roots] - xz[members]
+        yaw = np.radians(rotations[..., 1].reshape(-1)[members])
+        facing = np.stack((np.sin(yaw), np.cos(yaw)), axis=-1)
+        distances = np.linalg.norm(to_center, axis=-1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cos = np.einsum('ij,ij->i', facing, to_center) / distances
+        is_facing = (distances == 0) | (cos >= np.cos(np.radians(self.facing_angle_deg)))
+
+        roots = roots.copy()
+        roots[members[~is_facing]] = -1
+        return roots
+
+    def _assign_group_ids(self, clusters: np.ndarray, time: float) -> np.ndarray:
+        labels = np.full(len(clusters), NO_GROUP, dtype=np.int32)
+        in_cluster = clusters != NO_GROUP
+        cluster_ids = np.unique(clusters[in_cluster]).tolist()
+        if len(cluster_ids) == 0:
+            return labels
+
+        # Overlaps between current clusters and previous groups
+        both = in_cluster & (self._last_labels != NO_GROUP)
+        pairs, counts = np.unique(
+            np.stack((clusters[both], self._last_labels[both]), axis=-1), axis=0, return_counts=True)
+        # The largest overlap first, then the oldest group
+        overlaps = sorted(
+            zip(counts.tolist(), pairs[:, 0].tolist(), pairs[:, 1].tolist()), key=lambda o: (-o[0], o[2], o[1]))
+
+        group_id_by_cluster: Dict[int, int] = {}
+        previous_groups_by_cluster: Dict[int, List[int]] = {c: [] for c in cluster_ids}
+        taken = set()
+        for _, cluster, previous_group in overlaps:
+            previous_groups_by_cluster[cluster].append(previous_group)
+            if cluster not in group_id_by_cluster and previous_group not in taken:
+                group_id_by_cluster[cluster] = previous_group
+                taken.add(previous_group)
+
+        for cluster in cluster_ids:
+            previous_groups = previous_groups_by_cluster[cluster]
+            group_id = group_id_by_cluster.get(cluster)
+            if group_id is None:
+                split_from = previous_groups[0] if len(previous_groups) > 0 else None
+                group_id = self._new_group(time, split_from)
+                group_id_by_cluster[cluster] = group_id
+            merged = [g for g in previous_groups if g != group_id and g not in taken]
+            self.groups[group_id].merged_from += merged
+            taken.update(merged)
+
+        for cluster, group_id in group_id_by_cluster.items():
+            labels[clusters == cluster] = group_id
+        return labels
+
+    def _new_group(self, start: float, split_from: Optional[int]) -> int:
+        group_id = self._next_group_id
+        self._next_group_id += 1
+        self.groups[group_id] = ConversationGroup(group_id=group_id, start=start, end=start, split_from=split_from)
+        return group_id
+
+
+def detect_groups(
+        source: Union[PositionSource, PlayerPositions, ResampledTracks],
+        radius: float = 1.5,
+        min_neighbors: int = 1,
+        min_size: int = 2,
+        facing_angle_deg: Optional[float] = None,
+        min_duration_sec: float = 0.0,
+        rate_hz: float = 1.0,
+        window_sec: float = 600.0,
+        **resample_options,
+) -> GroupTimeline:
+    """
+    Detects conversation groups (see `ConversationGroupTracker`), typically of a `RoomVisit`.
+
+    :param min_duration_sec: Groups shorter than this are removed from the timeline.
+    """
+    tracker = None
+    times = []
+    labels = []
+    player_names = np.zeros(0, dtype=object)
+    for tracks in iter_track_windows(source, rate_hz, window_sec, **resample_options):
+        if tracker is None:
+            player_names = tracks.player_names
+            tracker = ConversationGroupTracker(player_names, radius, min_neighbors, min_size, facing_angle_deg)
+        times.append(tracks.times)
+        labels.append(tracker.update(tracks.times, tracks.locations, tracks.rotations, tracks.valid))
+
+    if tracker is None:
+        return GroupTimeline(np.zeros(0), player_names, np.zeros((0, 0), dtype=np.int32), {})
+
+    times = np.concatenate(times)
+    labels = np.concatenate(labels)
+    groups = _remove_short_groups(tracker.groups, min_duration_sec)
+    labels[~np.isin(labels, list(groups.keys()))] = NO_GROUP
+    return GroupTimeline(times=times, player_names=player_names, labels=labels, groups=groups)
+
+
+def _remove_short_groups(groups: Dict[int, ConversationGroup], min_duration_sec: float) -> Dict[int, ConversationGroup]:
+    """
+    Keeps groups of at least `min_duration_sec`. `split_from` of a kept group points to its nearest kept ancestor, and
+    `merged_from` lists kept groups, in place of removed groups and the kept groups merged into them.
+    """
+    kept_ids = {g.group_id for g in groups.values() if g.duration_sec >= min_duration_sec}
+
+    def kept_split_from(group_id: Optional[int]) -> Optional[int]:
+        while group_id is not None and group_id not in kept_ids:
+            group_id = groups[group_id].split_from
+        return group_id
+
+    def kept_merged_from(group_ids: List[int], visited: set) -> List[int]:
+        merged_from = []
+        for group_id in group_ids:
+            if group_id in visited:
+                continue
+            visited.add(group_id)
+            if group_id in kept_ids:
+                merged_from.append(group_id)
+            else:
+                merged_from += kept_merged_from(groups[group_id].merged_from, visited)
+        return merged_from
+
+    return {
+        group_id: dataclasses.replace(
+            group,
+            split_from=kept_split_from(group.split_from),
+            merged_from=kept_merged_from(group.merged_from, {group_id}),
+        )
+        for group_id, group in groups.items()
+        if group_id in kept_ids
+    }
+
+
+def _connected_components(node_count: int, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """
+    :return: The smallest node of the component of each node.
+    """
+    roots = np.arange(node_count)
+    while True:
+        edge_roots = np.minimum(roots[u], roots[v])
+        new_roots = roots.copy()
+        np.minimum.at(new_roots, u, edge_roots)
+        np.minimum.at(new_roots, v, edge_roots)
+        # Pointer jumping
+        new_roots = new_roots[new_roots]
+        if np.array_equal(new_roots, roots):
+            return roots
+        roots = new_roots
+
+
+def _drop_small_clusters(roots: np.ndarray, min_size: int) -> np.ndarray:
+    members = roots >= 0
+    sizes = np.bincount(roots[members], minlength=len(roots))
+    roots = roots.copy()
+    roots[members & (sizes[np.maximum(roots, 0)] < min_size)] = -1
+    return roots
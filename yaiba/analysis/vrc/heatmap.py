@@ -0,0 +1,266 @@
+"""
+Occupancy heatmaps: dwell time of players per 2D (x, z) bin, accumulated incrementally from entries.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from yaiba.log.session_log import Entry, SessionLog
+from yaiba.log.types import VRCPlayerId
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry, VRCPlayerLeftEntry
+from yaiba.log.vrc.entries.player_position import VRCYAIBAPlayerPositionEntry
+from yaiba.log.vrc.entries.yodokoro_tag_marker import (
+    TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY,
+    VRCYodokoroTagMarkerEntry,
+    expand_tag_bits,
+)
+from yaiba.log.vrc.room_visit import RoomVisit
+
+GROUP_BY_PLAYER = "player"
+GROUP_BY_YODOKORO_TAG = "yodokoro_tag"
+
+GroupBy = Union[None, str, Callable[[VRCYAIBAPlayerPositionEntry], Hashable]]
+
+
+@dataclass
+class Heatmap:
+    """
+    `seconds[iz, ix]` is the dwell time in `x_edges[ix]:x_edges[ix + 1]` and `z_edges[iz]:z_edges[iz + 1]`.
+    Can be plotted with `matplotlib.pyplot.pcolormesh(x_edges, z_edges, seconds)`.
+    """
+    seconds: np.ndarray  # (Z, X) float64
+    x_edges: np.ndarray  # (X + 1,)
+    z_edges: np.ndarray  # (Z + 1,)
+
+
+class _Grid:
+    """
+    A dense 2D array of bins, which grows to cover all added bins.
+    """
+
+    def __init__(self):
+        self.origin = np.zeros(2, dtype=np.int64)  # (ix, iz) of values[0, 0]
+        self.values = np.zeros((0, 0), dtype=np.float64)
+
+    def add(self, ix: np.ndarray, iz: np.ndarray, weights: np.ndarray):
+        if len(ix) == 0:
+            return
+        self.resize(np.array([ix.min(), iz.min()]), np.array([ix.max(), iz.max()]))
+        shape = self.values.shape
+        flat_indexes = (iz - self.origin[1]) * shape[1] + (ix - self.origin[0])
+        self.values += np.bincount(flat_indexes, weights=weights, minlength=self.values.size).reshape(shape)
+
+    def resize(self, low: np.ndarray, high: np.ndarray):
+        """
+        Grows to cover bins from `low` to `high` (inclusive), as (ix, iz).
+        """
+        if self.values.size > 0:
+            low = np.minimum(low, self.origin)
+            high = np.maximum(high, self.origin + self.values.shape[::-1] - 1)
+            if np.array_equal(low, self.origin) and np.array_equal(high - low + 1, self.values.shape[::-1]):
+                return
+        values = np.zeros((high[1] - low[1] + 1, high[0] - low[0] + 1), dtype=np.float64)
+        if self.values.size > 0:
+            dx, dz = self.origin - low
+            values[dz:dz + self.values.shape[0], dx:dx + self.values.shape[1]] = self.values
+        self.origin = low
+        self.values = values
+
+    def extent(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        if self.values.size == 0:
+            return None
+        return self.origin, self.origin + self.values.shape[::-1] - 1
+
+
+class HeatmapAccumulator:
+    """
+    Accumulates the dwell time of players per (location_x, location_z) bin.
+
+    A position sample is credited with the time until the next sample of the same player, capped by
+    `max_dwell_sec`. A `VRCPlayerLeftEntry` ends the dwell of the player. The last sample of each player is pending
+    until the next sample arrives, since its dwell time is unknown.
+
+    Entries are buffered and binned `batch_size` at a time with NumPy, so memory use is bounded by the batch and the
+    size of the world, not by the number of entries. Accumulators with the same `bin_size` can be merged, ex. to
+    combine results of log files processed separately.
+
+    :param group_by: None (one heatmap), `GROUP_BY_PLAYER` (pseudo_user_name), `GROUP_BY_YODOKORO_TAG` (a sample counts
+        for each tag of the player at the time; players without tags are in group None), or a function which returns
+        the group of a position entry.
+    """
+
+    def __init__(
+            self,
+            bin_size: float = 0.5,
+            max_dwell_sec: float = 10.0,
+            group_by: GroupBy = None,
+            tag_names: Optional[List[str]] = None,
+            batch_size: int = 65536,
+    ):
+        assert bin_size > 0, "bin_size must be positive"
+        self.bin_size = bin_size
+        self.max_dwell_sec = max_dwell_sec
+        self.group_by = group_by
+        self.tag_names = tag_names
+        self.batch_size = batch_size
+
+        self._grids: Dict[Hashable, _Grid] = {}
+        self._tag_bits: Dict[VRCPlayerId, int] = {}
+
+        # Buffered rows: (player, timestamp, x, z, groups). x is NaN for `VRCPlayerLeftEntry`.
+        self._rows: List[Tuple[str, float, float, float, Tuple[Hashable, ...]]] = []
+        self._pending: Dict[str, Tuple[str, float, float, float, Tuple[Hashable, ...]]] = {}
+
+    def add(self, entry: Entry):
+        if isinstance(entry, VRCYAIBAPlayerPositionEntry):
+            self._rows.append((
+                entry.pseudo_user_name,
+                entry.timestamp.timestamp(),
+                _to_float(entry.location_x),
+                _to_float(entry.location_z),
+                self._groups_of(entry),
+            ))
+        elif isinstance(entry, VRCPlayerLeftEntry):
+            self._rows.append((entry.pseudo_user_name, entry.timestamp.timestamp(), np.nan, np.nan, ()))
+        elif isinstance(entry, VRCYodokoroTagMarkerEntry):
+            if self.tag_names is None:
+                self.tag_names = entry.tag_names if entry.tag_names is not None else TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY
+            self._tag_bits = entry.update_tag_bits(self._tag_bits, self.tag_names)
+        elif isinstance(entry, VRCEnteringRoomEntry):
+            # Change-only tag markers start again from no player in a new room
+            self._tag_bits = {}
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def add_entries(self, source: Union[SessionLog, RoomVisit, Iterable[Entry]]) -> HeatmapAccumulator:
+        entries = source.log_entries if isinstance(source, (SessionLog, RoomVisit)) else source
+        for entry in entries:
+            self.add(entry)
+        self.flush()
+        return self
+
+    def flush(self):
+        """
+        Bins buffered entries.
+        """
+        rows = list(self._pending.values()) + self._rows
+        self._rows = []
+        self._pending = {}
+        if len(rows) == 0:
+            return
+
+        player_names, timestamps, xs, zs, groups = zip(*rows)
+        _, players = np.unique(np.array(player_names, dtype=object), return_inverse=True)
+        players = players.reshape(-1)
+        timestamps = np.array(timestamps, dtype=np.float64)
+        xs = np.array(xs, dtype=np.float64)
+        zs = np.array(zs, dtype=np.float64)
+
+        # By player, then by time, then in the order of entries
+        order = np.lexsort((np.arange(len(rows)), timestamps, players))
+        players, timestamps, xs, zs = players[order], timestamps[order], xs[order], zs[order]
+
+        is_last = np.append(players[1:] != players[:-1], True)
+        dwell = np.minimum(np.append(np.diff(timestamps), 0.0), self.max_dwell_sec)
+        is_position = ~np.isnan(xs)
+
+        for i in np.flatnonzero(is_last & is_position).tolist():
+            self._pending[player_names[order[i]]] = rows[order[i]]
+
+        credited = ~is_last & is_position & ~np.isnan(zs) & (dwell > 0)
+        ix = np.floor(np.nan_to_num(xs) / self.bin_size).astype(np.int64)
+        iz = np.floor(np.nan_to_num(zs) / self.bin_size).astype(np.int64)
+        self._add_to_groups([groups[i] for i in order], np.flatnonzero(credited), ix, iz, dwell)
+
+    def merge(self, other: HeatmapAccumulator) -> HeatmapAccumulator:
+        """
+        Adds the heatmaps of `other` to this accumulator. Pending samples of `other` are not merged.
+        """
+        assert self.bin_size == other.bin_size, "bin_size must be the same"
+        self.flush()
+        other.flush()
+        for group, other_grid in other._grids.items():
+            extent = other_grid.extent()
+            if extent is None:
+                continue
+            low, high = extent
+            iz, ix = np.nonzero(other_grid.values)
+            grid = self._grids.setdefault(group, _Grid())
+            grid.resize(low, high)
+            grid.add(ix + low[0], iz + low[1], other_grid.values[iz, ix])
+        return self
+
+    @property
+    def groups(self) -> List[Hashable]:
+        self.flush()
+        return list(self._grids.keys())
+
+    def heatmap(self, group: Hashable = None) -> Heatmap:
+        """
+        Heatmap of a group. All heatmaps of an accumulator have the same extent, so they can be compared directly.
+        """
+        self.flush()
+        return self._to_heatmap([self._grids[group]] if group in self._grids else [])
+
+    def total(self) -> Heatmap:
+        """
+        Sum of all groups. With `GROUP_BY_YODOKORO_TAG`, a player with several tags is counted several times.
+        """
+        self.flush()
+        return self._to_heatmap(list(self._grids.values()))
+
+    def _to_heatmap(self, grids: List[_Grid]) -> Heatmap:
+        extents = [e for e in (g.extent() for g in self._grids.values()) if e is not None]
+        if len(extents) == 0:
+            return Heatmap(np.zeros((0, 0)), np.zeros(0), np.zeros(0))
+        low = np.min([e[0] for e in extents], axis=0)
+        high = np.max([e[1] for e in extents], axis=0)
+
+        seconds = np.zeros((high[1] - low[1] + 1, high[0] - low[0] + 1), dtype=np.float64)
+        for grid in grids:
+            if grid.values.size == 0:
+                continue
+            dx, dz = grid.origin - low
+            seconds[dz:dz + grid.values.shape[0], dx:dx + grid.values.shape[1]] += grid.values
+        return Heatmap(
+            seconds=seconds,
+            x_edges=np.arange(low[0], high[0] + 2) * self.bin_size,
+            z_edges=np.arange(low[1], high[1] + 2) * self.bin_size,
+        )
+
+    def _groups_of(self, entry: VRCYAIBAPlayerPositionEntry) -> Tuple[Hashable, ...]:
+        if self.group_by is None:
+            return (None,)
+        if self.group_by == GROUP_BY_PLAYER:
+            return (entry.pseudo_user_name,)
+        if self.group_by == GROUP_BY_YODOKORO_TAG:
+            tag_bits = self._tag_bits.get(entry.player_id, 0)
+            if tag_bits == 0:
+                return (None,)
+            return tuple(expand_tag_bits(tag_bits, self.tag_names))
+        return (self.group_by(entry),)
+
+    def _add_to_groups(
+            self,
+            groups: List[Tuple[Hashable, ...]],
+            rows: np.ndarray,
+            ix: np.ndarray,
+            iz: np.ndarray,
+            dwell: np.ndarray,
+    ):
+        if self.group_by is None:
+            self._grids.setdefault(None, _Grid()).add(ix[rows], iz[rows], dwell[rows])
+            return
+        rows_by_group: Dict[Hashable, List[int]] = {}
+        for row in rows.tolist():
+            for group in groups[row]:
+                rows_by_group.setdefault(group, []).append(row)
+        for group, group_rows in rows_by_group.items():
+            self._grids.setdefault(group, _Grid()).add(ix[group_rows], iz[group_rows], dwell[group_rows])
+
+
+def _to_float(value: Optional[float]) -> float:
+    return np.nan if value is None else value
@@ -0,0 +1,142 @@
+"""
+Per-player movement statistics, computed for all players at once over (player, time) sorted arrays.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import Union
+
+import numpy as np
+
+from yaiba.analysis.vrc.positions import PlayerPositions, PositionSource
+
+
+@dataclass
+class MovementStats:
+    """
+    One value per player. Distances and speeds are horizontal (location_x, location_z), in meters and meters per
+    second. Times are seconds.
+
+    Speeds are from `velocity_x` / `velocity_z` when recorded (v1.0.0 logs), otherwise from finite differences
+    between consecutive timestamps (v0 logs). Time between samples more than `max_gap_sec` apart, or across a
+    `VRCPlayerLeftEntry` of the player or a `VRCEnteringRoomEntry`, is not observed.
+    """
+    player_names: np.ndarray  # object
+    sample_counts: np.ndarray  # int64
+    first_timestamps: np.ndarray  # float64, epoch seconds
+    last_timestamps: np.ndarray  # float64, epoch seconds
+    observed_sec: np.ndarray
+    path_lengths: np.ndarray
+    mean_speeds: np.ndarray
+    median_speeds: np.ndarray
+    p90_speeds: np.ndarray
+    max_speeds: np.ndarray
+    moving_sec: np.ndarray
+    idle_sec: np.ndarray
+    vr_sec: np.ndarray
+    desktop_sec: np.ndarray
+
+    def to_frame(self):
+        """
+        A `pandas.DataFrame` with one row per player. Requires pandas.
+        """
+        import pandas as pd
+        return pd.DataFrame({f.name: getattr(self, f.name) for f in fields(self)})
+
+
+def movement_stats(
+        source: Union[PositionSource, PlayerPositions],
+        idle_speed: float = 0.2,
+        max_gap_sec: float = 10.0,
+) -> MovementStats:
+    """
+    :param idle_speed: A player slower than this is idle.
+    """
+    positions = PlayerPositions.from_source(source)
+    player_count = positions.player_count
+    players = positions.player_indexes
+    timestamps = positions.timestamps
+    xz = positions.locations[:, [0, 2]]
+    visit_ids = positions.visit_ids()
+
+    # Path length over all samples, including samples sharing a timestamp
+    same_player = (players[1:] == players[:-1]) & (visit_ids[1:] == visit_ids[:-1])
+    steps = np.hypot(*(xz[1:] - xz[:-1]).T)
+    on_path = same_player & (timestamps[1:] - timestamps[:-1] <= max_gap_sec) & ~np.isnan(steps)
+    path_lengths = np.bincount(players[1:][on_path], weights=steps[on_path], minlength=player_count)
+
+    # Times and speeds over the last sample of each timestamp, since timestamps have one-second resolution
+    is_last_of_time = np.ones(len(players), dtype=bool)
+    is_last_of_time[:-1] = (players[1:] != players[:-1]) | (timestamps[1:] != timestamps[:-1])
+    players_t = players[is_last_of_time]
+    visit_ids_t = visit_ids[is_last_of_time]
+    timestamps_t = timestamps[is_last_of_time]
+    xz_t = xz[is_last_of_time]
+    velocities_t = positions.velocities[is_last_of_time][:, [0, 2]]
+    is_vr_t = positions.is_vr[is_last_of_time]
+
+    # A segment is from a sample to the next one of the same player, and takes the speed of its end
+    dt = np.diff(timestamps_t)
+    is_segment = (players_t[1:] == players_t[:-1]) & (visit_ids_t[1:] == visit_ids_t[:-1]) & (dt <= max_gap_sec)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        finite_difference_speeds = np.hypot(*(xz_t[1:] - xz_t[:-1]).T) / dt
+    velocity_speeds = np.hypot(*velocities_t[1:].T)
+    speeds = np.where(np.isnan(velocity_speeds), finite_difference_speeds, velocity_speeds)
+    has_speed = is_segment & ~np.isnan(speeds)
+
+    segment_players = players_t[1:]
+    segment_dt = np.where(is_segment, dt, 0.0)
+    moving = has_speed & (speeds >= idle_speed)
+    idle = has_speed & (speeds < idle_speed)
+
+    def sum_per_player(mask: np.ndarray) -> np.ndarray:
+        return np.bincount(segment_players[mask], weights=segment_dt[mask], minlength=player_count)
+
+    speed_players = segment_players[has_speed]
+    speed_values = speeds[has_speed]
+    speed_counts = np.bincount(speed_players, minlength=player_count)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_speeds = np.bincount(speed_players, weights=speed_values, minlength=player_count) / speed_counts
+    max_speeds = np.full(player_count, np.nan)
+    if len(speed_values) > 0:
+        np.fmax.at(max_speeds, speed_players, speed_values)
+
+    offsets = positions.offsets
+    has_samples = offsets[1:] > offsets[:-1]
+    return MovementStats(
+        player_names=positions.player_names,
+        sample_counts=np.diff(offsets),
+        first_timestamps=np.where(has_samples, timestamps[np.minimum(offsets[:-1], len(timestamps) - 1)], np.nan),
+        last_timestamps=np.where(has_samples, timestamps[np.maximum(offsets[1:] - 1, 0)], np.nan),
+        observed_sec=sum_per_player(is_segment),
+        path_lengths=path_lengths,
+        mean_speeds=mean_speeds,
+        median_speeds=grouped_quantile(speed_players, speed_values, player_count, 0.5),
+        p90_speeds=grouped_quantile(speed_players, speed_values, player_count, 0.9),
+        max_speeds=max_speeds,
+        moving_sec=sum_per_player(moving),
+        idle_sec=sum_per_player(idle),
+        vr_sec=sum_per_player(is_segment & is_vr_t[1:]),
+        desktop_sec=sum_per_player(is_segment & ~is_vr_t[1:]),
+    )
+
+
+def grouped_quantile(groups: np.ndarray, values: np.ndarray, group_count: int, q: float) -> np.ndarray:
+    """
+    Quantile of values per group, with linear interpolation (the default of `np.quantile`).
+
+    :return: (group_count,) NaN for groups without values.
+    """
+    order = np.lexsort((values, groups))
+    sorted_values = values[order]
+    counts = np.bincount(groups, minlength=group_count)
+    starts = np.cumsum(counts) - counts
+
+    quantiles = np.full(group_count, np.nan)
+    has_values = counts > 0
+    positions = starts[has_values] + q * (counts[has_values] - 1)
+    low = np.floor(positions).astype(np.int64)
+    high = np.ceil(positions).astype(np.int64)
+    weights = positions - low
+    quantiles[has_values] = sorted_values[low] * (1 - weights) + sorted_values[high] * weights
+    return quantiles
@@ -0,0 +1,193 @@
+"""
+Columnar arrays of player positions, the common input of position analyses.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Union
+
+import numpy as np
+
+from yaiba.log.session_log import Entry, SessionLog
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry, VRCPlayerLeftEntry
+from yaiba.log.vrc.entries.player_position import VRCYAIBAPlayerPositionEntry
+from yaiba.log.vrc.room_visit import RoomVisit
+
+PositionSource = Union[SessionLog, RoomVisit, Iterable[Entry]]
+
+
+@dataclass
+class PlayerPositions:
+    """
+    Position samples of all players, sorted by (player, timestamp). Samples of the same player and timestamp keep the
+    log order.
+
+    Players are identified by `pseudo_user_name`. Timestamps are epoch seconds. Missing values (ex. location_y and
+    velocities in v0 logs) are NaN. Angles are in degrees.
+    """
+    player_names: np.ndarray  # (P,) object, sorted
+
+    """
+    Samples of player `p` are `offsets[p]:offsets[p + 1]`.
+    """
+    offsets: np.ndarray  # (P + 1,) int64
+
+    player_indexes: np.ndarray  # (N,) int64
+    timestamps: np.ndarray  # (N,) float64
+    locations: np.ndarray  # (N, 3) float64, x, y, z
+    rotations: np.ndarray  # (N, 3) float64, rotation_1 (pitch), rotation_2 (yaw), rotation_3 (roll)
+    velocities: np.ndarray  # (N, 3) float64
+    is_vr: np.ndarray  # (N,) bool
+
+    """
+    `VRCPlayerLeftEntry` of known players, sorted by (player, timestamp).
+    """
+    left_player_indexes: np.ndarray  # (M,) int64
+    left_timestamps: np.ndarray  # (M,) float64
+
+    """
+    Timestamps of `VRCEnteringRoomEntry`, sorted. Samples before and after one are of different room visits.
+    """
+    room_entry_timestamps: np.ndarray  # (R,) float64
+
+    @classmethod
+    def from_source(cls, source: Union[PositionSource, PlayerPositions]) -> PlayerPositions:
+        if isinstance(source, PlayerPositions):
+            return source
+        if isinstance(source, (SessionLog, RoomVisit)):
+            return cls.from_entries(source.log_entries)
+        return cls.from_entries(source)
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Entry]) -> PlayerPositions:
+        positions: List[VRCYAIBAPlayerPositionEntry] = []
+        lefts: List[VRCPlayerLeftEntry] = []
+        room_entries: List[VRCEnteringRoomEntry] = []
+        for entry in entries:
+            if isinstance(entry, VRCYAIBAPlayerPositionEntry):
+                positions.append(entry)
+            elif isinstance(entry, VRCPlayerLeftEntry):
+                lefts.append(entry)
+            elif isinstance(entry, VRCEnteringRoomEntry):
+                room_entries.append(entry)
+
+        names = [e.pseudo_user_name for e in positions]
+        player_names = np.array(sorted(set(names)), dtype=object)
+        index_by_name: Dict[str, int] = {name: i for i, name in enumerate(player_names)}
+
+        player_indexes = np.fromiter((index_by_name[n] for n in names), dtype=np.int64, count=len(names))
+        timestamps = np.fromiter((e.timestamp.timestamp() for e in positions), dtype=np.float64, count=len(positions))
+        locations = _to_float_columns(positions, ("location_x", "location_y", "location_z"))
+        rotations = _to_float_columns(positions, ("rotation_1", "rotation_2", "rotation_3"))
+        velocities = _to_float_columns(positions, ("velocity_x", "velocity_y", "velocity_z"))
+        is_vr = np.fromiter((bool(e.is_vr) for e in positions), dtype=bool, count=len(positions))
+
+        order = np.lexsort((timestamps, player_indexes))
+
+        known_lefts = [e for e in lefts if e.pseudo_user_name in index_by_name]
+        left_player_indexes = np.fromiter(
+            (index_by_name[e.pseudo_user_name] for e in known_lefts), dtype=np.int64, count=len(known_lefts))
+        left_timestamps = np.fromiter(
+            (e.timestamp.timestamp() for e in known_lefts), dtype=np.float64, count=len(known_lefts))
+        left_order = np.lexsort((left_timestamps, left_player_indexes))
+
+        offsets = np.zeros(len(player_names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(player_indexes, minlength=len(player_names)), out=offsets[1:])
+
+        return cls(
+            player_names=player_names,
+            offsets=offsets,
+            player_indexes=player_indexes[order],
+            timestamps=timestamps[order],
+            locations=locations[order],
+            rotations=rotations[order],
+            velocities=velocities[order],
+            is_vr=is_vr[order],
+            left_player_indexes=left_player_indexes[left_order],
+            left_timestamps=left_timestamps[left_order],
+            room_entry_timestamps=np.sort(np.fromiter(
+                (e.timestamp.timestamp() for e in room_entries), dtype=np.float64, count=len(room_entries))),
+        )
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def player_count(self) -> int:
+        return len(self.player_names)
+
+    def player_slice(self, player_index: int) -> slice:
+        return slice(self.offsets[player_index], self.offsets[player_index + 1])
+
+    def last_sample_indexes(self, times: np.ndarray) -> np.ndarray:
+        """
+        :param times: (T,) sorted or not.
+        :return: (P, T) Index of the last sample of each player at or before each time. -1 if none.
+        """
+        return search_last_per_group(self.player_indexes, self.timestamps, self.player_count, times)
+
+    def last_left_timestamps(self, times: np.ndarray) -> np.ndarray:
+        """
+        :return: (P, T) Timestamp of the last `VRCPlayerLeftEntry` of each player at or before each time. -inf if none.
+        """
+        indexes = search_last_per_group(self.left_player_indexes, self.left_timestamps, self.player_count, times)
+        left_timestamps = np.append(self.left_timestamps, -np.inf)
+        return left_timestamps[indexes]
+
+    def visit_ids(self) -> np.ndarray:
+        """
+        :return: (N,) Increases for each `VRCPlayerLeftEntry` of the player and each `VRCEnteringRoomEntry`, so that
+            consecutive samples of a player at prev_t and next_t are of the same visit unless one is in
+            (prev_t, next_t], as in `resample_tracks`.
+        """
+        visit_ids = np.searchsorted(self.room_entry_timestamps, self.timestamps, side='right')
+        if len(self.left_timestamps) > 0 and len(self.timestamps) > 0:
+            origin = min(self.timestamps.min(), self.left_timestamps.min())
+            span = max(self.timestamps.max(), self.left_timestamps.max()) - origin + 1.0
+            left_keys = self.left_player_indexes * span + (self.left_timestamps - origin)
+            sample_keys = self.player_indexes * span + (self.timestamps - origin)
+            visit_ids = visit_ids + np.searchsorted(left_keys, sample_keys, side='right')
+        return visit_ids
+
+    def time_range(self):
+        """
+        :return: (first timestamp, last timestamp) of samples. (NaN, NaN) if empty.
+        """
+        if len(self.timestamps) == 0:
+            return np.nan, np.nan
+        return float(self.timestamps.min()), float(self.timestamps.max())
+
+
+def search_last_per_group(
+        sorted_groups: np.ndarray,
+        sorted_values: np.ndarray,
+        group_count: int,
+        queries: np.ndarray,
+) -> np.ndarray:
+    """
+    Vectorized `searchsorted` within each group of an array sorted by (group, value).
+
+    :return: (group_count, Q) Index of the last element of each group whose value is at or before each query. -1 if
+        none.
+    """
+    queries = np.asarray(queries, dtype=np.float64)
+    if len(sorted_values) == 0 or len(queries) == 0:
+        return np.full((group_count, len(queries)), -1, dtype=np.int64)
+
+    # Lays out groups on one axis, so that one `searchsorted` call answers all (group, query) pairs.
+    origin = min(sorted_values.min(), queries.min())
+    span = max(sorted_values.max(), queries.max()) - origin + 1.0
+    keys = sorted_groups * span + (sorted_values - origin)
+    query_keys = np.arange(group_count)[:, np.newaxis] * span + (queries - origin)[np.newaxis, :]
+
+    indexes = np.searchsorted(keys, query_keys.ravel(), side='right').reshape(query_keys.shape) - 1
+    group_starts = np.searchsorted(sorted_groups, np.arange(group_count), side='left')
+    indexes[indexes < group_starts[:, np.newaxis]] = -1
+    return indexes
+
+
+def _to_float_columns(entries: List[VRCYAIBAPlayerPositionEntry], names) -> np.ndarray:
+    columns = np.empty((len(entries), len(names)), dtype=np.float64)
+    for i, name in enumerate(names):
+        columns[:, i] = np.array([getattr(e, name) for e in entries], dtype=np.float64)
+    return columns
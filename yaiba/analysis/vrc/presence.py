@@ -0,0 +1,169 @@
+"""
+Presence of players in the instance, from join / left events.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from yaiba.log.session_log import Entry, SessionLog
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry, VRCPlayerJoinEntry, VRCPlayerLeftEntry
+
+
+@dataclass(frozen=True)
+class PresenceInterval:
+    """
+    A player was present in `room_name` from `start` (inclusive) to `end` (exclusive), in epoch seconds.
+    `end` is inf if the player was still present at the end of the log.
+    """
+    player_name: str
+    start: float
+    end: float
+    room_name: Optional[str]
+
+
+class _IntervalTreeNode:
+    """
+    A node of a centered interval tree. Holds the intervals containing `center`, sorted by start and by end.
+    """
+
+    def __init__(self, intervals: List[PresenceInterval]):
+        starts = sorted(i.start for i in intervals)
+        # The median start is contained by its own interval, so every node holds at least one interval
+        self.center = starts[len(starts) // 2]
+
+        here = [i for i in intervals if i.start <= self.center < i.end]
+        left = [i for i in intervals if i.end <= self.center]
+        right = [i for i in intervals if self.center < i.start]
+
+        self.by_start = sorted(here, key=lambda i: i.start)
+        self.by_end = sorted(here, key=lambda i: i.end, reverse=True)
+        self.left = _IntervalTreeNode(left) if len(left) > 0 else None
+        self.right = _IntervalTreeNode(right) if len(right) > 0 else None
+
+    def overlapping(self, a: float, b: float, found: List[PresenceInterval]):
+        """
+        Appends intervals overlapping [a, b] to `found`.
+        """
+        node = self
+        while node is not None:
+            if b < node.center:
+                for interval in node.by_start:
+                    if interval.start > b:
+                        break
+                    found.append(interval)
+                node = node.left
+            elif node.center <= a:
+                for interval in node.by_end:
+                    if interval.end <= a:
+                        break
+                    found.append(interval)
+                node = node.right
+            else:
+                found += node.by_start
+                if node.left is not None:
+                    node.left.overlapping(a, b, found)
+                node = node.right
+
+
+class PresenceIndex:
+    """
+    Presence intervals of all players, built in one pass over join / left events. Presence is reset at each
+    `VRCEnteringRoomEntry`. Players are identified by `pseudo_user_name`, and times are epoch seconds.
+
+    Queries use a centered interval tree, in O(log n + k) for k results.
+    """
+
+    def __init__(self, intervals: List[PresenceInterval]):
+        self.intervals = sorted(intervals, key=lambda i: (i.start, i.player_name))
+        self._root = _IntervalTreeNode(self.intervals) if len(self.intervals) > 0 else None
+        self._sorted_starts = np.array([i.start for i in self.intervals], dtype=np.float64)
+        self._sorted_ends = np.sort(np.array([i.end for i in self.intervals], dtype=np.float64))
+
+    @classmethod
+    def from_session_log(cls, session_log: SessionLog) -> PresenceIndex:
+        return cls.from_entries(session_log.log_entries)
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Entry]) -> PresenceIndex:
+        intervals: List[PresenceInterval] = []
+        start_by_player: Dict[str, float] = {}
+        room_name: Optional[str] = None
+
+        def close(player_name: str, end: float):
+            start = start_by_player.pop(player_name)
+            if start < end:
+                intervals.append(PresenceInterval(player_name, start, end, room_name))
+
+        for entry in entries:
+            if isinstance(entry, VRCPlayerJoinEntry):
+                start_by_player.setdefault(entry.pseudo_user_name, entry.timestamp.timestamp())
+            elif isinstance(entry, VRCPlayerLeftEntry):
+                if entry.pseudo_user_name in start_by_player:
+                    close(entry.pseudo_user_name, entry.timestamp.timestamp())
+            elif isinstance(entry, VRCEnteringRoomEntry):
+                for player_name in list(start_by_player.keys()):
+                    close(player_name, entry.timestamp.timestamp())
+                room_name = entry.room_name
+
+        for player_name in list(start_by_player.keys()):
+            close(player_name, np.inf)
+        return cls(intervals)
+
+    def intervals_during(self, a: float, b: float) -> List[PresenceInterval]:
+        """
+        Intervals overlapping [a, b], sorted by (start, player_name).
+        """
+        found: List[PresenceInterval] = []
+        if self._root is not None:
+            self._root.overlapping(a, b, found)
+        found.sort(key=lambda i: (i.start, i.player_name))
+        return found
+
+    def intervals_at(self, t: float) -> List[PresenceInterval]:
+        return self.intervals_during(t, t)
+
+    def present_at(self, t: float) -> List[str]:
+        """
+        Players present at `t`, sorted.
+        """
+        return sorted(set(i.player_name for i in self.intervals_at(t)))
+
+    def present_during(self, a: float, b: float) -> List[str]:
+        """
+        Players present at some time in [a, b], sorted.
+        """
+        return sorted(set(i.player_name for i in self.intervals_during(a, b)))
+
+    def headcount(self, times: np.ndarray) -> np.ndarray:
+        """
+        :param times: (T,)
+        :return: (T,) int64 The number of players present at each time.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        started = np.searchsorted(self._sorted_starts, times, side='right')
+        ended = np.searchsorted(self._sorted_ends, times, side='right')
+        return started - ended
+
+    def headcount_series(
+            self,
+            interval_sec: float = 60.0,
+            start: Optional[float] = None,
+            end: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Headcount every `interval_sec`, from the first join (or `start`) to the last finite event (or `end`).
+
+        :return: (times, headcounts)
+        """
+        if len(self.intervals) == 0:
+            return np.zeros(0, dtype=np.float64), np.zeros(0, dtype=np.int64)
+        if start is None:
+            start = float(self._sorted_starts[0])
+        if end is None:
+            finite_ends = self._sorted_ends[np.isfinite(self._sorted_ends)]
+            end = float(max(self._sorted_starts[-1], finite_ends[-1] if len(finite_ends) > 0 else start))
+        times = start + np.arange(int(np.floor((end - start) / interval_sec)) + 1) * interval_sec
+        return times, self.headcount(times)
@@ -0,0 +1,258 @@
+"""
+Proximity (co-presence) detection: who stood near whom, and for how long.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Tuple, Union
+
+import numpy as np
+
+from yaiba.analysis.vrc.positions import PlayerPositions, PositionSource
+from yaiba.analysis.vrc.trajectory import ResampledTracks, iter_track_windows
+
+# Cells compared with each cell: itself and half of the neighbours, so that each pair of cells is visited once.
+_NEIGHBOR_CELL_OFFSETS = ((1, -1), (1, 0), (1, 1), (0, 1))
+
+
+@dataclass(frozen=True)
+class ContactInterval:
+    """
+    Two players were within the radius at every time step from `start` to `end` (epoch seconds, inclusive).
+
+    For one-sided gazes (see `facing`), `player_name_a` looks at `player_name_b`.
+    """
+    player_name_a: str
+    player_name_b: str
+    start: float
+    end: float
+    min_distance: float
+
+    @property
+    def duration_sec(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class _OpenContact:
+    start: float
+    end: float
+    last_step: int
+    min_distance: float
+
+
+class PairIntervalTracker:
+    """
+    Merges pairs of players found at each time step into intervals of consecutive time steps. Time steps are given
+    chunk by chunk, so that the whole session does not need to be in memory. An interval still open at the end of a
+    chunk is continued by the next chunk.
+    """
+
+    def __init__(self, player_names: np.ndarray):
+        self.player_names = player_names
+        self._open: Dict[Tuple[int, int], _OpenContact] = {}
+        self._step = 0
+
+    def add_pairs(
+            self,
+            times: np.ndarray,
+            steps: np.ndarray,
+            a: np.ndarray,
+            b: np.ndarray,
+            distances: np.ndarray,
+    ) -> List[ContactInterval]:
+        """
+        :param times: (T,) Time steps following the ones of the previous call.
+        :param steps: (K,) Index of the time step in `times` of each pair.
+        :return: Intervals which ended in or just before this chunk.
+        """
+        closed: List[ContactInterval] = []
+        if len(times) == 0:
+            return closed
+        first_step = self._step
+        last_step = first_step + len(times) - 1
+        self._step = last_step + 1
+
+        still_open: Dict[Tuple[int, int], _OpenContact] = {}
+        for run_start, run_end, pair, min_distance in _iter_runs(steps + first_step, a, b, distances):
+            contact = self._open.pop(pair, None)
+            if contact is not None and run_start == first_step and contact.last_step == first_step - 1:
+                contact.end = float(times[run_end - first_step])
+                contact.last_step = run_end
+                contact.min_distance = min(contact.min_distance, min_distance)
+            else:
+                if contact is not None:
+                    closed.append(self._to_interval(pair, contact))
+                contact = _OpenContact(
+                    start=float(times[run_start - first_step]),
+                    end=float(times[run_end - first_step]),
+                    last_step=run_end,
+                    min_distance=min_distance,
+                )
+            if run_end == last_step:
+                still_open[pair] = contact
+            else:
+                closed.append(self._to_interval(pair, contact))
+
+        for pair, contact in self._open.items():
+            closed.append(self._to_interval(pair, contact))
+        self._open = still_open
+        return closed
+
+    def close(self) -> List[ContactInterval]:
+        """
+        :return: Intervals still open at the end of the last chunk.
+        """
+        closed = [self._to_interval(pair, contact) for pair, contact in self._open.items()]
+        self._open = {}
+        return closed
+
+    def _to_interval(self, pair: Tuple[int, int], contact: _OpenContact) -> ContactInterval:
+        return ContactInterval(
+            player_name_a=self.player_names[pair[0]],
+            player_name_b=self.player_names[pair[1]],
+            start=contact.start,
+            end=contact.end,
+            min_distance=contact.min_distance,
+        )
+
+
+class ProximityDetector(PairIntervalTracker):
+    """
+    Detects contact intervals chunk by chunk (see `PairIntervalTracker`).
+
+    Distances are horizontal (location_x and location_z). Candidate pairs of each time step are found with a uniform
+    grid of `radius` sized cells, so only players in the same or adjacent cells are compared.
+    """
+
+    def __init__(self, player_names: np.ndarray, radius: float):
+        assert radius > 0, "radius must be positive"
+        super().__init__(player_names)
+        self.radius = radius
+
+    def update(self, times: np.ndarray, locations: np.ndarray, valid: np.ndarray) -> List[ContactInterval]:
+        """
+        :param locations: (T, P, 3)
+        :param valid: (T, P)
+        """
+        steps, a, b, distances = find_close_pairs(locations, valid, self.radius)
+        return self.add_pairs(times, steps, a, b, distances)
+
+
+def find_contacts(
+        source: Union[PositionSource, PlayerPositions, ResampledTracks],
+        radius: float = 1.5,
+        rate_hz: float = 1.0,
+        window_sec: float = 600.0,
+        min_duration_sec: float = 0.0,
+        **resample_options,
+) -> List[ContactInterval]:
+    """
+    Finds pairs of players within `radius` meters of each other, merged into intervals of consecutive time steps.
+
+    Positions are resampled (see `resample_tracks`) and processed `window_sec` at a time, so the memory use is bounded
+    by the window rather than by the session length.
+
+    :return: Sorted by (start, player_name_a, player_name_b).
+    """
+    detector = None
+    contacts: List[ContactInterval] = []
+    for tracks in iter_track_windows(source, rate_hz, window_sec, **resample_options):
+        if detector is None:
+            detector = ProximityDetector(tracks.player_names, radius)
+        contacts += detector.update(tracks.times, tracks.locations, tracks.valid)
+    if detector is not None:
+        contacts += detector.close()
+
+    contacts = [c for c in contacts if c.duration_sec >= min_duration_sec]
+    contacts.sort(key=lambda c: (c.start, c.player_name_a, c.player_name_b))
+    return contacts
+
+
+def find_close_pairs(
+        locations: np.ndarray,
+        valid: np.ndarray,
+        radius: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Finds all pairs of valid players within `radius` (horizontally) at each time step.
+
+    :param locations: (T, P, 3)
+    :param valid: (T, P)
+    :return: (step, player a, player b, distance), each (K,), with a < b.
+    """
+    point_steps, point_players = np.nonzero(valid)
+    xz = locations[point_steps, point_players][:, [0, 2]]
+    if len(xz) < 2:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, np.zeros(0, dtype=np.float64)
+
+    # One int64 key per (step, cell), with a margin of one cell on each side
+    cells = np.floor(xz / radius).astype(np.int64)
+    cells -= cells.min(axis=0) - 1
+    width = int(cells[:, 0].max()) + 2
+    height = int(cells[:, 1].max()) + 2
+    keys = (point_steps * width + cells[:, 0]) * height + cells[:, 1]
+
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    point_steps = point_steps[order]
+    point_players = point_players[order]
+    xz = xz[order]
+
+    # The same cell: the following points of the cell
+    cell_ends = np.searchsorted(keys, keys, side='right')
+    sources = [_expand_ranges(np.arange(1, len(keys) + 1), cell_ends)]
+    # Adjacent cells
+    for dx, dz in _NEIGHBOR_CELL_OFFSETS:
+        neighbor_keys = keys + (dx * height + dz)
+        starts = np.searchsorted(keys, neighbor_keys, side='left')
+        ends = np.searchsorted(keys, neighbor_keys, side='right')
+        sources.append(_expand_ranges(starts, ends))
+
+    i = np.concatenate([s[0] for s in sources])
+    j = np.concatenate([s[1] for s in sources])
+    distances = np.hypot(*(xz[i] - xz[j]).T)
+    close = distances <= radius
+    i, j, distances = i[close], j[close], distances[close]
+
+    a = np.minimum(point_players[i], point_players[j])
+    b = np.maximum(point_players[i], point_players[j])
+    return point_steps[i], a, b, distances
+
+
+def _expand_ranges(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :return: (i, j) for every i and every j in starts[i]:ends[i].
+    """
+    counts = np.maximum(ends - starts, 0)
+    i = np.repeat(np.arange(len(starts)), counts)
+    first_of_i = np.cumsum(counts) - counts
+    j = starts[i] + (np.arange(len(i)) - first_of_i[i])
+    return i, j
+
+
+def _iter_runs(
+        steps: np.ndarray,
+        a: np.ndarray,
+        b: np.ndarray,
+        distances: np.ndarray,
+) -> Iterator[Tuple[int, int, Tuple[int, int], float]]:
+    """
+    :return: (first step, last step, pair, min distance) of each run of consecutive steps of a pair.
+    """
+    if len(steps) == 0:
+        return
+    order = np.lexsort((steps, b, a))
+    steps, a, b, distances = steps[order], a[order], b[order], distances[order]
+
+    run_starts = np.flatnonzero(np.concatenate((
+        [True],
+        (a[1:] != a[:-1]) | (b[1:] != b[:-1]) | (steps[1:] != steps[:-1] + 1),
+    )))
+    run_ends = np.append(run_starts[1:], len(steps)) - 1
+    min_distances = np.minimum.reduceat(distances, run_starts)
+
+    for start, end, min_distance in zip(run_starts.tolist(), run_ends.tolist(), min_distances.tolist()):
+        yield steps[start].item(), steps[end].item(), (a[start].item(), b[start].item()), min_distance
+
@@ -0,0 +1,128 @@
+"""
+Point-in-time snapshots of the latest known position of every player.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+
+from yaiba.analysis.vrc.positions import PlayerPositions, PositionSource, search_last_per_group
+
+# Sequential queries advance cursors sample by sample up to this many times, then fall back to a binary search.
+_MAX_CURSOR_STEPS = 8
+
+
+@dataclass
+class Snapshot:
+    """
+    Latest samples of the players present at `time`, in the order of player index.
+    """
+    time: float
+    player_indexes: np.ndarray  # (K,) int64
+    player_names: np.ndarray  # (K,) object
+    timestamps: np.ndarray  # (K,) float64, of the samples
+    locations: np.ndarray  # (K, 3) float64
+    rotations: np.ndarray  # (K, 3) float64
+    is_vr: np.ndarray  # (K,) bool
+
+    def __len__(self):
+        return len(self.player_indexes)
+
+
+class SnapshotIndex:
+    """
+    Answers "where was every player at time t" from per-player sorted time arrays. A player is gone after a
+    `VRCPlayerLeftEntry` until the next sample, or when the latest sample is older than `max_age_sec`.
+
+    A query costs O(players * log samples). When queries move forward in small steps (ex. scrubbing an animation), the
+    per-player cursors of the previous query are advanced instead, in amortized O(1) per player.
+    """
+
+    def __init__(self, positions: PlayerPositions, max_age_sec: Optional[float] = None):
+        self.positions = positions
+        self.max_age_sec = max_age_sec
+
+        player_count = positions.player_count
+        self._sample_ends = positions.offsets[1:]
+        left_counts = np.bincount(positions.left_player_indexes, minlength=player_count)
+        self._left_offsets = np.zeros(player_count + 1, dtype=np.int64)
+        np.cumsum(left_counts, out=self._left_offsets[1:])
+
+        self._cursor_time = -np.inf
+        # Index of the latest sample / left entry of each player, or one before the player's first one.
+        self._sample_cursors = positions.offsets[:-1] - 1
+        self._left_cursors = self._left_offsets[:-1] - 1
+
+    @classmethod
+    def from_source(
+            cls,
+            source: Union[PositionSource, PlayerPositions],
+            max_age_sec: Optional[float] = None,
+    ) -> SnapshotIndex:
+        return cls(PlayerPositions.from_source(source), max_age_sec)
+
+    def snapshot(self, time: float) -> Snapshot:
+        self._seek(time)
+        positions = self.positions
+        has_sample = self._sample_cursors >= positions.offsets[:-1]
+        sample_indexes = np.where(has_sample, self._sample_cursors, 0)
+        sample_timestamps = positions.timestamps[sample_indexes] if len(positions) > 0 else np.zeros(0)
+
+        has_left = self._left_cursors >= self._left_offsets[:-1]
+        left_indexes = np.where(has_left, self._left_cursors, 0)
+        left_timestamps = np.where(has_left, positions.left_timestamps[left_indexes], -np.inf) \
+            if len(positions.left_timestamps) > 0 else np.full(positions.player_count, -np.inf)
+
+        present = has_sample & (left_timestamps < sample_timestamps)
+        if self.max_age_sec is not None:
+            present &= time - sample_timestamps <= self.max_age_sec
+
+        player_indexes = np.flatnonzero(present)
+        indexes = sample_indexes[player_indexes]
+        return Snapshot(
+            time=time,
+            player_indexes=player_indexes,
+            player_names=positions.player_names[player_indexes],
+            timestamps=positions.timestamps[indexes],
+            locations=positions.locations[indexes],
+            rotations=positions.rotations[indexes],
+            is_vr=positions.is_vr[indexes],
+        )
+
+    def _seek(self, time: float):
+        positions = self.positions
+        if time >= self._cursor_time:
+            samples_done = _advance(self._sample_cursors, self._sample_ends, positions.timestamps, time)
+            lefts_done = _advance(self._left_cursors, self._left_offsets[1:], positions.left_timestamps, time)
+            if samples_done and lefts_done:
+                self._cursor_time = time
+                return
+
+        times = np.array([time], dtype=np.float64)
+        sample_indexes = positions.last_sample_indexes(times)[:, 0]
+        self._sample_cursors = np.where(sample_indexes >= 0, sample_indexes, positions.offsets[:-1] - 1)
+        left_indexes = search_last_per_group(
+            positions.left_player_indexes, positions.left_timestamps, positions.player_count, times)[:, 0]
+        self._left_cursors = np.where(left_indexes >= 0, left_indexes, self._left_offsets[:-1] - 1)
+        self._cursor_time = time
+
+
+def _advance(cursors: np.ndarray, ends: np.ndarray, timestamps: np.ndarray, time: float) -> bool:
+    """
+    Moves each cursor forward while the next element of the group is at or before `time`, up to `_MAX_CURSOR_STEPS`
+    times.
+
+    :param cursors: (G,) Updated in place.
+    :param ends: (G,) End (exclusive) of each group.
+    :return: Whether all cursors reached `time`.
+    """
+    for _ in range(_MAX_CURSOR_STEPS):
+        next_indexes = cursors + 1
+        can_advance = next_indexes < ends
+        can_advance[can_advance] = timestamps[next_indexes[can_advance]] <= time
+        if not can_advance.any():
+            return True
+        cursors[can_advance] += 1
+    return False
@@ -0,0 +1,171 @@
+"""
+Yodokoro tag statistics with bitwise operations over a (time x player) bitmask matrix.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from yaiba.log.session_log import Entry, SessionLog
+from yaiba.log.types import VRCPlayerId
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry
+from yaiba.log.vrc.entries.yodokoro_tag_marker import TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY, VRCYodokoroTagMarkerEntry
+
+
+@dataclass
+class YodokoroTagMatrix:
+    """
+    Tags of all players at each Yodokoro dump.
+
+    Timestamps are epoch seconds. A player who is not in a dump has `present` False and tag bits 0.
+    """
+    timestamps: np.ndarray  # (T,) float64
+    player_ids: np.ndarray  # (P,) int64, sorted
+    tag_bits: np.ndarray  # (T, P) uint64
+    present: np.ndarray  # (T, P) bool
+    tag_names: List[str]
+
+    @classmethod
+    def from_session_log(cls, session_log: SessionLog, tag_names: Optional[List[str]] = None) -> YodokoroTagMatrix:
+        return cls.from_entries(session_log.log_entries, tag_names)
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Entry], tag_names: Optional[List[str]] = None) -> YodokoroTagMatrix:
+        """
+        :param tag_names: Tag names of the bits. Default: `tag_names` of the first dump if stored, otherwise
+            `TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY`.
+        """
+        timestamps = []
+        player_ids_per_dump = []
+        tag_bits_per_dump = []
+
+        state = {}
+        for entry in entries:
+            if isinstance(entry, VRCEnteringRoomEntry):
+                # Change-only dumps start again from no player in a new room
+                state = {}
+                continue
+            if not isinstance(entry, VRCYodokoroTagMarkerEntry):
+                continue
+            if tag_names is None:
+                tag_names = entry.tag_names if entry.tag_names is not None else TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY
+            state = entry.update_tag_bits(state, tag_names)
+            timestamps.append(entry.timestamp.timestamp())
+            player_ids_per_dump.append(np.fromiter(state.keys(), dtype=np.int64, count=len(state)))
+            tag_bits_per_dump.append(np.fromiter(state.values(), dtype=np.uint64, count=len(state)))
+
+        if tag_names is None:
+            tag_names = TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY
+
+        if len(timestamps) == 0:
+            return cls(
+                timestamps=np.zeros(0, dtype=np.float64),
+                player_ids=np.zeros(0, dtype=np.int64),
+                tag_bits=np.zeros((0, 0), dtype=np.uint64),
+                present=np.zeros((0, 0), dtype=bool),
+                tag_names=list(tag_names),
+            )
+
+        all_player_ids = np.concatenate(player_ids_per_dump)
+        player_ids = np.unique(all_player_ids)
+        rows = np.repeat(np.arange(len(timestamps)), [len(p) for p in player_ids_per_dump])
+        columns = np.searchsorted(player_ids, all_player_ids)
+
+        tag_bits = np.zeros((len(timestamps), len(player_ids)), dtype=np.uint64)
+        tag_bits[rows, columns] = np.concatenate(tag_bits_per_dump)
+        present = np.zeros(tag_bits.shape, dtype=bool)
+        present[rows, columns] = True
+
+        # Ignores bits without a name
+        if len(tag_names) < 64:
+            tag_bits &= np.uint64((1 << len(tag_names)) - 1)
+
+        return cls(
+            timestamps=np.array(timestamps, dtype=np.float64),
+            player_ids=player_ids,
+            tag_bits=tag_bits,
+            present=present,
+            tag_names=list(tag_names),
+        )
+
+    def membership(self) -> np.ndarray:
+        """
+        :return: (T, P, n_tags) bool. Whether the player has the tag at the dump.
+        """
+        return _unpack_bits(self.tag_bits, len(self.tag_names))
+
+    def player_counts(self) -> np.ndarray:
+        """
+        :return: (T,) The number of players in each dump.
+        """
+        return self.present.sum(axis=1)
+
+    def tag_counts(self) -> np.ndarray:
+        """
+        :return: (T, n_tags) The number of players who have each tag, per dump.
+        """
+        # One pass per tag, rather than unpacking into a (T, P, n_tags) array
+        counts = np.empty((len(self.timestamps), len(self.tag_names)), dtype=np.int64)
+        for i in range(len(self.tag_names)):
+            counts[:, i] = np.count_nonzero(self.tag_bits & np.uint64(1 << i), axis=1)
+        return counts
+
+    def tag_ratios(self) -> np.ndarray:
+        """
+        :return: (T, n_tags) The ratio of players who have each tag, per dump. NaN for an empty dump.
+        """
+        player_counts = self.player_counts().astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.tag_counts() / player_counts[:, np.newaxis]
+
+    def tags_per_player(self) -> np.ndarray:
+        """
+        :return: (T, P) The number of tags of each player, per dump.
+        """
+        return _popcount(self.tag_bits)
+
+    def tag_bits_for_player_id(self, player_id: VRCPlayerId) -> np.ndarray:
+        """
+        :return: (T,) Tag bits of the player, per dump.
+        """
+        column = np.searchsorted(self.player_ids, player_id)
+        if column >= len(self.player_ids) or self.player_ids[column] != player_id:
+            return np.zeros(len(self.timestamps), dtype=np.uint64)
+        return self.tag_bits[:, column]
+
+    def player_tag_bits(self) -> np.ndarray:
+        """
+        :return: (P,) Union of tags each player had during the whole session.
+        """
+        if len(self.timestamps) == 0:
+            return np.zeros(len(self.player_ids), dtype=np.uint64)
+        return np.bitwise_or.reduce(self.tag_bits, axis=0)
+
+    def unique_tag_counts(self) -> np.ndarray:
+        """
+        :return: (n_tags,) The number of players who had each tag at least once.
+        """
+        return _unpack_bits(self.player_tag_bits(), len(self.tag_names)).sum(axis=0)
+
+    def co_occurrence(self, time_index: Optional[int] = None) -> np.ndarray:
+        """
+        :param time_index: If given, only counts tags at the dump. Otherwise, counts tags each player had at least once.
+        :return: (n_tags, n_tags) The number of players who have both tags. The diagonal is the number of players who
+            have the tag.
+        """
+        tag_bits = self.player_tag_bits() if time_index is None else self.tag_bits[time_index]
+        membership = _unpack_bits(tag_bits, len(self.tag_names)).astype(np.int64)
+        return membership.T @ membership
+
+
+def _unpack_bits(tag_bits: np.ndarray, n_tags: int) -> np.ndarray:
+    shifts = np.arange(n_tags, dtype=np.uint64)
+    return ((tag_bits[..., np.newaxis] >> shifts) & np.uint64(1)).astype(bool)
+
+
+def _popcount(tag_bits: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(tag_bits).astype(np.int64)
+    return _unpack_bits(tag_bits, 64).sum(axis=-1)
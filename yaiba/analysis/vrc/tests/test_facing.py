@@ -0,0 +1,69 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from yaiba.analysis.vrc.facing import facing_vectors, find_facing_pairs, find_gazes
+from yaiba.analysis.vrc.trajectory import ResampledTracks
+
+PLAYER_NAMES = np.array(["A", "B", "C"], dtype=object)
+
+
+def _tracks(xs, yaws) -> ResampledTracks:
+    xs = np.asarray(xs, dtype=np.float64)
+    locations = np.zeros(xs.shape + (3,))
+    locations[..., 0] = xs
+    rotations = np.zeros(xs.shape + (3,))
+    rotations[..., 1] = yaws
+    return ResampledTracks(np.arange(len(xs), dtype=np.float64), PLAYER_NAMES, locations, rotations, ~np.isnan(xs))
+
+
+def test__facing_vectors():
+    vectors = facing_vectors(np.array([[0.0, 0.0, 0.0], [0.0, 90.0, 0.0], [90.0, 0.0, 0.0]]))
+
+    assert vectors == pytest.approx(np.array([[0.0, 0.0, 1.0], [1.0, 0.0, 0.0], [0.0, -1.0, 0.0]]))
+
+
+def test__find_facing_pairs():
+    # A faces B and C, B faces A, C faces B and A (occlusion is ignored)
+    tracks = _tracks([[0.0, 1.0, 2.0]], [[90.0, 270.0, 270.0]])
+
+    steps, a, b, distances = find_facing_pairs(tracks.locations, tracks.rotations, tracks.valid, 30.0, 3.0)
+
+    assert sorted(zip(a.tolist(), b.tolist())) == [(0, 1), (0, 2), (1, 0), (2, 0), (2, 1)]
+    assert steps.tolist() == [0] * 5
+
+
+class TestFindGazes:
+    def test__mutual(self):
+        tracks = _tracks([
+            [0.0, 1.0, 2.0],
+            [0.0, 1.0, 2.0],
+            [0.0, 1.0, 2.0],
+        ], [
+            [90.0, 270.0, 270.0],
+            [90.0, 0.0, 270.0],
+            [90.0, 270.0, 270.0],
+        ])
+
+        gazes = find_gazes(tracks, max_angle_deg=30.0, max_distance=3.0)
+
+        assert [(g.player_name_a, g.player_name_b, g.start, g.end) for g in gazes] == [
+            ("A", "B", 0.0, 0.0),
+            ("A", "C", 0.0, 2.0),
+            ("A", "B", 2.0, 2.0),
+        ]
+
+    def test__one_sided(self):
+        tracks = _tracks([[0.0, 1.0, np.nan]], [[90.0, 0.0, 0.0]])
+
+        gazes = find_gazes(tracks, mutual=False)
+
+        assert [(g.player_name_a, g.player_name_b) for g in gazes] == [("A", "B")]
+
+    def test__v0_without_location_y(self):
+        tracks = _tracks([[0.0, 1.0, np.nan]], [[90.0, 270.0, 0.0]])
+        tracks.locations[..., 1] = np.nan
+
+        gazes = find_gazes(tracks)
+
+        assert [(g.player_name_a, g.player_name_b) for g in gazes] == [("A", "B")]
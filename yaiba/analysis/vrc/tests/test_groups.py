@@ -0,0 +1,152 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from yaiba.analysis.vrc import groups as groups_module
+from yaiba.analysis.vrc.groups import (
+    NO_GROUP,
+    ConversationGroup,
+    ConversationGroupTracker,
+    _remove_short_groups,
+    detect_groups,
+)
+from yaiba.analysis.vrc.trajectory import ResampledTracks
+
+PLAYER_NAMES = np.array(["A", "B", "C", "D"], dtype=object)
+
+
+def _tracks(xs, yaws=None) -> ResampledTracks:
+    """
+    :param xs: (T, P) location_x of each player. NaN for invalid.
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    locations = np.zeros(xs.shape + (3,))
+    locations[..., 0] = xs
+    rotations = np.zeros(xs.shape + (3,))
+    if yaws is not None:
+        rotations[..., 1] = yaws
+    return ResampledTracks(np.arange(len(xs), dtype=np.float64), PLAYER_NAMES, locations, rotations, ~np.isnan(xs))
+
+
+class TestDetectGroups:
+    def test__split_and_merge(self):
+        tracks = _tracks([
+            [0.0, 1.0, 10.0, 11.0],
+            [0.0, 1.0, 10.0, 11.0],
+            [0.0, 1.0, 2.0, 3.0],  # merged
+            [0.0, 1.0, 2.0, 3.0],
+            [0.0, 1.0, 20.0, 21.0],  # split
+        ])
+
+        timeline = detect_groups(tracks, radius=1.5)
+
+        assert timeline.labels.tolist() == [
+            [0, 0, 1, 1],
+            [0, 0, 1, 1],
+            [0, 0, 0, 0],
+            [0, 0, 0, 0],
+            [0, 0, 2, 2],
+        ]
+        assert timeline.groups[0].merged_from == [1]
+        assert timeline.groups[2].split_from == 0
+        assert (timeline.groups[0].start, timeline.groups[0].end) == (0.0, 4.0)
+        assert (timeline.groups[1].start, timeline.groups[1].end) == (0.0, 1.0)
+
+    def test__min_size_and_duration(self):
+        tracks = _tracks([
+            [0.0, 1.0, 2.0, np.nan],
+            [0.0, 1.0, 2.0, 10.0],
+            [0.0, 1.0, 20.0, 10.5],
+        ])
+
+        timeline = detect_groups(tracks, radius=1.5, min_size=3)
+        assert timeline.labels[:, 0].tolist() == [0, 0, NO_GROUP]
+
+        timeline = detect_groups(tracks, radius=1.5, min_duration_sec=1.0)
+        assert timeline.labels[:, 3].tolist() == [NO_GROUP, NO_GROUP, NO_GROUP]
+        assert list(timeline.groups.keys()) == [0]
+
+    def test__min_duration__links(self):
+        tracks = _tracks([
+            [0.0, 1.0, 10.0, 20.0],
+            [0.0, 1.0, 10.0, 11.0],  # C and D for one step
+            [0.0, 1.0, 2.0, 3.0],  # merged
+            [0.0, 1.0, 2.0, 3.0],
+        ])
+
+        assert detect_groups(tracks, radius=1.5).groups[0].merged_from == [1]
+
+        timeline = detect_groups(tracks, radius=1.5, min_duration_sec=1.0)
+
+        # The removed group is not linked
+        assert list(timeline.groups.keys()) == [0]
+        assert timeline.groups[0].merged_from == []
+        assert timeline.labels[1].tolist() == [0, 0, NO_GROUP, NO_GROUP]
+
+    def test__remove_short_groups(self):
+        groups = {
+            0: ConversationGroup(0, start=0.0, end=10.0),
+            1: ConversationGroup(1, start=2.0, end=2.0, split_from=0, merged_from=[3]),
+            2: ConversationGroup(2, start=3.0, end=9.0, split_from=1),
+            3: ConversationGroup(3, start=0.0, end=1.5),
+            4: ConversationGroup(4, start=0.0, end=2.0),
+            5: ConversationGroup(5, start=1.0, end=8.0, merged_from=[1, 4]),
+        }
+
+        kept = _remove_short_groups(groups, min_duration_sec=1.0)
+
+        assert list(kept.keys()) == [0, 2, 3, 4, 5]
+        # Through the removed group 1
+        assert kept[2].split_from == 0
+        assert kept[5].merged_from == [3, 4]
+        assert groups[5].merged_from == [1, 4]
+
+    def test__facing(self):
+        # A and B face each other, C faces away
+        tracks = _tracks([[0.0, 1.0, 1.4, np.nan]], yaws=[[90.0, 270.0, 0.0, 0.0]])
+
+        timeline = detect_groups(tracks, radius=1.5, facing_angle_deg=45.0)
+
+        assert timeline.labels.tolist() == [[0, 0, NO_GROUP, NO_GROUP]]
+
+    def test__membership_intervals(self):
+        timeline = detect_groups(_tracks([
+            [0.0, 1.0, 10.0, 20.0],
+            [0.0, 1.0, 1.5, 20.0],
+        ]), radius=1.5)
+
+        assert timeline.membership_intervals() == [
+            (0, "A", 0.0, 1.0),
+            (0, "B", 0.0, 1.0),
+            (0, "C", 1.0, 1.0),
+        ]
+
+
+class TestConversationGroupTracker:
+    def test__keeps_ids_across_chunks(self):
+        tracks = _tracks([[0.0, 1.0, 10.0, 11.0]] * 4)
+        tracker = ConversationGroupTracker(PLAYER_NAMES)
+
+        first = tracker.update(tracks.times[:2], tracks.locations[:2], tracks.rotations[:2], tracks.valid[:2])
+        second = tracker.update(tracks.times[2:], tracks.locations[2:], tracks.rotations[2:], tracks.valid[2:])
+
+        assert first.tolist() == second.tolist() == [[0, 0, 1, 1]] * 2
+        assert tracker.groups[1].end == 3.0
+
+    def test__clusters_only_changed_steps(self, monkeypatch):
+        node_counts = []
+        connected_components = groups_module._connected_components
+
+        def counting_connected_components(node_count, u, v):
+            node_counts.append(node_count)
+            return connected_components(node_count, u, v)
+
+        monkeypatch.setattr(groups_module, "_connected_components", counting_connected_components)
+        # Moving players whose neighbours change once
+        tracks = _tracks([[0.0 + t, 1.0 + t, 10.0, 11.0] for t in range(5)] + [[0.0, 1.0, 2.0, 3.0]] * 5)
+        tracker = ConversationGroupTracker(PLAYER_NAMES)
+
+        labels = tracker.update(tracks.times, tracks.locations, tracks.rotations, tracks.valid)
+
+        assert node_counts == [2 * len(PLAYER_NAMES)]
+        assert labels.tolist() == [[0, 0, 1, 1]] * 5 + [[0, 0, 0, 0]] * 5
@@ -0,0 +1,111 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from yaiba.analysis.vrc.heatmap import GROUP_BY_PLAYER, GROUP_BY_YODOKORO_TAG, HeatmapAccumulator
+from yaiba.log.types import PseudoUserName, RawEntry, UserName, VRCPlayerId
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry, VRCPlayerLeftEntry
+from yaiba.log.vrc.entries.player_position import VRCYAIBAPlayerPositionEntry
+from yaiba.log.vrc.entries.yodokoro_tag_marker import VRCYodokoroTagMarkerEntry, YodokoroTagMarkerEntryParser
+from yaiba.log.vrc.utils import parse_timestamp
+
+
+def _position_entry(second: int, user_name: str, x: float, z: float, player_id: int = 7):
+    return VRCYAIBAPlayerPositionEntry(
+        parse_timestamp(f"2022.03.04 21:50:{second:02d}"),
+        player_id=VRCPlayerId(player_id),
+        user_name=UserName(user_name),
+        pseudo_user_name=PseudoUserName(user_name),
+        location_x=x,
+        location_y=0.0,
+        location_z=z,
+        rotation_1=0.0,
+        rotation_2=0.0,
+        rotation_3=0.0,
+        velocity_x=None,
+        velocity_y=None,
+        velocity_z=None,
+        is_vr=False,
+    )
+
+
+ENTRIES = [
+    _position_entry(0, "A", 0.2, 0.2, player_id=1),
+    _position_entry(0, "B", 1.2, 0.2, player_id=2),
+    _position_entry(2, "A", 1.2, 0.2, player_id=1),
+    _position_entry(3, "A", 1.2, 0.2, player_id=1),
+    VRCPlayerLeftEntry(
+        parse_timestamp("2022.03.04 21:50:05"), user_name=UserName("B"), pseudo_user_name=PseudoUserName("B")),
+]
+
+
+class TestHeatmapAccumulator:
+    def test__normal(self):
+        heatmap = HeatmapAccumulator(bin_size=1.0).add_entries(ENTRIES).total()
+
+        assert heatmap.seconds.tolist() == [[2.0, 1.0 + 5.0]]
+        assert heatmap.x_edges.tolist() == [0.0, 1.0, 2.0]
+        assert heatmap.z_edges.tolist() == [0.0, 1.0]
+
+    def test__batches_and_max_dwell(self):
+        accumulator = HeatmapAccumulator(bin_size=1.0, max_dwell_sec=1.5, batch_size=2)
+        for entry in ENTRIES:
+            accumulator.add(entry)
+
+        assert accumulator.total().seconds.tolist() == [[1.5, 1.0 + 1.5]]
+
+    def test__group_by_player(self):
+        accumulator = HeatmapAccumulator(bin_size=1.0, group_by=GROUP_BY_PLAYER).add_entries(ENTRIES)
+
+        assert sorted(accumulator.groups) == ["A", "B"]
+        assert accumulator.heatmap("A").seconds.tolist() == [[2.0, 1.0]]
+        assert accumulator.heatmap("B").seconds.tolist() == [[0.0, 5.0]]
+
+    def test__group_by_yodokoro_tag(self):
+        marker = VRCYodokoroTagMarkerEntry(
+            timestamp=parse_timestamp("2022.03.04 21:50:00"),
+            tag_names_for_player_id={VRCPlayerId(1): ["x", "y"], VRCPlayerId(2): []},
+        )
+        accumulator = HeatmapAccumulator(bin_size=1.0, group_by=GROUP_BY_YODOKORO_TAG, tag_names=["x", "y"])
+        accumulator.add_entries([marker] + ENTRIES)
+
+        assert accumulator.heatmap("x").seconds.tolist() == [[2.0, 1.0]]
+        assert accumulator.heatmap("y").seconds.tolist() == [[2.0, 1.0]]
+        assert accumulator.heatmap(None).seconds.tolist() == [[0.0, 5.0]]
+
+    def test__group_by_yodokoro_tag__two_rooms(self):
+        parser = YodokoroTagMarkerEntryParser(tag_names=["x", "y"], changes_only=True)
+        room_entry = VRCEnteringRoomEntry(parse_timestamp("2022.03.04 21:50:10"), room_name="SecondRoom")
+        entries = [
+            parser.parse(RawEntry("2022.03.04 21:50:00 Log        -  [Yodo][Dump][0,1,00000001],")),
+            _position_entry(0, "A", 0.2, 0.2, player_id=1),
+            _position_entry(2, "A", 0.2, 0.2, player_id=1),
+            room_entry,
+        ]
+        parser.observe(room_entry)
+        entries += [
+            parser.parse(RawEntry("2022.03.04 21:50:11 Log        -  [Yodo][Dump][0,2,00000002],")),
+            # Player id 1 is another player in the second room, without a tag
+            _position_entry(11, "C", 1.2, 0.2, player_id=1),
+            _position_entry(13, "C", 1.2, 0.2, player_id=1),
+        ]
+
+        accumulator = HeatmapAccumulator(bin_size=1.0, group_by=GROUP_BY_YODOKORO_TAG).add_entries(entries)
+
+        assert accumulator.heatmap("x").seconds.tolist() == [[2.0, 0.0]]
+        assert accumulator.heatmap(None).seconds.tolist() == [[0.0, 2.0]]
+
+    def test__merge(self):
+        first = HeatmapAccumulator(bin_size=1.0).add_entries(ENTRIES)
+        second = HeatmapAccumulator(bin_size=1.0).add_entries([
+            _position_entry(0, "C", -0.5, 1.5),
+            _position_entry(4, "C", -0.5, 1.5),
+        ])
+
+        heatmap = first.merge(second).total()
+
+        assert heatmap.seconds.tolist() == [
+            [0.0, 2.0, 6.0],
+            [4.0, 0.0, 0.0],
+        ]
+        assert heatmap.x_edges.tolist() == [-1.0, 0.0, 1.0, 2.0]
@@ -0,0 +1,92 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from yaiba.analysis.vrc.movement import grouped_quantile, movement_stats
+from yaiba.log.types import PseudoUserName, UserName, VRCPlayerId
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry, VRCPlayerLeftEntry
+from yaiba.log.vrc.entries.player_position import VRCYAIBAPlayerPositionEntry
+from yaiba.log.vrc.utils import parse_timestamp
+
+
+def _position_entry(second: int, user_name: str, x: float, velocity_x=None, is_vr=False):
+    return VRCYAIBAPlayerPositionEntry(
+        parse_timestamp(f"2022.03.04 21:50:{second:02d}"),
+        player_id=VRCPlayerId(7),
+        user_name=UserName(user_name),
+        pseudo_user_name=PseudoUserName(user_name),
+        location_x=x,
+        location_y=0.0,
+        location_z=0.0,
+        rotation_1=0.0,
+        rotation_2=0.0,
+        rotation_3=0.0,
+        velocity_x=velocity_x,
+        velocity_y=None if velocity_x is None else 0.0,
+        velocity_z=None if velocity_x is None else 0.0,
+        is_vr=is_vr,
+    )
+
+
+def test__movement_stats():
+    stats = movement_stats([
+        # A: finite differences, two samples in the same second
+        _position_entry(0, "A", 0.0),
+        _position_entry(1, "A", 0.5),
+        _position_entry(1, "A", 1.0),
+        _position_entry(2, "A", 1.0),
+        _position_entry(30, "A", 5.0),
+        # B: velocities, in VR
+        _position_entry(0, "B", 0.0, velocity_x=0.0, is_vr=True),
+        _position_entry(2, "B", 2.0, velocity_x=3.0, is_vr=True),
+    ])
+
+    assert stats.player_names.tolist() == ["A", "B"]
+    assert stats.sample_counts.tolist() == [5, 2]
+    assert stats.observed_sec.tolist() == [2.0, 2.0]
+    assert stats.path_lengths.tolist() == [1.0, 2.0]
+    assert stats.moving_sec.tolist() == [1.0, 2.0]
+    assert stats.idle_sec.tolist() == [1.0, 0.0]
+    assert stats.max_speeds.tolist() == [1.0, 3.0]
+    assert stats.median_speeds.tolist() == [0.5, 3.0]
+    assert stats.vr_sec.tolist() == [0.0, 2.0]
+    assert stats.desktop_sec.tolist() == [2.0, 0.0]
+    assert stats.last_timestamps[0] - stats.first_timestamps[0] == 30.0
+
+
+def test__movement_stats__leave_and_room_entry():
+    stats = movement_stats([
+        _position_entry(0, "A", 0.0),
+        _position_entry(1, "A", 1.0),
+        VRCPlayerLeftEntry(parse_timestamp("2022.03.04 21:50:02"), UserName("A"), PseudoUserName("A")),
+        # Rejoined elsewhere
+        _position_entry(3, "A", 50.0),
+        _position_entry(4, "A", 50.0),
+        VRCEnteringRoomEntry(parse_timestamp("2022.03.04 21:50:05"), "SecondRoom"),
+        _position_entry(6, "A", -50.0),
+        _position_entry(7, "A", -49.0),
+    ])
+
+    assert stats.path_lengths.tolist() == [2.0]
+    assert stats.observed_sec.tolist() == [3.0]
+    assert stats.moving_sec.tolist() == [2.0]
+    assert stats.max_speeds.tolist() == [1.0]
+
+
+def test__movement_stats__empty():
+    stats = movement_stats([])
+
+    assert len(stats.player_names) == 0
+    assert len(stats.path_lengths) == 0
+
+
+def test__grouped_quantile():
+    rng = np.random.default_rng(0)
+    groups = rng.integers(0, 5, 100)
+    values = rng.normal(size=100)
+
+    quantiles = grouped_quantile(groups, values, 6, 0.9)
+
+    for g in range(5):
+        assert quantiles[g] == pytest.approx(np.quantile(values[groups == g], 0.9))
+    assert np.isnan(quantiles[5])
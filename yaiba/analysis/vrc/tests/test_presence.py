@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from yaiba.analysis.vrc.presence import PresenceIndex, PresenceInterval
+from yaiba.log.session_log import SessionLog
+from yaiba.log.types import PseudoUserName, UserName
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry, VRCPlayerJoinEntry, VRCPlayerLeftEntry
+from yaiba.log.vrc.utils import parse_timestamp
+
+
+def _timestamp(second: int):
+    return parse_timestamp(f"2022.03.04 21:50:{second:02d}")
+
+
+def _join(second: int, user_name: str) -> VRCPlayerJoinEntry:
+    return VRCPlayerJoinEntry(_timestamp(second), UserName(user_name), PseudoUserName(user_name))
+
+
+def _left(second: int, user_name: str) -> VRCPlayerLeftEntry:
+    return VRCPlayerLeftEntry(_timestamp(second), UserName(user_name), PseudoUserName(user_name))
+
+
+SESSION_LOG = SessionLog(log_entries=[
+    VRCEnteringRoomEntry(_timestamp(0), "room 1"),
+    _join(0, "A"),
+    _join(1, "B"),
+    _left(3, "B"),
+    _join(4, "C"),
+    VRCEnteringRoomEntry(_timestamp(10), "room 2"),
+    _join(10, "A"),
+    _join(12, "B"),
+])
+T0 = _timestamp(0).timestamp()
+
+
+class TestPresenceIndex:
+    def test__from_session_log(self):
+        index = PresenceIndex.from_session_log(SESSION_LOG)
+
+        assert index.intervals == [
+            PresenceInterval("A", T0, T0 + 10, "room 1"),
+            PresenceInterval("B", T0 + 1, T0 + 3, "room 1"),
+            PresenceInterval("C", T0 + 4, T0 + 10, "room 1"),
+            PresenceInterval("A", T0 + 10, np.inf, "room 2"),
+            PresenceInterval("B", T0 + 12, np.inf, "room 2"),
+        ]
+
+    def test__queries(self):
+        index = PresenceIndex.from_session_log(SESSION_LOG)
+
+        assert index.present_at(T0 + 2) == ["A", "B"]
+        assert index.present_at(T0 + 3) == ["A"]
+        assert index.present_at(T0 + 10) == ["A"]
+        assert index.present_during(T0 + 3, T0 + 4) == ["A", "C"]
+        assert index.present_during(T0 - 10, T0 - 1) == []
+
+    def test__queries__same_as_brute_force(self):
+        rng = random.Random(0)
+        intervals = []
+        for i in range(200):
+            start = rng.randint(0, 100)
+            intervals.append(PresenceInterval(str(i), start, start + rng.randint(1, 20), None))
+        index = PresenceIndex(intervals)
+
+        for _ in range(100):
+            a = rng.uniform(-5, 125)
+            b = a + rng.choice([0, rng.uniform(0, 10)])
+            expected = sorted(i.player_name for i in intervals if i.start <= b and a < i.end)
+            assert sorted(i.player_name for i in index.intervals_during(a, b)) == expected
+
+    def test__headcount(self):
+        index = PresenceIndex.from_session_log(SESSION_LOG)
+
+        times, counts = index.headcount_series(interval_sec=2.0)
+
+        assert (times - T0).tolist() == [0.0, 2.0, 4.0, 6.0, 8.0, 10.0, 12.0]
+        assert counts.tolist() == [1, 2, 2, 2, 2, 1, 2]
@@ -0,0 +1,91 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from yaiba.analysis.vrc.proximity import ContactInterval, ProximityDetector, find_close_pairs, find_contacts
+from yaiba.analysis.vrc.trajectory import ResampledTracks
+from yaiba.log.types import PseudoUserName, UserName, VRCPlayerId
+from yaiba.log.vrc.entries.player_position import VRCYAIBAPlayerPositionEntry
+from yaiba.log.vrc.utils import parse_timestamp
+
+
+def _position_entry(second: int, user_name: str, x: float, z: float = 0.0) -> VRCYAIBAPlayerPositionEntry:
+    return VRCYAIBAPlayerPositionEntry(
+        parse_timestamp(f"2022.03.04 21:50:{second:02d}"),
+        player_id=VRCPlayerId(7),
+        user_name=UserName(user_name),
+        pseudo_user_name=PseudoUserName(user_name),
+        location_x=x,
+        location_y=0.0,
+        location_z=z,
+        rotation_1=0.0,
+        rotation_2=0.0,
+        rotation_3=0.0,
+        velocity_x=None,
+        velocity_y=None,
+        velocity_z=None,
+        is_vr=False,
+    )
+
+
+def test__find_close_pairs__same_as_brute_force():
+    rng = np.random.default_rng(0)
+    locations = rng.uniform(-10, 10, size=(5, 40, 3))
+    valid = rng.uniform(size=(5, 40)) < 0.9
+
+    steps, a, b, distances = find_close_pairs(locations, valid, radius=2.0)
+
+    expected = set()
+    for t in range(5):
+        for i in range(40):
+            for j in range(i + 1, 40):
+                d = np.hypot(locations[t, i, 0] - locations[t, j, 0], locations[t, i, 2] - locations[t, j, 2])
+                if valid[t, i] and valid[t, j] and d <= 2.0:
+                    expected.add((t, i, j))
+    assert set(zip(steps.tolist(), a.tolist(), b.tolist())) == expected
+    assert len(steps) == len(expected)
+
+
+class TestFindContacts:
+    def test__normal(self):
+        entries = [
+            _position_entry(0, "A", 0.0),
+            _position_entry(0, "B", 10.0),
+            _position_entry(0, "C", 0.0, z=1.0),
+            _position_entry(2, "B", 1.0),
+            _position_entry(6, "B", 10.0),
+        ]
+
+        contacts = find_contacts(entries, radius=1.5, interpolation="previous", window_sec=3.0)
+
+        t0 = entries[0].timestamp.timestamp()
+        assert contacts == [
+            ContactInterval("A", "C", t0, t0 + 6, 1.0),
+            ContactInterval("A", "B", t0 + 2, t0 + 5, 1.0),
+            ContactInterval("B", "C", t0 + 2, t0 + 5, pytest.approx(np.sqrt(2))),
+        ]
+
+    def test__min_duration(self):
+        entries = [
+            _position_entry(0, "A", 0.0),
+            _position_entry(0, "B", 1.0),
+            _position_entry(1, "B", 10.0),
+        ]
+
+        assert len(find_contacts(entries, interpolation="previous")) == 1
+        assert find_contacts(entries, interpolation="previous", min_duration_sec=1.0) == []
+
+
+class TestProximityDetector:
+    def test__reopened_in_next_chunk(self):
+        locations = np.zeros((4, 2, 3))
+        locations[1, 1, 0] = 10.0
+        valid = np.ones((4, 2), dtype=bool)
+        tracks = ResampledTracks(np.arange(4.0), np.array(["A", "B"], dtype=object), locations, locations, valid)
+
+        detector = ProximityDetector(tracks.player_names, radius=1.0)
+        contacts = detector.update(tracks.times[:2], tracks.locations[:2], tracks.valid[:2])
+        contacts += detector.update(tracks.times[2:], tracks.locations[2:], tracks.valid[2:])
+        contacts += detector.close()
+
+        assert [(c.start, c.end) for c in contacts] == [(0.0, 0.0), (2.0, 3.0)]
@@ -0,0 +1,92 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from yaiba.analysis.vrc.positions import PlayerPositions
+from yaiba.analysis.vrc.snapshot import SnapshotIndex
+from yaiba.log.types import PseudoUserName, UserName, VRCPlayerId
+from yaiba.log.vrc.entries.builtin import VRCPlayerLeftEntry
+from yaiba.log.vrc.entries.player_position import VRCYAIBAPlayerPositionEntry
+from yaiba.log.vrc.utils import parse_timestamp
+
+
+def _position_entry(second: int, user_name: str, x: float) -> VRCYAIBAPlayerPositionEntry:
+    return VRCYAIBAPlayerPositionEntry(
+        parse_timestamp(f"2022.03.04 21:50:{second:02d}"),
+        player_id=VRCPlayerId(7),
+        user_name=UserName(user_name),
+        pseudo_user_name=PseudoUserName(user_name),
+        location_x=x,
+        location_y=0.0,
+        location_z=0.0,
+        rotation_1=0.0,
+        rotation_2=0.0,
+        rotation_3=0.0,
+        velocity_x=None,
+        velocity_y=None,
+        velocity_z=None,
+        is_vr=False,
+    )
+
+
+def _left_entry(second: int, user_name: str) -> VRCPlayerLeftEntry:
+    return VRCPlayerLeftEntry(
+        parse_timestamp(f"2022.03.04 21:50:{second:02d}"),
+        user_name=UserName(user_name),
+        pseudo_user_name=PseudoUserName(user_name),
+    )
+
+
+ENTRIES = [
+    _position_entry(0, "A", 0.0),
+    _position_entry(1, "B", 10.0),
+    _position_entry(2, "A", 2.0),
+    _left_entry(3, "B"),
+    _position_entry(5, "B", 15.0),
+]
+T0 = ENTRIES[0].timestamp.timestamp()
+
+
+class TestSnapshotIndex:
+    def test__snapshot(self):
+        index = SnapshotIndex.from_source(ENTRIES)
+
+        assert len(index.snapshot(T0 - 1)) == 0
+        snapshot = index.snapshot(T0 + 2)
+        assert snapshot.player_names.tolist() == ["A", "B"]
+        assert snapshot.locations[:, 0].tolist() == [2.0, 10.0]
+        assert snapshot.timestamps.tolist() == [T0 + 2, T0 + 1]
+        assert index.snapshot(T0 + 3).player_names.tolist() == ["A"]
+        assert index.snapshot(T0 + 5).locations[:, 0].tolist() == [2.0, 15.0]
+
+    def test__max_age(self):
+        index = SnapshotIndex.from_source(ENTRIES, max_age_sec=2.0)
+
+        assert index.snapshot(T0 + 5).player_names.tolist() == ["B"]
+
+    def test__same_as_brute_force(self):
+        rng = np.random.default_rng(0)
+        entries = []
+        for i in range(300):
+            second = int(rng.integers(0, 60))
+            name = "P" + str(rng.integers(0, 5))
+            entries.append(_left_entry(second, name) if rng.uniform() < 0.1 else _position_entry(second, name, i))
+        positions = PlayerPositions.from_entries(entries)
+        index = SnapshotIndex(positions)
+        t0 = positions.time_range()[0]
+
+        # Forward scrubbing, then random jumps
+        queries = list(np.arange(-1, 61, 0.5)) + list(rng.uniform(-1, 61, 50))
+        for t in queries:
+            snapshot = index.snapshot(t0 + t)
+            for p, name in enumerate(positions.player_names):
+                samples = positions.player_slice(p)
+                sample_ts = positions.timestamps[samples]
+                last = np.flatnonzero(sample_ts <= t0 + t)
+                left_ts = positions.left_timestamps[positions.left_player_indexes == p]
+                lefts = left_ts[left_ts <= t0 + t]
+                present = len(last) > 0 and (len(lefts) == 0 or lefts.max() < sample_ts[last[-1]])
+                assert (name in snapshot.player_names) == present
+                if present:
+                    k = snapshot.player_names.tolist().index(name)
+                    assert snapshot.locations[k, 0] == positions.locations[samples][last[-1], 0]
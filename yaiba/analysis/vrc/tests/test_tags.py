@@ -0,0 +1,97 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from yaiba.analysis.vrc.tags import YodokoroTagMatrix
+from yaiba.log.session_log import SessionLog
+from yaiba.log.types import RawEntry, VRCPlayerId
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry
+from yaiba.log.vrc.entries.yodokoro_tag_marker import VRCYodokoroTagMarkerEntry, YodokoroTagMarkerEntryParser
+from yaiba.log.vrc.utils import parse_timestamp
+
+TAG_NAMES = ["a", "b", "c"]
+
+
+def _parse_dumps(changes_only: bool) -> SessionLog:
+    parser = YodokoroTagMarkerEntryParser(tag_names=TAG_NAMES, changes_only=changes_only)
+    return SessionLog(log_entries=[
+        parser.parse(RawEntry("2022.03.05 00:31:57 Log        -  [Yodo][Dump][0,9,00000001],[1,10,00000003],")),
+        parser.parse(RawEntry("2022.03.05 00:32:07 Log        -  [Yodo][Dump][0,9,00000001],[1,10,00000006],")),
+        parser.parse(RawEntry("2022.03.05 00:32:17 Log        -  [Yodo][Dump][0,11,00000004],[1,10,00000006],")),
+    ])
+
+
+class TestYodokoroTagMatrix:
+    @pytest.mark.parametrize("changes_only", [False, True])
+    def test__from_session_log(self, changes_only):
+        matrix = YodokoroTagMatrix.from_session_log(_parse_dumps(changes_only))
+
+        assert matrix.tag_names == TAG_NAMES
+        assert matrix.player_ids.tolist() == [9, 10, 11]
+        assert matrix.tag_bits.tolist() == [
+            [0b001, 0b011, 0],
+            [0b001, 0b110, 0],
+            [0, 0b110, 0b100],
+        ]
+        assert matrix.present.tolist() == [
+            [True, True, False],
+            [True, True, False],
+            [False, True, True],
+        ]
+        assert matrix.timestamps[1] - matrix.timestamps[0] == 10
+
+    @pytest.mark.parametrize("changes_only", [False, True])
+    def test__two_rooms(self, changes_only):
+        parser = YodokoroTagMarkerEntryParser(tag_names=TAG_NAMES, changes_only=changes_only)
+        room_entry = VRCEnteringRoomEntry(parse_timestamp("2022.03.05 00:32:00"), room_name="SecondRoom")
+        entries = [
+            parser.parse(RawEntry("2022.03.05 00:31:57 Log        -  [Yodo][Dump][0,9,00000001],[1,10,00000003],")),
+        ]
+        entries.append(room_entry)
+        parser.observe(room_entry)
+        entries.append(parser.parse(RawEntry("2022.03.05 00:32:07 Log        -  [Yodo][Dump][0,1,00000004],")))
+
+        matrix = YodokoroTagMatrix.from_entries(entries)
+
+        # Players of the first room are not in the second room
+        assert matrix.player_counts().tolist() == [2, 1]
+        assert matrix.player_ids.tolist() == [1, 9, 10]
+        assert matrix.present[1].tolist() == [True, False, False]
+
+    def test__statistics(self):
+        matrix = YodokoroTagMatrix.from_session_log(_parse_dumps(changes_only=True))
+
+        assert matrix.player_counts().tolist() == [2, 2, 2]
+        assert matrix.tag_counts().tolist() == [[2, 1, 0], [1, 1, 1], [0, 1, 2]]
+        assert matrix.tag_ratios()[0].tolist() == [1.0, 0.5, 0.0]
+        assert matrix.tags_per_player()[0].tolist() == [1, 2, 0]
+        assert matrix.tag_bits_for_player_id(VRCPlayerId(10)).tolist() == [0b011, 0b110, 0b110]
+        assert matrix.unique_tag_counts().tolist() == [2, 1, 2]
+        assert matrix.co_occurrence().tolist() == [
+            [2, 1, 1],
+            [1, 1, 1],
+            [1, 1, 2],
+        ]
+        assert matrix.co_occurrence(time_index=0).tolist() == [
+            [2, 1, 0],
+            [1, 1, 0],
+            [0, 0, 0],
+        ]
+
+    def test__from_tag_names(self):
+        session_log = SessionLog(log_entries=[
+            VRCYodokoroTagMarkerEntry(
+                timestamp=parse_timestamp("2022.03.05 00:31:57"),
+                tag_names_for_player_id={VRCPlayerId(9): ["c", "a"]},
+            ),
+        ])
+
+        matrix = YodokoroTagMatrix.from_session_log(session_log, tag_names=TAG_NAMES)
+
+        assert matrix.tag_bits.tolist() == [[0b101]]
+
+    def test__empty(self):
+        matrix = YodokoroTagMatrix.from_session_log(SessionLog(log_entries=[]))
+
+        assert matrix.tag_counts().shape == (0, len(matrix.tag_names))
+        assert matrix.co_occurrence().shape == (len(matrix.tag_names), len(matrix.tag_names))
@@ -0,0 +1,126 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from yaiba.analysis.vrc.positions import PlayerPositions
+from yaiba.analysis.vrc.trajectory import resample_tracks
+from yaiba.log.session_log import SessionLog
+from yaiba.log.types import PseudoUserName, UserName, VRCPlayerId
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry, VRCPlayerLeftEntry
+from yaiba.log.vrc.entries.player_position import VRCYAIBAPlayerPositionEntry
+from yaiba.log.vrc.utils import parse_timestamp
+
+
+def _position_entry(second: int, user_name: str, x: float, yaw: float = 0.0) -> VRCYAIBAPlayerPositionEntry:
+    return VRCYAIBAPlayerPositionEntry(
+        parse_timestamp(f"2022.03.04 21:50:{second:02d}"),
+        player_id=VRCPlayerId(7),
+        user_name=UserName(user_name),
+        pseudo_user_name=PseudoUserName(user_name),
+        location_x=x,
+        location_y=0.0,
+        location_z=0.0,
+        rotation_1=0.0,
+        rotation_2=yaw,
+        rotation_3=0.0,
+        velocity_x=None,
+        velocity_y=None,
+        velocity_z=None,
+        is_vr=False,
+    )
+
+
+def _left_entry(second: int, user_name: str) -> VRCPlayerLeftEntry:
+    return VRCPlayerLeftEntry(
+        parse_timestamp(f"2022.03.04 21:50:{second:02d}"),
+        user_name=UserName(user_name),
+        pseudo_user_name=PseudoUserName(user_name),
+    )
+
+
+class TestPlayerPositions:
+    def test__last_sample_indexes(self):
+        positions = PlayerPositions.from_entries([
+            _position_entry(2, "B", 0.0),
+            _position_entry(0, "A", 0.0),
+            _position_entry(4, "A", 1.0),
+        ])
+        t0 = positions.timestamps[0]
+
+        assert positions.player_names.tolist() == ["A", "B"]
+        assert positions.offsets.tolist() == [0, 2, 3]
+        assert positions.last_sample_indexes(t0 + np.array([-1, 0, 3, 4])).tolist() == [
+            [-1, 0, 0, 1],
+            [-1, -1, 2, 2],
+        ]
+
+
+class TestResampleTracks:
+    def test__linear(self):
+        session_log = SessionLog(log_entries=[
+            _position_entry(0, "A", 0.0, yaw=350.0),
+            _position_entry(1, "B", 5.0),
+            _position_entry(4, "A", 4.0, yaw=10.0),
+        ])
+
+        tracks = resample_tracks(session_log, rate_hz=2.0)
+
+        assert len(tracks.times) == 9
+        assert tracks.interval_sec == 0.5
+        assert tracks.player_names.tolist() == ["A", "B"]
+        assert tracks.valid[:, 0].all()
+        assert tracks.valid[:, 1].tolist() == [False, False, True, True, True, True, True, True, True]
+        assert tracks.locations[:, 0, 0].tolist() == [0.0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0]
+        assert np.isnan(tracks.locations[0, 1]).all()
+        assert tracks.locations[8, 1, 0] == 5.0
+        # Along the shorter arc, 350 -> 360 (0) -> 370 (10)
+        assert tracks.rotations[4, 0, 1] % 360 == pytest.approx(0.0)
+
+    def test__previous_and_nearest(self):
+        entries = [_position_entry(0, "A", 0.0), _position_entry(4, "A", 4.0)]
+
+        previous = resample_tracks(entries, interpolation="previous")
+        nearest = resample_tracks(entries, interpolation="nearest")
+
+        assert previous.locations[:, 0, 0].tolist() == [0.0, 0.0, 0.0, 0.0, 4.0]
+        assert nearest.locations[:, 0, 0].tolist() == [0.0, 0.0, 0.0, 4.0, 4.0]
+
+    def test__max_gap(self):
+        entries = [_position_entry(0, "A", 0.0), _position_entry(30, "A", 30.0)]
+
+        tracks = resample_tracks(entries, rate_hz=0.2, max_gap_sec=10.0)
+
+        assert tracks.valid[:, 0].tolist() == [True, True, True, False, False, False, True]
+        assert tracks.locations[1, 0, 0] == 0.0
+
+    def test__left(self):
+        entries = [
+            _position_entry(0, "A", 0.0),
+            _left_entry(1, "A"),
+            _position_entry(4, "A", 4.0),
+        ]
+
+        tracks = resample_tracks(entries)
+
+        assert tracks.valid[:, 0].tolist() == [True, False, False, False, True]
+        assert tracks.locations[4, 0, 0] == 4.0
+
+    def test__two_rooms(self):
+        entries = [
+            _position_entry(0, "A", 0.0),
+            VRCEnteringRoomEntry(parse_timestamp("2022.03.04 21:50:02"), room_name="SecondRoom"),
+            _position_entry(4, "A", 100.0),
+        ]
+
+        tracks = resample_tracks(entries, max_gap_sec=10.0)
+
+        # Neither interpolated nor held across the room entry
+        assert tracks.valid[:, 0].tolist() == [True, True, False, False, True]
+        assert tracks.locations[:2, 0, 0].tolist() == [0.0, 0.0]
+        assert tracks.locations[4, 0, 0] == 100.0
+
+    def test__empty(self):
+        tracks = resample_tracks([])
+
+        assert tracks.times.shape == (0,)
+        assert tracks.locations.shape == (0, 0, 3)
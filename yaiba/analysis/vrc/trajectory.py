@@ -0,0 +1,202 @@
+"""
+Resamples irregular position samples into dense, time-aligned tracks.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterator, Optional, Union
+
+import numpy as np
+
+from yaiba.analysis.vrc.positions import PlayerPositions, PositionSource
+
+INTERPOLATION_PREVIOUS = "previous"
+INTERPOLATION_NEAREST = "nearest"
+INTERPOLATION_LINEAR = "linear"
+
+
+@dataclass
+class ResampledTracks:
+    """
+    Tracks of all players on a regular time grid. Values are NaN where `valid` is False.
+    """
+    times: np.ndarray  # (T,) float64, epoch seconds
+    player_names: np.ndarray  # (P,) object
+    locations: np.ndarray  # (T, P, 3) float64, x, y, z
+    rotations: np.ndarray  # (T, P, 3) float64, degrees, rotation_1 (pitch), rotation_2 (yaw), rotation_3 (roll)
+    valid: np.ndarray  # (T, P) bool
+
+    @property
+    def interval_sec(self) -> float:
+        if len(self.times) < 2:
+            return np.nan
+        return float(self.times[1] - self.times[0])
+
+
+def resample_tracks(
+        source: Union[PositionSource, PlayerPositions],
+        rate_hz: float = 1.0,
+        interpolation: str = INTERPOLATION_LINEAR,
+        max_gap_sec: float = 10.0,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+) -> ResampledTracks:
+    """
+    Resamples player positions to `rate_hz`, without Python loops over samples or players.
+
+    A player is valid at a time if the player has a sample at or before the time within `max_gap_sec`, and has not
+    left (`VRCPlayerLeftEntry`) nor entered another room (`VRCEnteringRoomEntry`) since the sample. Values are never
+    extrapolated before the first sample.
+
+    :param source: A `SessionLog`, a `RoomVisit`, entries, or `PlayerPositions`.
+    :param interpolation: "previous" (hold the last sample), "nearest", or "linear". Samples are not interpolated
+        across a gap longer than `max_gap_sec`, a `VRCPlayerLeftEntry` or a `VRCEnteringRoomEntry`; the previous
+        sample is held instead. Angles are interpolated along the shorter arc.
+    :param start: Epoch seconds. Default: The first sample.
+    :param end: Epoch seconds, inclusive. Default: The last sample.
+    """
+    assert interpolation in (INTERPOLATION_PREVIOUS, INTERPOLATION_NEAREST, INTERPOLATION_LINEAR), \
+        f"unknown interpolation: {interpolation!r}"
+    positions = PlayerPositions.from_source(source)
+
+    first, last = positions.time_range()
+    start = first if start is None else start
+    end = last if end is None else end
+    if len(positions) == 0 or np.isnan(start) or end < start:
+        times = np.zeros(0, dtype=np.float64)
+    else:
+        times = start + np.arange(int(np.floor((end - start) * rate_hz + 1e-9)) + 1) / rate_hz
+
+    # (P, T) index of the last sample at or before each time
+    prev_idx = positions.last_sample_indexes(times)
+    has_prev = prev_idx >= 0
+    safe_prev_idx = np.where(has_prev, prev_idx, 0)
+
+    # The next sample must belong to the same player
+    next_idx = prev_idx + 1
+    player_ends = positions.offsets[1:, np.newaxis]
+    has_next = has_prev & (next_idx < player_ends)
+    safe_next_idx = np.where(has_next, next_idx, 0)
+
+    timestamps = positions.timestamps
+    prev_t = np.where(has_prev, timestamps[safe_prev_idx], np.nan)
+    next_t = np.where(has_next, timestamps[safe_next_idx], np.nan)
+    grid_t = times[np.newaxis, :]
+
+    last_left_t = positions.last_left_timestamps(times)
+    valid = has_prev & (grid_t - prev_t <= max_gap_sec) & ~(last_left_t >= prev_t)
+
+    can_interpolate = has_next & (next_t - prev_t <= max_gap_sec) & (next_t > prev_t)
+    if len(positions.left_timestamps) > 0 and can_interpolate.any():
+        can_interpolate &= ~_has_left_between(positions, prev_t, next_t)
+
+    if len(positions.room_entry_timestamps) > 0:
+        # Room entries in (prev_t, t] are the same for all players, so counting them needs no per-player layout
+        prev_room_counts = np.searchsorted(positions.room_entry_timestamps, prev_t, side='right')
+        valid &= np.searchsorted(positions.room_entry_timestamps, grid_t, side='right') == prev_room_counts
+        can_interpolate &= np.searchsorted(positions.room_entry_timestamps, next_t, side='right') == prev_room_counts
+
+    locations = _interpolate(
+        positions.locations, safe_prev_idx, safe_next_idx, prev_t, next_t, grid_t, can_interpolate, interpolation,
+        is_angle=False)
+    rotations = _interpolate(
+        positions.rotations, safe_prev_idx, safe_next_idx, prev_t, next_t, grid_t, can_interpolate, interpolation,
+        is_angle=True)
+
+    locations[~valid] = np.nan
+    rotations[~valid] = np.nan
+
+    return ResampledTracks(
+        times=times,
+        player_names=positions.player_names,
+        locations=locations.transpose(1, 0, 2),
+        rotations=rotations.transpose(1, 0, 2),
+        valid=valid.T,
+    )
+
+
+def _has_left_between(positions: PlayerPositions, prev_t: np.ndarray, next_t: np.ndarray) -> np.ndarray:
+    """
+    :return: (P, T) Whether the player has a `VRCPlayerLeftEntry` in (prev_t, next_t].
+    """
+    # Same layout as `search_last_per_group`, but with a different query per (player, time)
+    origin = min(positions.timestamps.min(), positions.left_timestamps.min())
+    span = max(positions.timestamps.max(), positions.left_timestamps.max()) - origin + 1.0
+    left_keys = positions.left_player_indexes * span + (positions.left_timestamps - origin)
+    player_keys = np.arange(positions.player_count)[:, np.newaxis] * span - origin
+
+    def count_until(t: np.ndarray) -> np.ndarray:
+        return np.searchsorted(left_keys, np.nan_to_num(player_keys + t, nan=-np.inf), side='right')
+
+    return count_until(next_t) > count_until(prev_t)
+
+
+def _interpolate(
+        values: np.ndarray,
+        prev_idx: np.ndarray,
+        next_idx: np.ndarray,
+        prev_t: np.ndarray,
+        next_t: np.ndarray,
+        grid_t: np.ndarray,
+        can_interpolate: np.ndarray,
+        interpolation: str,
+        is_angle: bool,
+) -> np.ndarray:
+    """
+    :return: (P, T, 3)
+    """
+    prev_values = values[prev_idx]
+    if interpolation == INTERPOLATION_PREVIOUS or len(values) == 0:
+        return prev_values
+
+    next_values = values[next_idx]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = np.where(can_interpolate, (grid_t - prev_t) / (next_t - prev_t), 0.0)
+
+    if interpolation == INTERPOLATION_NEAREST:
+        use_next = (weight > 0.5)[..., np.newaxis]
+        return np.where(use_next, next_values, prev_values)
+
+    diff = next_values - prev_values
+    if is_angle:
+        diff = (diff + 180.0) % 360.0 - 180.0
+    return prev_values + diff * weight[..., np.newaxis]
+
+
+def iter_track_windows(
+        source: Union[PositionSource, PlayerPositions, ResampledTracks],
+        rate_hz: float,
+        window_sec: float,
+        **resample_options,
+) -> Iterator[ResampledTracks]:
+    """
+    Resamples positions `window_sec` at a time, on the same time grid as one `resample_tracks` call.
+    """
+    if isinstance(source, ResampledTracks):
+        window_steps = max(1, int(round(window_sec / source.interval_sec))) if len(source.times) > 1 else 1
+        for start in range(0, len(source.times), window_steps):
+            window = slice(start, start + window_steps)
+            yield ResampledTracks(
+                times=source.times[window],
+                player_names=source.player_names,
+                locations=source.locations[window],
+                rotations=source.rotations[window],
+                valid=source.valid[window],
+            )
+        return
+
+    positions = PlayerPositions.from_source(source)
+    first, last = positions.time_range()
+    if len(positions) == 0:
+        return
+    window_steps = max(1, int(round(window_sec * rate_hz)))
+    total_steps = int(np.floor((last - first) * rate_hz + 1e-9)) + 1
+    for start_step in range(0, total_steps, window_steps):
+        end_step = min(start_step + window_steps, total_steps) - 1
+        yield resample_tracks(
+            positions,
+            rate_hz=rate_hz,
+            start=first + start_step / rate_hz,
+            end=first + end_step / rate_hz,
+            **resample_options,
+        )
@@ -0,0 +1,397 @@
+"""
+Command line interface.
+
+Usage:
+    yaiba convert <inputs...> -o <dir> [-j N] [--export-all] [--compression gzip] [--salt HEX | --salt-file PATH]
+        [--force] [--stats]
+    yaiba watch <dir> -o <dir> [-j N] [--interval SEC] [--export-all] [--compression gzip]
+        [--salt HEX | --salt-file PATH]
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+import yaiba
+from yaiba.log import compression as _compression
+from yaiba.log.pseudonymizer import Pseudonymizer
+from yaiba.log.stats import Stats
+
+# VRChat names its logs output_log_YYYY-MM-DD_HH-MM-SS.txt
+VRCHAT_LOG_PATTERN = "output_log*.txt"
+
+# Written in the output directory
+MANIFEST_FILE_NAME = ".yaiba-convert.json"
+
+EXTENSION_BY_COMPRESSION = {
+    None: ".json",
+    _compression.GZIP: ".json.gz",
+    _compression.XZ: ".json.xz",
+    _compression.ZSTD: ".json.zst",
+}
+
+
+@dataclass
+class ConvertOptions:
+    """
+    Picklable options of a conversion, sent to worker processes.
+    """
+    salt: bytes
+    export_all: bool = False
+    compact_player_positions: bool = False
+    compression: Optional[str] = None
+    encoding: str = "utf-8"
+    collect_stats: bool = False
+
+
+@dataclass
+class ConvertResult:
+    input_path: str
+    output_path: str
+    entry_count: int = 0
+    input_bytes: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+    stats: Optional[Stats] = None
+
+
+def convert_file(input_path: str, output_path: str, options: ConvertOptions) -> ConvertResult:
+    """
+    Parses a VRChat log and saves it as a session log. Errors are returned in the result, not raised, so that one
+    bad file does not abort a batch. The output is written to a temporary file and renamed when complete.
+    """
+    result = ConvertResult(input_path=input_path, output_path=output_path)
+    if options.collect_stats:
+        result.stats = Stats()
+    start = time.perf_counter()
+    try:
+        result.input_bytes = os.path.getsize(input_path)
+        config = parser_config(options)
+        config.stats = result.stats
+        with open(input_path, "r", encoding=options.encoding, errors="replace") as fp:
+            session_log = yaiba.parse_vrchat_log(fp, config)
+        result.entry_count = len(session_log.log_entries)
+        save_converted(session_log, output_path, options, result.stats)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def parser_config(options: ConvertOptions) -> yaiba.VRCLogParser.Config:
+    return yaiba.VRCLogParser.Config(pseudonymizer=Pseudonymizer(options.salt))
+
+
+def save_converted(
+        session_log: yaiba.SessionLog,
+        output_path: str,
+        options: ConvertOptions,
+        stats: Optional[Stats] = None,
+):
+    """
+    Saves to a temporary file, then renames it, so that an output is never partially written. The temporary file has a
+    unique name, so that concurrent tasks never write the same one.
+    """
+    encoder_options = yaiba.JsonEncoder.Options.export_all() if options.export_all \
+        else yaiba.JsonEncoder.Options.pseudonymized()
+    encoder_options.compact_player_positions = options.compact_player_positions
+
+    temporary_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        yaiba.save_session_log(
+            session_log, temporary_path, encoder_options, compression=options.compression, stats=stats)
+        os.replace(temporary_path, output_path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def is_up_to_date(input_path: str, output_path: str, manifest: Dict[str, dict]) -> bool:
+    """
+    Whether the output exists, and `manifest` records that it was converted from this input at its current size and
+    mtime.
+    """
+    entry = manifest.get(os.path.basename(output_path))
+    if entry is None or entry["source"] != os.path.abspath(input_path) or not os.path.exists(output_path):
+        return False
+    stat = os.stat(input_path)
+    return entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime
+
+
+def load_manifest(output_dir: str) -> Dict[str, dict]:
+    """
+    :return: The source of each output in `output_dir` by output file name, as `{"source": absolute input path,
+        "size": ..., "mtime": ...}`. Size and mtime are missing until the conversion completes.
+    """
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE_NAME)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, "r", encoding="utf-8") as fp:
+        return json.load(fp).get("files", {})
+
+
+def save_manifest(output_dir: str, manifest: Dict[str, dict]):
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE_NAME)
+    temporary_path = manifest_path + ".tmp"
+    with open(temporary_path, "w", encoding="utf-8") as fp:
+        json.dump({"files": manifest}, fp, indent=2)
+    os.replace(temporary_path, manifest_path)
+
+
+def iter_input_paths(inputs: List[str]) -> Iterator[str]:
+    """
+    Files as they are, and VRChat logs in directories (not recursively), without duplicates.
+    """
+    seen = set()
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            paths = sorted(glob.glob(os.path.join(input_path, VRCHAT_LOG_PATTERN)))
+        else:
+            paths = [input_path]
+        for path in paths:
+            absolute_path = os.path.abspath(path)
+            if absolute_path not in seen:
+                seen.add(absolute_path)
+                yield path
+
+
+def output_path_of(input_path: str, output_dir: str, compression: Optional[str], suffix: str = "") -> str:
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_dir, stem + suffix + EXTENSION_BY_COMPRESSION[compression])
+
+
+def output_paths_of(
+        input_paths: List[str],
+        output_dir: str,
+        compression: Optional[str],
+        manifest: Optional[Dict[str, dict]] = None,
+) -> List[str]:
+    """
+    Same as `output_path_of` for each input, but an input keeps the output name `manifest` records for it, so that the
+    name does not depend on the other inputs of a run. An input converted for the first time gets a suffix from a hash
+    of its directory if its name is taken by another source, by an output not in `manifest`, or by another new input
+    (ex. logs with the same file name collected from several attendees), so that no output overwrites another.
+    """
+    manifest = {} if manifest is None else manifest
+    extension = EXTENSION_BY_COMPRESSION[compression]
+    name_by_source = {
+        entry["source"]: name
+        for name, entry in manifest.items()
+        if name.endswith(extension)
+    }
+    recorded_names = [name_by_source.get(os.path.abspath(p)) for p in input_paths]
+    output_paths = [output_path_of(p, output_dir, compression) for p in input_paths]
+    counts = Counter(o for o, name in zip(output_paths, recorded_names) if name is None)
+    return [
+        os.path.join(output_dir, name) if name is not None else
+        output_path if counts[output_path] == 1 and not _is_taken(output_path, manifest) else
+        output_path_of(input_path, output_dir, compression, _directory_suffix(input_path))
+        for input_path, output_path, name in zip(input_paths, output_paths, recorded_names)
+    ]
+
+
+def _is_taken(output_path: str, manifest: Dict[str, dict]) -> bool:
+    return os.path.basename(output_path) in manifest or os.path.exists(output_path)
+
+
+def _directory_suffix(input_path: str) -> str:
+    directory = os.path.dirname(os.path.abspath(input_path))
+    return "-" + hashlib.sha256(directory.encode("utf-8")).hexdigest()[:8]
+
+
+def convert(args: argparse.Namespace) -> int:
+    salt = _salt_of(args)
+    if salt is None:
+        if _has_session_logs(args.output_dir):
+            print(f"error: {args.output_dir} already has session logs. Pass the salt they were converted with "
+                  f"(--salt or --salt-file), so that a player has the same pseudo user name in all of them.",
+                  file=sys.stderr)
+            return 2
+        salt = os.urandom(32)
+        print("note: pseudo user names use a random salt, which is not saved. Pass --salt or --salt-file to convert "
+              "more logs into this directory later.", file=sys.stderr)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    options = ConvertOptions(
+        # The same salt for all files of a batch, so that a player has the same pseudo user name in each of them
+        salt=salt,
+        export_all=args.export_all,
+        compact_player_positions=args.compact_player_positions,
+        compression=args.compression,
+        encoding=args.encoding,
+        collect_stats=args.stats,
+    )
+
+    tasks = []
+    input_stats = {}
+    skipped_count = 0
+    manifest = load_manifest(args.output_dir)
+    input_paths = list(iter_input_paths(args.inputs))
+    for input_path, output_path in zip(
+            input_paths, output_paths_of(input_paths, args.output_dir, args.compression, manifest)):
+        if not args.force and is_up_to_date(input_path, output_path, manifest):
+            skipped_count += 1
+            continue
+        tasks.append((input_path, output_path))
+        # Names are recorded before converting, so that an interrupted run does not give its inputs other names
+        manifest[os.path.basename(output_path)] = {"source": os.path.abspath(input_path)}
+        if os.path.exists(input_path):
+            input_stats[output_path] = os.stat(input_path)
+    if len(tasks) > 0:
+        save_manifest(args.output_dir, manifest)
+
+    start = time.perf_counter()
+    results: List[ConvertResult] = []
+
+    def report(result: ConvertResult):
+        results.append(result)
+        prefix = f"[{len(results)}/{len(tasks)}] {result.input_path}"
+        if result.error is not None:
+            print(f"{prefix}: FAILED {result.error}", file=sys.stderr)
+            return
+        print(f"{prefix} -> {result.output_path}: {result.entry_count} entries, "
+              f"{result.input_bytes / 2 ** 20:.1f} MiB in {result.seconds:.2f} s "
+              f"({_throughput(result.input_bytes, result.seconds)})")
+
+    if args.jobs == 1 or len(tasks) <= 1:
+        for input_path, output_path in tasks:
+            report(convert_file(input_path, output_path, options))
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            futures = [executor.submit(convert_file, i, o, options) for i, o in tasks]
+            for future in as_completed(futures):
+                report(future.result())
+
+    elapsed_sec = time.perf_counter() - start
+    failed = [r for r in results if r.error is not None]
+    for result in results:
+        # The stat taken before converting, so that an input which changed meanwhile is converted again
+        if result.error is None and result.output_path in input_stats:
+            stat = input_stats[result.output_path]
+            manifest[os.path.basename(result.output_path)].update(size=stat.st_size, mtime=stat.st_mtime)
+    if len(tasks) > 0:
+        save_manifest(args.output_dir, manifest)
+    total_bytes = sum(r.input_bytes for r in results if r.error is None)
+    print(f"converted {len(results) - len(failed)}, failed {len(failed)}, skipped {skipped_count} (up to date): "
+          f"{sum(r.entry_count for r in results)} entries, {total_bytes / 2 ** 20:.1f} MiB in {elapsed_sec:.2f} s "
+          f"({_throughput(total_bytes, elapsed_sec)})")
+    if args.stats:
+        # Summed over workers, so timings are CPU time rather than elapsed time
+        total_stats = Stats()
+        for result in results:
+            if result.stats is not None:
+                total_stats.merge(result.stats)
+        print(total_stats.report())
+    return 1 if len(failed) > 0 else 0
+
+
+def watch(args: argparse.Namespace) -> int:
+    from yaiba.watch import LogWatcher
+
+    salt = _salt_of(args)
+    if salt is None:
+        if LogWatcher.has_state(args.output_dir):
+            print(f"error: {args.output_dir} was watched before. Pass the salt of that run (--salt or --salt-file), "
+                  f"so that a player keeps the same pseudo user name.", file=sys.stderr)
+            return 2
+        salt = os.urandom(32)
+        print("note: pseudo user names use a random salt, which is not saved. Pass --salt or --salt-file to restart "
+              "watching into this directory later.", file=sys.stderr)
+    options = ConvertOptions(
+        salt=salt,
+        export_all=args.export_all,
+        compact_player_positions=args.compact_player_positions,
+        compression=args.compression,
+    )
+    watcher = LogWatcher(args.input_dir, args.output_dir, options, jobs=args.jobs)
+    print(f"watching {args.input_dir} every {args.interval} s (Ctrl+C to stop)")
+    try:
+        watcher.run(interval_sec=args.interval, max_polls=args.max_polls)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _salt_of(args: argparse.Namespace) -> Optional[bytes]:
+    """
+    The salt of `--salt` or `--salt-file`, or None. Raises `ValueError` if the salt file is in the output directory,
+    since anyone given the outputs could then reverse pseudo user names.
+    """
+    if args.salt is not None:
+        return bytes.fromhex(args.salt)
+    if args.salt_file is None:
+        return None
+    output_dir = os.path.abspath(args.output_dir)
+    if os.path.commonpath([os.path.abspath(args.salt_file), output_dir]) == output_dir:
+        raise ValueError(f"the salt file must not be in the output directory: {args.salt_file}")
+    with open(args.salt_file, "r", encoding="utf-8") as fp:
+        return bytes.fromhex(fp.read().strip())
+
+
+def _has_session_logs(output_dir: str) -> bool:
+    if not os.path.isdir(output_dir):
+        return False
+    extensions = tuple(EXTENSION_BY_COMPRESSION.values())
+    return any(name.endswith(extensions) for name in os.listdir(output_dir))
+
+
+def _throughput(byte_count: int, seconds: float) -> str:
+    if seconds <= 0:
+        return "- MiB/s"
+    return f"{byte_count / 2 ** 20 / seconds:.1f} MiB/s"
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(prog="yaiba")
+    subparsers = arg_parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = subparsers.add_parser("convert", help="Converts VRChat logs to session logs.")
+    convert_parser.add_argument("inputs", nargs="+", help=f"VRChat logs, or directories of {VRCHAT_LOG_PATTERN}")
+    _add_output_arguments(convert_parser)
+    convert_parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                                help="The number of worker processes.")
+    convert_parser.add_argument("--encoding", default="utf-8")
+    convert_parser.add_argument("--stats", action="store_true", help="Prints counters and timings of stages.")
+    convert_parser.add_argument("-f", "--force", action="store_true", help="Converts up-to-date outputs again.")
+    convert_parser.set_defaults(handler=convert)
+
+    watch_parser = subparsers.add_parser("watch", help="Converts VRChat logs in a directory as they are written.")
+    watch_parser.add_argument("input_dir", help=f"A directory of {VRCHAT_LOG_PATTERN}")
+    _add_output_arguments(watch_parser)
+    watch_parser.add_argument("-j", "--jobs", type=int, default=4,
+                              help="The number of threads converting files. They overlap file I/O and compression, "
+                                   "not parsing.")
+    watch_parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls.")
+    watch_parser.add_argument("--max-polls", type=int, default=None, help=argparse.SUPPRESS)
+    watch_parser.set_defaults(handler=watch)
+    return arg_parser
+
+
+def _add_output_arguments(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument("-o", "--output-dir", required=True)
+    arg_parser.add_argument("--export-all", action="store_true",
+                            help="Also stores user names. By default, only pseudonymized user names are stored.")
+    arg_parser.add_argument("--compact-player-positions", action="store_true")
+    arg_parser.add_argument("--compression", choices=[c for c in EXTENSION_BY_COMPRESSION if c is not None])
+    salt_group = arg_parser.add_mutually_exclusive_group()
+    salt_group.add_argument("--salt", help="Hex salt of pseudo user names. Random by default.")
+    salt_group.add_argument("--salt-file", help="A file of a hex salt, outside the output directory.")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = _build_arg_parser()
+    args = arg_parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except ValueError as e:
+        arg_parser.error(str(e))
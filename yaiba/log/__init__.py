@@ -1,5 +1,6 @@
 from yaiba.log.session_log import Entry, SessionLog
 from yaiba.log.session_log_json import JsonDecoder, JsonEncoder
+from yaiba.log.stats import Stats
 from yaiba.log.vrc.parser import VRCLogParser
 
 __all__ = [
@@ -8,4 +9,5 @@ __all__ = [
     'Entry',
     'JsonDecoder',
     'JsonEncoder',
+    'Stats',
 ]
@@ -0,0 +1,76 @@
+"""
+Streaming compression codecs for session log files.
+
+gzip and xz are always available. zstd requires the optional `zstandard` package.
+"""
+from __future__ import annotations
+
+import gzip
+import lzma
+import os
+from typing import BinaryIO, List, Optional, TextIO, Union
+
+GZIP = "gzip"
+XZ = "xz"
+ZSTD = "zstd"
+
+COMPRESSION_BY_EXTENSION = {
+    ".gz": GZIP,
+    ".gzip": GZIP,
+    ".xz": XZ,
+    ".lzma": XZ,
+    ".zst": ZSTD,
+    ".zstd": ZSTD,
+}
+
+ENCODING = "utf-8"
+
+
+def detect_compression(path: Union[str, os.PathLike]) -> Optional[str]:
+    """
+    Detects the compression from the file extension. Returns None for uncompressed files.
+    """
+    _, extension = os.path.splitext(os.fspath(path))
+    return COMPRESSION_BY_EXTENSION.get(extension.lower())
+
+
+def available_compressions() -> List[str]:
+    compressions = [GZIP, XZ]
+    try:
+        import zstandard  # noqa: F401
+        compressions.append(ZSTD)
+    except ImportError:
+        pass
+    return compressions
+
+
+def open_text(
+        file: Union[str, os.PathLike, BinaryIO],
+        mode: str,
+        compression: Optional[str] = None,
+) -> TextIO:
+    """
+    Opens a (de)compressing text stream. Data is (de)compressed chunk by chunk, so no full uncompressed copy is kept
+    in memory.
+
+    :param file: A path, or a binary file object. A file object is not closed when the returned stream is closed.
+    :param mode: "r" or "w".
+    :param compression: One of `GZIP`, `XZ`, `ZSTD` or None (uncompressed). None is only allowed for a path.
+    """
+    assert mode in ("r", "w"), f"unsupported mode: {mode!r}"
+    is_path = isinstance(file, (str, os.PathLike))
+
+    if compression is None:
+        assert is_path, "compression must be specified for a file object"
+        return open(file, mode, encoding=ENCODING)
+    if compression == GZIP:
+        return gzip.open(file, mode + "t", encoding=ENCODING)
+    if compression == XZ:
+        return lzma.open(file, mode + "t", encoding=ENCODING)
+    if compression == ZSTD:
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("zstd compression requires the `zstandard` package") from e
+        return zstandard.open(file, mode + "t", encoding=ENCODING, closefd=is_path)
+    raise ValueError(f"unknown compression: {compression!r}")
@@ -3,7 +3,9 @@ from __future__ import annotations
 import base64
 import hashlib
 import secrets
+from typing import Dict, Optional, Union
 
+from yaiba.log.stats import Stats
 from yaiba.log.types import PseudoUserName, UserName
 
 
@@ -15,16 +17,43 @@ class Pseudonymizer:
     across stakeholders (See guideline from Japan Gov; 
     https://www.ppc.go.jp/files/pdf/280930_siryou1-5.pdf#page=13). If salt is not applied, salt is generated    
     randomly.
+
+    Pseudonymized values are cached per user name. Do not change `salt` after pseudonymizing.
+
+    If `stats` is set, counts "pseudonymizer.cache_hits" / "pseudonymizer.cache_misses" and measures
+    "pseudonymizer.hash".
     """
 
-    def __init__(self, salt: bytes):
+    def __init__(self, salt: bytes, stats: Optional[Stats] = None):
         self.salt = salt
+        self.stats = stats
+        self._cache: Dict[UserName, PseudoUserName] = {}
 
     @classmethod
     def new_random(cls) -> Pseudonymizer:
         return cls(secrets.token_bytes(32))
 
     def pseudonymize_user_name(self, user_name: UserName) -> PseudoUserName:
+        pseudonymized = self._cache.get(user_name)
+        if pseudonymized is None:
+            if self.stats is not None:
+                self.stats.count("pseudonymizer.cache_misses")
+                with self.stats.time("pseudonymizer.hash"):
+                    pseudonymized = self._hash_user_name(user_name)
+            else:
+                pseudonymized = self._hash_user_name(user_name)
+            self._cache[user_name] = pseudonymized
+        elif self.stats is not None:
+            self.stats.count("pseudonymizer.cache_hits")
+        return pseudonymized
+
+    def pseudonymize_user_name_lazily(self, user_name: UserName) -> LazyPseudoUserName:
+        """
+        Same as `pseudonymize_user_name`, but hashes only when the value is read.
+        """
+        return LazyPseudoUserName(user_name, self)
+
+    def _hash_user_name(self, user_name: UserName) -> PseudoUserName:
         hasher = hashlib.sha256()
         hasher.update(user_name.encode('utf-8'))
 
@@ -34,3 +63,60 @@ class Pseudonymizer:
 
         pseudonymized = base64.b64encode(hasher.digest()).decode('utf-8')
         return PseudoUserName(pseudonymized)
+
+
+class LazyPseudoUserName:
+    """
+    A pseudonymized user name which is not computed yet. Use with `PseudoUserNameField`.
+
+    The `Pseudonymizer` (and its salt) is referenced only until the value is resolved. Pickling or copying resolves the
+    value, so that the salt is never stored with entries.
+    """
+    __slots__ = ('user_name', 'pseudonymizer', '_pseudo_user_name')
+
+    def __init__(self, user_name: UserName, pseudonymizer: Pseudonymizer):
+        self.user_name = user_name
+        self.pseudonymizer: Optional[Pseudonymizer] = pseudonymizer
+        self._pseudo_user_name: Optional[PseudoUserName] = None
+
+    def resolve(self) -> PseudoUserName:
+        if self.pseudonymizer is not None:
+            self._pseudo_user_name = self.pseudonymizer.pseudonymize_user_name(self.user_name)
+            self.pseudonymizer = None
+        return self._pseudo_user_name
+
+    def __reduce__(self):
+        return PseudoUserName, (str(self.resolve()),)
+
+    def __repr__(self):
+        return f'LazyPseudoUserName({self.user_name!r})'
+
+
+class PseudoUserNameField:
+    """
+    Descriptor for a `PseudoUserName` field of an entry dataclass.
+
+    The field accepts a `LazyPseudoUserName`, which is resolved to `PseudoUserName` on first read. The field has no
+    default value.
+
+    Ex.
+        @dataclass
+        class SomeEntry(Entry):
+            pseudo_user_name: PseudoUserName = PseudoUserNameField()
+    """
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, obj, objtype=None) -> PseudoUserName:
+        if obj is None:
+            # Tells dataclass that there is no default value
+            raise AttributeError(self.name)
+        value = obj.__dict__[self.name]
+        if isinstance(value, LazyPseudoUserName):
+            value = value.resolve()
+            obj.__dict__[self.name] = value
+        return value
+
+    def __set__(self, obj, value: Union[PseudoUserName, LazyPseudoUserName]):
+        obj.__dict__[self.name] = value
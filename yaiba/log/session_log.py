@@ -15,6 +15,15 @@ class SessionLog:
     def __repr__(self):
         return f'SessionLog(log_entries=[{len(self.log_entries)} entries], metadata={self.metadata!r})'
 
+    def to_frames(self, options: Optional['DataFrameEncoder.Options'] = None) -> Dict[str, 'pandas.DataFrame']:
+        """
+        Returns one typed DataFrame per entry type, keyed by `Entry.type_id()`.
+
+        Note: pandas is imported only when this method is called.
+        """
+        from yaiba.log.session_log_dataframe import DataFrameEncoder
+        return DataFrameEncoder(options=options).encode(self)
+
 
 class Entry(FromJson, ABC):
     """
@@ -40,4 +49,23 @@ class Entry(FromJson, ABC):
 class EntryParser(ABC):
     @abstractmethod
     def parse(self, raw_log: RawEntry) -> Optional[Entry]:
+        """
+        :return: None if `raw_log` is not for this parser. `DROPPED_ENTRY` if `raw_log` is for this parser but is
+            intentionally dropped (ex. downsampled), so that no other parser tries it.
+        """
         pass
+
+    def observe(self, entry: Entry):
+        """
+        Called with each entry parsed by any parser, so that a stateful parser can reset its state (ex. when a player
+        leaves). Only parsers which override this method are called.
+        """
+        pass
+
+
+class _DroppedEntry:
+    def __repr__(self):
+        return 'DROPPED_ENTRY'
+
+
+DROPPED_ENTRY = _DroppedEntry()
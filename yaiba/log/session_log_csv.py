@@ -2,9 +2,10 @@ import csv
 import dataclasses
 import io
 from dataclasses import is_dataclass, dataclass
-from typing import TextIO, Type
+from typing import Optional, TextIO, Type
 
 from yaiba.log import Entry, SessionLog
+from yaiba.log.stats import Stats, timed
 from yaiba.log.types import PseudoUserName, Timestamp, UserName, VRCPlayerId
 
 
@@ -30,11 +31,15 @@ class CsvEncoder:
                 encode_vrc_player_id=True,
             )
 
-    def __init__(self, entry_class: Type[Entry], options: Options = None):
+    def __init__(self, entry_class: Type[Entry], options: Options = None, stats: Optional[Stats] = None):
+        """
+        :param stats: Measures "csv_encoder.write" and counts rows if not None.
+        """
         self.entry_class = entry_class
         if options is None:
             options = CsvEncoder.Options.default()
         self.options = options
+        self.stats = stats
 
     def encode(self, session_log: SessionLog) -> str:
         fp = io.StringIO()
@@ -52,10 +57,15 @@ class CsvEncoder:
         writer = csv.DictWriter(fp, fieldnames=field_names, extrasaction="ignore")
 
         writer.writeheader()
-        for entry in session_log.log_entries:
-            if not isinstance(entry, self.entry_class):
-                continue
-            writer.writerow(dataclasses.asdict(entry))
+        row_count = 0
+        with timed(self.stats, "csv_encoder.write"):
+            for entry in session_log.log_entries:
+                if not isinstance(entry, self.entry_class):
+                    continue
+                writer.writerow(dataclasses.asdict(entry))
+                row_count += 1
+        if self.stats is not None:
+            self.stats.count("csv_encoder.rows", row_count)
 
     def _is_ok_to_encode(self, v_type):
         if isinstance(v_type, Timestamp):
@@ -0,0 +1,151 @@
+"""
+Export `SessionLog` as pandas DataFrames.
+
+Note: pandas is an optional dependency (`visualize` group). This module imports it at the top level, so import this
+module lazily (see `SessionLog.to_frames`).
+"""
+from __future__ import annotations
+
+import dataclasses
+import typing
+from dataclasses import dataclass
+from typing import Any, Dict, List, Type
+
+import numpy as np
+import pandas as pd
+
+from yaiba.log.entries import ALL_ENTRIES
+from yaiba.log.session_log import Entry, SessionLog
+from yaiba.log.types import PseudoUserName, Timestamp, UserName, VRCPlayerId
+from yaiba.log.vrc.entries.yodokoro_tag_marker import VRCYodokoroTagMarkerEntry
+
+YODOKORO_TAGS_TYPE_ID = VRCYodokoroTagMarkerEntry.type_id() + "/tags"
+
+
+class DataFrameEncoder:
+    """
+    Converts a `SessionLog` into one typed DataFrame per entry type.
+
+    Columns are built in bulk per dataclass field:
+
+    * `Timestamp` -> `datetime64[ns, UTC]`
+    * `UserName`, `PseudoUserName` -> `category`
+    * `float` -> `float32` (`None` becomes NaN)
+    * `VRCPlayerId` -> `int32`
+    * `bool` -> `bool` (or nullable `boolean` when a value is missing)
+    """
+
+    @dataclass
+    class Options:
+        output_user_name: bool = True
+
+        """
+        Adds a long (timestamp, player_id, tag) table under `YODOKORO_TAGS_TYPE_ID`.
+        """
+        explode_yodokoro_tags: bool = False
+
+        @classmethod
+        def default(cls):
+            return cls()
+
+        @classmethod
+        def pseudonymized(cls):
+            return cls(output_user_name=False)
+
+    def __init__(self, options: Options = None):
+        if options is None:
+            options = DataFrameEncoder.Options.default()
+        self.options = options
+
+    def encode(self, session_log: SessionLog) -> Dict[str, pd.DataFrame]:
+        """
+        :return: DataFrames keyed by `Entry.type_id()`. Every type in `ALL_ENTRIES` is present, even if empty.
+        """
+        entries_by_class: Dict[Type[Entry], List[Entry]] = {
+            klass: []
+            for klass in ALL_ENTRIES
+        }
+        for entry in session_log.log_entries:
+            entries_by_class.setdefault(type(entry), []).append(entry)
+
+        frames = {
+            klass.type_id(): self._to_frame(klass, entries)
+            for klass, entries in entries_by_class.items()
+        }
+
+        if self.options.explode_yodokoro_tags:
+            frames[YODOKORO_TAGS_TYPE_ID] = self._explode_yodokoro_tags(
+                entries_by_class[VRCYodokoroTagMarkerEntry])
+
+        return frames
+
+    def _to_frame(self, entry_class: Type[Entry], entries: List[Entry]) -> pd.DataFrame:
+        assert dataclasses.is_dataclass(entry_class)
+        type_hints = typing.get_type_hints(entry_class)
+
+        columns = {}
+        for field in dataclasses.fields(entry_class):
+            field_type = _unwrap_optional(type_hints.get(field.name, Any))
+            if field_type is UserName and not self.options.output_user_name:
+                continue
+            values = [getattr(e, field.name) for e in entries]
+            columns[field.name] = _to_column(values, field_type)
+        return pd.DataFrame(columns)
+
+    @staticmethod
+    def _explode_yodokoro_tags(entries: List[VRCYodokoroTagMarkerEntry]) -> pd.DataFrame:
+        timestamps = []
+        player_ids = []
+        tags = []
+        for entry in entries:
+            timestamp = entry.timestamp.timestamp()
+            for player_id, tag_names in entry.tag_names_for_player_id.items():
+                if tag_names is None:
+                    # Player disappeared in a `changes_only` dump
+                    continue
+                for tag_name in tag_names:
+                    timestamps.append(timestamp)
+                    player_ids.append(player_id)
+                    tags.append(tag_name)
+
+        return pd.DataFrame({
+            "timestamp": _to_datetime_column(timestamps),
+            "player_id": np.array(player_ids, dtype=np.int32),
+            "tag": pd.Categorical(tags),
+        })
+
+
+def _unwrap_optional(field_type):
+    if typing.get_origin(field_type) is typing.Union:
+        args = [a for a in typing.get_args(field_type) if a is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return field_type
+
+
+def _to_column(values: List[Any], field_type) -> Any:
+    if field_type is Timestamp:
+        return _to_datetime_column([
+            v.timestamp() if v is not None else np.nan
+            for v in values
+        ])
+    if field_type is UserName or field_type is PseudoUserName:
+        return pd.Categorical(values)
+    if field_type is float:
+        return np.array(values, dtype=np.float32)
+    if field_type is VRCPlayerId:
+        if any(v is None for v in values):
+            return pd.array(values, dtype="Int32")
+        return np.array(values, dtype=np.int32)
+    if field_type is bool:
+        if any(v is None for v in values):
+            return pd.array(values, dtype="boolean")
+        return np.array(values, dtype=bool)
+    column = np.empty(len(values), dtype=object)
+    for i, v in enumerate(values):
+        column[i] = v  # Assigns one by one, since numpy tries to broadcast list values
+    return column
+
+
+def _to_datetime_column(epoch_seconds: List[float]) -> pd.DatetimeIndex:
+    return pd.to_datetime(np.array(epoch_seconds, dtype=np.float64), unit="s", utc=True).as_unit("ns")
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
 import dataclasses
+import itertools
 import json
+import re
 from dataclasses import dataclass
-from typing import Any, Dict, Optional, Type
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Type
 
 from yaiba.log.entries import ALL_ENTRIES
+from yaiba.log.pseudonymizer import LazyPseudoUserName
+from yaiba.log.session_log_json_compact import PlayerPositionCompactor, PlayerPositionExpander, STREAMS_ATTR_NAME
 from yaiba.log.session_log import Entry, SessionLog
+from yaiba.log.stats import Stats, timed
 from yaiba.log.types import FromJson, PseudoUserName, Timestamp, UserName, VRCPlayerId
+from yaiba.log.vrc.entries.yodokoro_tag_marker import VRCYodokoroTagMarkerEntry
 
 ENTRY_TYPE_ID_ATTR_NAME = "type_id"
 
@@ -17,6 +23,9 @@ class JsonEncoder:
     Json serializer. 
     """
 
+    # Log entries encoded by one `json.JSONEncoder.encode` call in `write`
+    ENTRY_BATCH_SIZE = 1024
+
     @dataclass
     class Options:
         output_timestamp: bool = True
@@ -24,6 +33,19 @@ class JsonEncoder:
         output_vrc_player_id: bool = True
         output_user_name: bool = True
 
+        """
+        Stores player positions as per-player streams of changed fields, with run-length encoding for unchanged
+        samples. See `session_log_json_compact`. `JsonDecoder` restores them to the same entries.
+        """
+        compact_player_positions: bool = False
+
+        """
+        Stores Yodokoro tags as parsed, as bitmasks per player (`tag_bits_for_player_id`), with `tag_names` only when
+        they differ from the previous tag marker entry. Otherwise, tag names per player are stored
+        (`tag_names_for_player_id`), which older versions can read.
+        """
+        compact_yodokoro_tags: bool = False
+
         @classmethod
         def default(cls):
             return cls()
@@ -46,23 +68,87 @@ class JsonEncoder:
                 output_user_name=False,
             )
 
-    def __init__(self, options: Optional[Options] = None):
+    def __init__(self, options: Optional[Options] = None, stats: Optional[Stats] = None):
+        """
+        :param stats: Measures "json_encoder.encode" / "json_encoder.write" and counts entries if not None.
+        """
         if options is None:
             options = JsonEncoder.Options.default()
         self.options = options
+        self.stats = stats
+        self._last_tag_names: Optional[List[str]] = None
 
     def encode(self, session_log: SessionLog):
         encoder = json.JSONEncoder(
             default=self._encoder_default,
         )
-        return encoder.encode(session_log)
+        self._last_tag_names = None
+        with timed(self.stats, "json_encoder.encode"):
+            encoded = encoder.encode(session_log)
+        if self.stats is not None:
+            self.stats.count("json_encoder.entries", len(session_log.log_entries))
+        return encoded
+
+    def write(self, session_log: SessionLog, fp: TextIO):
+        """
+        Writes the same output as `encode`, batch by batch of log entries.
+
+        The enclosing object is written here, and each batch is encoded with `json.JSONEncoder.encode`, which uses the
+        C encoder of `json`. `json.JSONEncoder.iterencode` would use the pure Python encoder.
+        """
+        encoder = json.JSONEncoder(
+            default=self._encoder_default,
+        )
+        self._last_tag_names = None
+        with timed(self.stats, "json_encoder.write"):
+            values = self._dataclasses_shadow_asdict(session_log)
+            encoded_batches = self._iter_encoded_batches(encoder, session_log.log_entries)
+            if self.options.compact_player_positions:
+                compactor = PlayerPositionCompactor()
+                entries_json = compactor.iter_compact(self._encoder_default(entry) for entry in session_log.log_entries)
+                # Streams come first, and are complete only after the last entry. Only the json text of the other
+                # entries is kept until then.
+                encoded_batches = list(self._iter_encoded_batches(encoder, entries_json))
+                values = {STREAMS_ATTR_NAME: compactor.streams_json(), **values}
+            fp.write("{")
+            for i, (key, value) in enumerate(values.items()):
+                if i > 0:
+                    fp.write(", ")
+                fp.write(encoder.encode(key) + ": ")
+                if key == "log_entries":
+                    fp.write("[")
+                    for j, encoded_batch in enumerate(encoded_batches):
+                        if j > 0:
+                            fp.write(", ")
+                        fp.write(encoded_batch)
+                    fp.write("]")
+                else:
+                    fp.write(encoder.encode(value))
+            fp.write("}")
+        if self.stats is not None:
+            self.stats.count("json_encoder.entries", len(session_log.log_entries))
+
+    def _iter_encoded_batches(self, encoder: json.JSONEncoder, log_entries: Iterable[Any]) -> Iterator[str]:
+        """
+        Yields `ENTRY_BATCH_SIZE` log entries at a time, encoded without the enclosing brackets.
+        """
+        iterator = iter(log_entries)
+        while True:
+            batch = list(itertools.islice(iterator, self.ENTRY_BATCH_SIZE))
+            if len(batch) == 0:
+                return
+            yield encoder.encode(batch)[1:-1]
 
     def _encoder_default(self, o):
         if isinstance(o, SessionLog):
+            if self.options.compact_player_positions:
+                return self._compact_session_log(o)
             return self._dataclasses_shadow_asdict(o)
         if isinstance(o, Entry):
             if dataclasses.is_dataclass(o):
                 values = self._make_safe_to_store(self._dataclasses_shadow_asdict(o))
+                if isinstance(o, VRCYodokoroTagMarkerEntry):
+                    self._encode_yodokoro_tags(o, values)
                 values[ENTRY_TYPE_ID_ATTR_NAME] = o.type_id()
                 return values
         if isinstance(o, Timestamp):
@@ -70,16 +156,46 @@ class JsonEncoder:
         if dataclasses.is_dataclass(o):
             return dataclasses.asdict(o)
 
+    def _encode_yodokoro_tags(self, entry: VRCYodokoroTagMarkerEntry, values: Dict[str, Any]):
+        if not entry.changes_only:
+            del values["changes_only"]
+        if self.options.compact_yodokoro_tags and entry.tag_bits_for_player_id is not None:
+            del values["tag_names_for_player_id"]
+            if entry.tag_names == self._last_tag_names:
+                # Restored from the previous tag marker entry by `JsonDecoder`
+                del values["tag_names"]
+            else:
+                self._last_tag_names = entry.tag_names
+        else:
+            values["tag_names_for_player_id"] = entry.tag_names_for_player_id
+            del values["tag_bits_for_player_id"]
+            del values["tag_names"]
+
+    def _compact_session_log(self, session_log: SessionLog) -> Dict[str, Any]:
+        compactor = PlayerPositionCompactor()
+        log_entries = compactor.compact([
+            self._encoder_default(entry)
+            for entry in session_log.log_entries
+        ])
+        # Streams come first, so that `JsonDecoder.read` can restore entries one by one.
+        values = {STREAMS_ATTR_NAME: compactor.streams_json()}
+        values.update(self._dataclasses_shadow_asdict(session_log))
+        values["log_entries"] = log_entries
+        return values
+
     @staticmethod
     def _dataclasses_shadow_asdict(o):
+        # Reads raw values, so that lazy values (ex. `LazyPseudoUserName`) are resolved only when they are stored.
+        # Slotted dataclasses have no `__dict__`, and their fields are read as attributes.
+        values = getattr(o, "__dict__", {})
         return {
-            field.name: getattr(o, field.name)
+            field.name: values[field.name] if field.name in values else object.__getattribute__(o, field.name)
             for field in dataclasses.fields(o)
         }
 
     def _make_safe_to_store(self, o: Dict[str, Any]) -> Dict[str, Any]:
         return {
-            k: v
+            k: v.resolve() if isinstance(v, LazyPseudoUserName) else v
             for k, v in o.items()
             if self._is_ok_to_store(k, v)
         }
@@ -88,7 +204,7 @@ class JsonEncoder:
         if isinstance(v, UserName):
             return self.options.output_user_name
 
-        if isinstance(v, PseudoUserName):
+        if isinstance(v, (PseudoUserName, LazyPseudoUserName)):
             return self.options.output_pseudo_user_name
 
         if isinstance(v, VRCPlayerId):
@@ -117,36 +233,251 @@ class JsonDecoder:
         def default(cls):
             return cls
 
-    def __init__(self, options: Optional[Options] = None):
+    def __init__(self, options: Optional[Options] = None, stats: Optional[Stats] = None):
+        """
+        :param stats: Measures "json_decoder.decode" / "json_decoder.read" and counts entries if not None.
+        """
         if options is None:
             options = JsonDecoder.Options.default()
         self.options = options
+        self.stats = stats
+        self._last_tag_names: Optional[List[str]] = None
         self.entry_class_by_id: Dict[str, Entry] = {
             klass.type_id(): klass
             for klass in ALL_ENTRIES
         }
 
     def decode(self, session_log_str: str) -> SessionLog:
+        with timed(self.stats, "json_decoder.decode"):
+            session_log = self._decode(session_log_str)
+        if self.stats is not None:
+            self.stats.count("json_decoder.entries", len(session_log.log_entries))
+        return session_log
+
+    def read(self, fp: TextIO) -> SessionLog:
+        """
+        Same as `decode`, but reads `fp` chunk by chunk and decodes log entries one by one, so the whole json text is
+        never kept in memory.
+        """
+        with timed(self.stats, "json_decoder.read"):
+            session_log = self._read(fp)
+        if self.stats is not None:
+            self.stats.count("json_decoder.entries", len(session_log.log_entries))
+        return session_log
+
+    def _decode(self, session_log_str: str) -> SessionLog:
+        self._last_tag_names = None
         decoder = json.JSONDecoder()
         session_log_dict = decoder.decode(session_log_str)
         log_entries_json = session_log_dict.get("log_entries")
         metadata_json = session_log_dict.get("metadata")
+        expander = PlayerPositionExpander(session_log_dict.get(STREAMS_ATTR_NAME, []))
+
+        log_entries = [
+            self._decode_entry(expanded_json)
+            for entry_json in log_entries_json
+            for expanded_json in expander.expand(entry_json)
+        ]
 
+        return SessionLog(
+            log_entries=log_entries,
+            metadata=self._decode_metadata(metadata_json),
+        )
+
+    def _read(self, fp: TextIO) -> SessionLog:
+        self._last_tag_names = None
+        reader = _JsonStreamReader(fp)
         log_entries = []
-        for entry_json in log_entries_json:
-            entry_class = self.entry_class_by_id.get(entry_json.get(ENTRY_TYPE_ID_ATTR_NAME))
-            entry = entry_class.from_json(entry_json)
-            log_entries.append(entry)
-
-        if metadata_json is not None:
-            if self.options.metadata_class is not None:
-                metadata = self.options.metadata_class.from_json(metadata_json)
+        metadata_json = None
+        expander = PlayerPositionExpander([])
+
+        for key in reader.iter_object_keys():
+            if key == STREAMS_ATTR_NAME:
+                expander = PlayerPositionExpander(list(reader.iter_array_values()))
+            elif key == "log_entries":
+                for entry_json in reader.iter_array_values():
+                    for expanded_json in expander.expand(entry_json):
+                        log_entries.append(self._decode_entry(expanded_json))
+            elif key == "metadata":
+                metadata_json = reader.read_value()
             else:
-                metadata = metadata_json
-        else:
-            metadata = None
+                reader.read_value()
 
         return SessionLog(
             log_entries=log_entries,
-            metadata=metadata
+            metadata=self._decode_metadata(metadata_json),
         )
+
+    def _decode_entry(self, entry_json: Dict[str, Any]) -> Entry:
+        entry_class = self.entry_class_by_id.get(entry_json.get(ENTRY_TYPE_ID_ATTR_NAME))
+        if entry_class is VRCYodokoroTagMarkerEntry and "tag_bits_for_player_id" in entry_json:
+            # See `JsonEncoder.Options.compact_yodokoro_tags`
+            if "tag_names" in entry_json:
+                self._last_tag_names = entry_json["tag_names"]
+            else:
+                entry_json["tag_names"] = self._last_tag_names
+        return entry_class.from_json(entry_json)
+
+    def _decode_metadata(self, metadata_json: Any) -> Any:
+        if metadata_json is None:
+            return None
+        if self.options.metadata_class is not None:
+            return self.options.metadata_class.from_json(metadata_json)
+        return metadata_json
+
+
+class _JsonStreamReader:
+    """
+    Incrementally reads a json object from a text stream.
+
+    Only the top-level object and arrays directly under it are read incrementally. Other values are decoded as a whole
+    with `json.JSONDecoder.raw_decode`.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    regex_whitespace = re.compile(r'[ \t\n\r]*')
+    regex_structural = re.compile(r'["\[\]{}]')
+    regex_string_special = re.compile(r'["\\]')
+    regex_scalar_end = re.compile(r'[ \t\n\r,\]}]')
+
+    def __init__(self, fp: TextIO):
+        self.fp = fp
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def iter_object_keys(self):
+        """
+        Yields the keys of the object. The caller must read the value for each key before resuming.
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.read_value()
+            self._expect(':')
+            yield key
+            if self._next_char() == '}':
+                return
+
+    def iter_array_values(self):
+        self._expect('[')
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.read_value()
+            if self._next_char() == ']':
+                return
+
+    def read_value(self) -> Any:
+        self._skip_whitespace()
+        try:
+            value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            # A value touching the end of the buffer (ex. a number) may continue in the next chunk.
+            if end < len(self.buffer) or self.eof:
+                self.pos = end
+                return value
+        except json.JSONDecodeError:
+            if self.eof:
+                raise
+        self._fill_value()
+        value, self.pos = self.decoder.raw_decode(self.buffer, self.pos)
+        return value
+
+    def _fill_value(self):
+        """
+        Fills the buffer until it has the whole value at `pos`. Each chunk is scanned once for the end of the value,
+        rather than decoding the value from its start after each chunk, which would take quadratic time.
+        """
+        scan_pos = self.pos
+        if self.buffer[self.pos] not in '[{"':
+            # A number, true, false or null
+            while self.regex_scalar_end.search(self.buffer, scan_pos) is None:
+                scan_pos = len(self.buffer)
+                offset = scan_pos - self.pos
+                if not self._fill():
+                    return
+                scan_pos = self.pos + offset
+            return
+
+        depth = 0
+        in_string = False
+        while True:
+            while scan_pos < len(self.buffer):
+                if in_string:
+                    match = self.regex_string_special.search(self.buffer, scan_pos)
+                    if match is None:
+                        scan_pos = len(self.buffer)
+                    elif match.group() == '\\':
+                        if match.end() == len(self.buffer):
+                            # The escaped character is in the next chunk
+                            scan_pos = match.start()
+                            break
+                        scan_pos = match.end() + 1
+                    else:
+                        scan_pos = match.end()
+                        in_string = False
+                        if depth == 0:
+                            return
+                else:
+                    match = self.regex_structural.search(self.buffer, scan_pos)
+                    if match is None:
+                        scan_pos = len(self.buffer)
+                        continue
+                    scan_pos = match.end()
+                    char = match.group()
+                    if char == '"':
+                        in_string = True
+                    elif char in '[{':
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if depth == 0:
+                            return
+            offset = scan_pos - self.pos
+            if not self._fill():
+                # Left to `raw_decode` to raise
+                return
+            scan_pos = self.pos + offset
+
+    def _next_char(self) -> str:
+        """
+        Consumes a separator between values. Returns "," or a closing bracket.
+        """
+        char = self._peek()
+        if char not in ',}]':
+            raise json.JSONDecodeError("Expecting ',' delimiter", self.buffer, self.pos)
+        self.pos += 1
+        return char
+
+    def _expect(self, char: str):
+        if self._peek() != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}", self.buffer, self.pos)
+        self.pos += 1
+
+    def _peek(self) -> str:
+        self._skip_whitespace()
+        if self.pos >= len(self.buffer):
+            raise json.JSONDecodeError("Unexpected end of data", self.buffer, self.pos)
+        return self.buffer[self.pos]
+
+    def _skip_whitespace(self):
+        while True:
+            self.pos = self.regex_whitespace.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self._fill():
+                return
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.CHUNK_SIZE)
+        if chunk == '':
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
@@ -0,0 +1,206 @@
+"""
+Compact json encoding of player positions (`JsonEncoder.Options.compact_player_positions`).
+
+Position entries are grouped into one stream per player (same player_id, user_name and pseudo_user_name). Each
+stream stores its samples as rows:
+
+* `[dt, [i, value, i, value, ...]]`: a sample `dt` seconds after the previous one. Only changed fields are stored,
+  as pairs of the field index (in `fields` of the stream) and the new value.
+* `[dt, n]`: `n` samples, each `dt` seconds after the previous one, with no changed field.
+
+`dt` is `{"t": timestamp}` for the first sample of a stream, or when the delta can not restore the timestamp exactly.
+
+In `log_entries`, consecutive position entries are replaced by one block listing the stream index of each entry, so
+that the original order is restored by the decoder.
+
+Encoding and decoding work on json values (dicts), so the round trip is lossless.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from yaiba.log.types import Timestamp
+from yaiba.log.vrc.entries.player_position import VRCYAIBAPlayerPositionEntry
+
+ENTRY_TYPE_ID_ATTR_NAME = "type_id"
+POSITION_TYPE_ID = VRCYAIBAPlayerPositionEntry.type_id()
+COMPACT_BLOCK_TYPE_ID = POSITION_TYPE_ID + "/compact"
+STREAMS_ATTR_NAME = "player_position_streams"
+
+STREAM_KEY_FIELD_NAMES = ("player_id", "user_name", "pseudo_user_name")
+TIMESTAMP_FIELD_NAME = "timestamp"
+
+
+class _StreamState:
+    def __init__(self, key: Dict[str, Any], fields: Tuple[str, ...], timestamped: bool):
+        self.key = key
+        self.fields = fields
+        self.timestamped = timestamped
+        self.samples: List[list] = []
+        self.last_values: Optional[List[Any]] = None
+        self.last_timestamp: Optional[float] = None
+
+    def append(self, entry_json: Dict[str, Any]):
+        timestamp = _to_epoch(entry_json.get(TIMESTAMP_FIELD_NAME)) if self.timestamped else None
+        dt = self._encode_dt(timestamp)
+        values = [entry_json[name] for name in self.fields]
+
+        if self.last_values is None:
+            changes = []
+            for i, value in enumerate(values):
+                changes += [i, value]
+        else:
+            changes = []
+            for i, (value, last_value) in enumerate(zip(values, self.last_values)):
+                if not _is_same_value(value, last_value):
+                    changes += [i, value]
+
+        if len(changes) > 0 or isinstance(dt, dict) or len(self.samples) == 0:
+            self.samples.append([dt, changes])
+        elif isinstance(self.samples[-1][1], int) and _is_same_value(self.samples[-1][0], dt):
+            self.samples[-1][1] += 1
+        else:
+            self.samples.append([dt, 1])
+
+        self.last_values = values
+        self.last_timestamp = timestamp
+
+    def _encode_dt(self, timestamp: Optional[float]) -> Any:
+        if not self.timestamped:
+            return 0
+        if self.last_timestamp is None or timestamp is None:
+            return {"t": timestamp}
+        dt = timestamp - self.last_timestamp
+        if self.last_timestamp + dt != timestamp:
+            return {"t": timestamp}
+        return dt
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "fields": list(self.fields),
+            "timestamped": self.timestamped,
+            "samples": self.samples,
+        }
+
+
+class PlayerPositionCompactor:
+    """
+    Replaces position entries (json values) with compact blocks, and collects the per-player streams.
+    """
+
+    def __init__(self):
+        self.streams: List[_StreamState] = []
+        self._stream_index_by_key: Dict[tuple, int] = {}
+
+    def compact(self, entries_json: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return list(self.iter_compact(entries_json))
+
+    def iter_compact(self, entries_json: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Same as `compact`, but yields each value once it is complete, so that position entries are not kept.
+        """
+        block: Optional[List[int]] = None
+        for entry_json in entries_json:
+            if entry_json.get(ENTRY_TYPE_ID_ATTR_NAME) != POSITION_TYPE_ID:
+                if block is not None:
+                    yield {ENTRY_TYPE_ID_ATTR_NAME: COMPACT_BLOCK_TYPE_ID, "streams": block}
+                    block = None
+                yield entry_json
+                continue
+            if block is None:
+                block = []
+            block.append(self._append_to_stream(entry_json))
+        if block is not None:
+            yield {ENTRY_TYPE_ID_ATTR_NAME: COMPACT_BLOCK_TYPE_ID, "streams": block}
+
+    def streams_json(self) -> List[Dict[str, Any]]:
+        return [s.to_json() for s in self.streams]
+
+    def _append_to_stream(self, entry_json: Dict[str, Any]) -> int:
+        key = {
+            name: entry_json[name]
+            for name in STREAM_KEY_FIELD_NAMES
+            if name in entry_json
+        }
+        fields = tuple(
+            name
+            for name in entry_json.keys()
+            if name not in key and name not in (TIMESTAMP_FIELD_NAME, ENTRY_TYPE_ID_ATTR_NAME)
+        )
+        timestamped = TIMESTAMP_FIELD_NAME in entry_json
+        stream_key = (tuple(key.items()), fields, timestamped)
+
+        index = self._stream_index_by_key.get(stream_key)
+        if index is None:
+            index = len(self.streams)
+            self._stream_index_by_key[stream_key] = index
+            self.streams.append(_StreamState(key, fields, timestamped))
+        self.streams[index].append(entry_json)
+        return index
+
+
+class PlayerPositionExpander:
+    """
+    Restores position entries (json values) from compact blocks.
+    """
+
+    def __init__(self, streams_json: List[Dict[str, Any]]):
+        self._stream_iterators = [_iter_stream(s) for s in streams_json]
+
+    def expand(self, entry_json: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        if entry_json.get(ENTRY_TYPE_ID_ATTR_NAME) != COMPACT_BLOCK_TYPE_ID:
+            yield entry_json
+            return
+        for stream_index in entry_json.get("streams"):
+            yield next(self._stream_iterators[stream_index])
+
+
+def _iter_stream(stream_json: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    key = stream_json.get("key")
+    fields = stream_json.get("fields")
+    timestamped = stream_json.get("timestamped")
+
+    values: List[Any] = [None] * len(fields)
+    timestamp: Optional[float] = None
+
+    def new_entry_json():
+        entry_json = dict(key)
+        if timestamped:
+            entry_json[TIMESTAMP_FIELD_NAME] = timestamp
+        entry_json.update(zip(fields, values))
+        entry_json[ENTRY_TYPE_ID_ATTR_NAME] = POSITION_TYPE_ID
+        return entry_json
+
+    for dt, changes in stream_json.get("samples"):
+        count = 1
+        if isinstance(changes, int):
+            count = changes
+        else:
+            for i in range(0, len(changes), 2):
+                values[changes[i]] = changes[i + 1]
+
+        for _ in range(count):
+            if isinstance(dt, dict):
+                timestamp = dt.get("t")
+            elif timestamped:
+                timestamp = timestamp + dt
+            yield new_entry_json()
+
+
+def _to_epoch(timestamp: Any) -> Any:
+    if isinstance(timestamp, Timestamp):
+        return timestamp.timestamp()
+    return timestamp
+
+
+def _is_same_value(a: Any, b: Any) -> bool:
+    """
+    Strict equality, so that the decoded json value is exactly the same (ex. 1 and 1.0, or 0.0 and -0.0 differ).
+    """
+    if type(a) is not type(b) or a != b:
+        return False
+    if isinstance(a, float):
+        return math.copysign(1.0, a) == math.copysign(1.0, b)
+    return True
@@ -0,0 +1,75 @@
+"""
+Opt-in instrumentation of parsing and encoding: counters and cumulative stage timings.
+"""
+from __future__ import annotations
+
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Dict, Iterator, Optional
+
+"""
+Called with (name, value) for each counter increment and each stage timing (in seconds).
+"""
+StatsHook = Callable[[str, float], None]
+
+
+class Stats:
+    """
+    Counters (ex. "parser.lines", "entries.vrc/player_join", "pseudonymizer.cache_hits") and cumulative timings of
+    stages in seconds (ex. "parser.read", "parse.YAIBAPlayerPositionEntryParser", "json_encoder.write").
+
+    Components take `stats=None` (or `VRCLogParser.Config.stats`), which disables instrumentation: they only check
+    `stats is not None`, and do not time anything.
+    """
+
+    def __init__(self, hook: Optional[StatsHook] = None):
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.timings_sec: Dict[str, float] = defaultdict(float)
+        self.hook = hook
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] += n
+        if self.hook is not None:
+            self.hook(name, n)
+
+    def add_time(self, name: str, seconds: float):
+        self.timings_sec[name] += seconds
+        if self.hook is not None:
+            self.hook(name, seconds)
+
+    @contextmanager
+    def time(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def merge(self, other: Stats) -> Stats:
+        for name, n in other.counters.items():
+            self.counters[name] += n
+        for name, seconds in other.timings_sec.items():
+            self.timings_sec[name] += seconds
+        return self
+
+    def report(self) -> str:
+        lines = [f"{name:<48} {seconds:>10.3f} s" for name, seconds in sorted(self.timings_sec.items())]
+        lines += [f"{name:<48} {n:>12}" for name, n in sorted(self.counters.items())]
+        return "\n".join(lines)
+
+    def __getstate__(self):
+        # Picklable without the hook, to be returned from worker processes
+        return {"counters": dict(self.counters), "timings_sec": dict(self.timings_sec)}
+
+    def __setstate__(self, state):
+        self.counters = defaultdict(int, state["counters"])
+        self.timings_sec = defaultdict(float, state["timings_sec"])
+        self.hook = None
+
+
+def timed(stats: Optional[Stats], name: str) -> ContextManager:
+    """
+    `stats.time(name)`, or a no-op if `stats` is None. For coarse stages, where a context manager costs nothing.
+    """
+    return nullcontext() if stats is None else stats.time(name)
@@ -1,13 +1,15 @@
 from unittest.mock import Mock
 
 from yaiba.log import Entry, JsonDecoder, JsonEncoder, SessionLog
-from yaiba.log.pseudonymizer import Pseudonymizer
+from yaiba.log.pseudonymizer import LazyPseudoUserName, Pseudonymizer
 from yaiba.log.types import PseudoUserName
 
 
 def new_pseudonymizer(return_value: str = "pseudo_user_name") -> Pseudonymizer:
     pseudonymizer: Pseudonymizer = Mock()
     pseudonymizer.pseudonymize_user_name.return_value = PseudoUserName(return_value)
+    pseudonymizer.pseudonymize_user_name_lazily.side_effect = \
+        lambda user_name: LazyPseudoUserName(user_name, pseudonymizer)
     return pseudonymizer
 
 
@@ -0,0 +1,73 @@
+import io
+
+import pytest
+
+import yaiba
+from yaiba.log import compression
+from yaiba.log.session_log import SessionLog
+from yaiba.log.types import PseudoUserName, UserName
+from yaiba.log.vrc.entries.builtin import VRCPlayerJoinEntry
+from yaiba.log.vrc.utils import parse_timestamp
+
+
+def _new_session_log() -> SessionLog:
+    return SessionLog(
+        log_entries=[
+            VRCPlayerJoinEntry(
+                timestamp=parse_timestamp("2022.03.04 21:50:19"),
+                user_name=UserName("E.HOBA"),
+                pseudo_user_name=PseudoUserName("E.HOBA Pseudo")
+            ),
+        ] * 100,
+        metadata={"title": "理系集会"},
+    )
+
+
+class TestCompression:
+    @pytest.mark.parametrize("file_name, expected", [
+        ("log.json", None),
+        ("log.json.gz", compression.GZIP),
+        ("log.json.xz", compression.XZ),
+        ("LOG.JSON.ZST", compression.ZSTD),
+    ])
+    def test__detect_compression(self, file_name, expected):
+        assert compression.detect_compression(file_name) == expected
+
+    @pytest.mark.parametrize("file_name", ["log.json", "log.json.gz", "log.json.xz"])
+    def test__save_and_load__path(self, tmp_path, file_name):
+        session_log = _new_session_log()
+        path = tmp_path / file_name
+
+        yaiba.save_session_log(session_log, path)
+
+        assert yaiba.load_session_log(path) == session_log
+
+    def test__save_and_load__compressed_by_extension(self, tmp_path):
+        session_log = _new_session_log()
+        plain_path = tmp_path / "log.json"
+        gzip_path = tmp_path / "log.json.gz"
+
+        yaiba.save_session_log(session_log, plain_path)
+        yaiba.save_session_log(session_log, gzip_path)
+
+        assert gzip_path.stat().st_size < plain_path.stat().st_size
+
+    @pytest.mark.parametrize("codec", [compression.GZIP, compression.XZ])
+    def test__save_and_load__binary_file_object(self, codec):
+        session_log = _new_session_log()
+        fp = io.BytesIO()
+
+        yaiba.save_session_log(session_log, fp, compression=codec)
+        assert not fp.closed
+
+        fp.seek(0)
+        assert yaiba.load_session_log(fp, compression=codec) == session_log
+
+    def test__save_and_load__zstd(self, tmp_path):
+        pytest.importorskip("zstandard")
+        session_log = _new_session_log()
+        path = tmp_path / "log.json.zst"
+
+        yaiba.save_session_log(session_log, path)
+
+        assert yaiba.load_session_log(path) == session_log
@@ -0,0 +1,96 @@
+import copy
+import pickle
+from unittest.mock import patch
+
+from yaiba.log.pseudonymizer import LazyPseudoUserName, Pseudonymizer
+from yaiba.log.session_log import SessionLog
+from yaiba.log.session_log_json import JsonEncoder
+from yaiba.log.types import PseudoUserName, UserName
+from yaiba.log.vrc.entries.builtin import VRCPlayerJoinEntry
+from yaiba.log.vrc.utils import parse_timestamp
+
+
+class TestPseudonymizer:
+    def test__pseudonymize_user_name(self):
+        pseudonymizer = Pseudonymizer(b'salt')
+
+        output = pseudonymizer.pseudonymize_user_name(UserName("E.HOBA"))
+
+        assert isinstance(output, PseudoUserName)
+        assert output == Pseudonymizer(b'salt').pseudonymize_user_name(UserName("E.HOBA"))
+        assert output != Pseudonymizer(b'another salt').pseudonymize_user_name(UserName("E.HOBA"))
+
+    def test__pseudonymize_user_name__cached(self):
+        pseudonymizer = Pseudonymizer(b'salt')
+
+        with patch.object(pseudonymizer, '_hash_user_name', wraps=pseudonymizer._hash_user_name) as hash_user_name:
+            pseudonymizer.pseudonymize_user_name(UserName("E.HOBA"))
+            pseudonymizer.pseudonymize_user_name(UserName("E.HOBA"))
+
+        assert hash_user_name.call_count == 1
+
+    def test__pseudonymize_user_name_lazily(self):
+        pseudonymizer = Pseudonymizer(b'salt')
+
+        with patch.object(pseudonymizer, '_hash_user_name', wraps=pseudonymizer._hash_user_name) as hash_user_name:
+            entry = VRCPlayerJoinEntry(
+                timestamp=parse_timestamp("2022.03.04 21:50:19"),
+                user_name=UserName("E.HOBA"),
+                pseudo_user_name=pseudonymizer.pseudonymize_user_name_lazily(UserName("E.HOBA")),
+            )
+            assert hash_user_name.call_count == 0
+
+            assert isinstance(entry.pseudo_user_name, PseudoUserName)
+            assert entry.pseudo_user_name == pseudonymizer.pseudonymize_user_name(UserName("E.HOBA"))
+            assert hash_user_name.call_count == 1
+
+    def test__pseudonymize_user_name_lazily__json_encoder(self):
+        pseudonymizer = Pseudonymizer(b'salt')
+
+        def new_session_log():
+            return SessionLog(log_entries=[
+                VRCPlayerJoinEntry(
+                    timestamp=parse_timestamp("2022.03.04 21:50:19"),
+                    user_name=UserName("E.HOBA"),
+                    pseudo_user_name=pseudonymizer.pseudonymize_user_name_lazily(UserName("E.HOBA")),
+                )
+            ])
+
+        eager_session_log = SessionLog(log_entries=[
+            VRCPlayerJoinEntry(
+                timestamp=parse_timestamp("2022.03.04 21:50:19"),
+                user_name=UserName("E.HOBA"),
+                pseudo_user_name=Pseudonymizer(b'salt').pseudonymize_user_name(UserName("E.HOBA")),
+            )
+        ])
+
+        options = JsonEncoder.Options.pseudonymized()
+        assert JsonEncoder(options).encode(new_session_log()) == JsonEncoder(options).encode(eager_session_log)
+
+        # Not hashed when pseudonymized user name is not stored
+        options = JsonEncoder.Options(output_pseudo_user_name=False)
+        session_log = new_session_log()
+        pseudonymizer._cache.clear()
+        JsonEncoder(options).encode(session_log)
+        assert isinstance(vars(session_log.log_entries[0])['pseudo_user_name'], LazyPseudoUserName)
+        assert len(pseudonymizer._cache) == 0
+
+    def test__pseudonymize_user_name_lazily__drops_pseudonymizer(self):
+        pseudonymizer = Pseudonymizer(b'salt')
+        expected = pseudonymizer.pseudonymize_user_name(UserName("E.HOBA"))
+
+        lazy = pseudonymizer.pseudonymize_user_name_lazily(UserName("E.HOBA"))
+        assert lazy.resolve() == expected
+        assert lazy.pseudonymizer is None
+        assert lazy.resolve() == expected
+
+        # Pickled and deep-copied as the resolved value, without the salt
+        entry = VRCPlayerJoinEntry(
+            timestamp=parse_timestamp("2022.03.04 21:50:19"),
+            user_name=UserName("E.HOBA"),
+            pseudo_user_name=pseudonymizer.pseudonymize_user_name_lazily(UserName("E.HOBA")),
+        )
+        pickled = pickle.dumps(entry)
+        assert b'salt' not in pickled
+        assert vars(pickle.loads(pickled))['pseudo_user_name'] == expected
+        assert vars(copy.deepcopy(entry))['pseudo_user_name'] == expected
@@ -0,0 +1,87 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from yaiba.log.session_log import SessionLog
+from yaiba.log.session_log_dataframe import DataFrameEncoder, YODOKORO_TAGS_TYPE_ID
+from yaiba.log.types import PseudoUserName, UserName, VRCPlayerId
+from yaiba.log.vrc.entries.builtin import VRCPlayerJoinEntry
+from yaiba.log.vrc.entries.player_position import VRCYAIBAPlayerPositionEntry
+from yaiba.log.vrc.entries.yodokoro_tag_marker import VRCYodokoroTagMarkerEntry
+from yaiba.log.vrc.utils import parse_timestamp
+
+
+def _position_entry(timestamp: str, user_name: str, location_y=2.0) -> VRCYAIBAPlayerPositionEntry:
+    return VRCYAIBAPlayerPositionEntry(
+        parse_timestamp(timestamp),
+        player_id=VRCPlayerId(7),
+        user_name=UserName(user_name),
+        pseudo_user_name=PseudoUserName(user_name + ' pseudo'),
+        location_x=1.0,
+        location_y=location_y,
+        location_z=3.0,
+        rotation_1=4.0,
+        rotation_2=5.0,
+        rotation_3=6.0,
+        velocity_x=None,
+        velocity_y=None,
+        velocity_z=None,
+        is_vr=True,
+    )
+
+
+class TestDataFrameEncoder:
+    def test__normal(self):
+        session_log = SessionLog(log_entries=[
+            _position_entry("2022.03.04 21:50:19", "E.HOBA"),
+            VRCPlayerJoinEntry(
+                parse_timestamp("2022.03.04 21:50:20"),
+                user_name=UserName("A.HOBA"),
+                pseudo_user_name=PseudoUserName('A.HOBA pseudo'),
+            ),
+            _position_entry("2022.03.04 21:50:21", "A.HOBA", location_y=None),
+        ])
+
+        frames = session_log.to_frames()
+
+        positions = frames[VRCYAIBAPlayerPositionEntry.type_id()]
+        assert len(positions) == 2
+        assert str(positions["timestamp"].dtype) == "datetime64[ns, UTC]"
+        assert positions["timestamp"].iloc[1] == pd.Timestamp("2022-03-04 21:50:21", tz="UTC")
+        assert positions["pseudo_user_name"].dtype == "category"
+        assert positions["location_x"].dtype == "float32"
+        assert positions["location_y"].isna().tolist() == [False, True]
+        assert positions["velocity_x"].isna().all()
+        assert positions["player_id"].dtype == "int32"
+        assert positions["is_vr"].tolist() == [True, True]
+
+        joins = frames[VRCPlayerJoinEntry.type_id()]
+        assert joins["pseudo_user_name"].tolist() == ["A.HOBA pseudo"]
+
+        # Every known type has a frame, even if empty
+        assert len(frames[VRCYodokoroTagMarkerEntry.type_id()]) == 0
+
+    def test__pseudonymized(self):
+        session_log = SessionLog(log_entries=[_position_entry("2022.03.04 21:50:19", "E.HOBA")])
+
+        frames = DataFrameEncoder(DataFrameEncoder.Options.pseudonymized()).encode(session_log)
+
+        assert "user_name" not in frames[VRCYAIBAPlayerPositionEntry.type_id()].columns
+        assert "pseudo_user_name" in frames[VRCYAIBAPlayerPositionEntry.type_id()].columns
+
+    def test__explode_yodokoro_tags(self):
+        session_log = SessionLog(log_entries=[
+            VRCYodokoroTagMarkerEntry(
+                timestamp=parse_timestamp("2022.03.05 00:31:57"),
+                tag_names_for_player_id={
+                    VRCPlayerId(8): [],
+                    VRCPlayerId(9): ['物理学', '化学'],
+                },
+            ),
+        ])
+
+        options = DataFrameEncoder.Options(explode_yodokoro_tags=True)
+        tags = session_log.to_frames(options)[YODOKORO_TAGS_TYPE_ID]
+
+        assert tags["player_id"].tolist() == [9, 9]
+        assert tags["tag"].tolist() == ['物理学', '化学']
@@ -1,5 +1,11 @@
-from yaiba.log.session_log import SessionLog
-from yaiba.log.session_log_json import JsonDecoder, JsonEncoder
+import io
+import sys
+from dataclasses import dataclass
+
+import pytest
+
+from yaiba.log.session_log import Entry, SessionLog
+from yaiba.log.session_log_json import JsonDecoder, JsonEncoder, _JsonStreamReader
 from yaiba.log.types import PseudoUserName, UserName
 from yaiba.log.vrc.entries.builtin import VRCPlayerJoinEntry
 from yaiba.log.vrc.utils import parse_timestamp
@@ -36,6 +42,60 @@ class TestJsonEncoder:
             '{"timestamp": 1646430619.0, "pseudo_user_name": "E.HOBA Pseudo", "type_id": '
             '"vrc/player_join"}], "metadata": null}')
 
+    def test__write(self):
+        encoder = JsonEncoder(options=JsonEncoder.Options.pseudonymized())
+        log = SessionLog(
+            log_entries=[
+                VRCPlayerJoinEntry(
+                    timestamp=parse_timestamp("2022.03.04 21:50:19"),
+                    user_name=UserName("E.HOBA"),
+                    pseudo_user_name=PseudoUserName("E.HOBA Pseudo")
+                ),
+            ])
+
+        fp = io.StringIO()
+        encoder.write(log, fp)
+
+        assert fp.getvalue() == encoder.encode(log)
+
+    def test__write__batches(self, monkeypatch):
+        monkeypatch.setattr(JsonEncoder, "ENTRY_BATCH_SIZE", 2)
+        encoder = JsonEncoder(options=JsonEncoder.Options.pseudonymized())
+        log = SessionLog(
+            log_entries=[
+                VRCPlayerJoinEntry(
+                    timestamp=parse_timestamp(f"2022.03.04 21:50:{second:02d}"),
+                    user_name=UserName("E.HOBA"),
+                    pseudo_user_name=PseudoUserName("E.HOBA Pseudo")
+                )
+                for second in range(5)
+            ],
+            metadata={"title": "some title"})
+
+        for session_log in [log, SessionLog(log_entries=[], metadata=None)]:
+            fp = io.StringIO()
+            encoder.write(session_log, fp)
+
+            assert fp.getvalue() == encoder.encode(session_log)
+
+    @pytest.mark.skipif(sys.version_info < (3, 10), reason="dataclass(slots=True) requires Python 3.10")
+    def test__slotted_entry(self):
+        @dataclass(slots=True)
+        class SlottedEntry(Entry):
+            value: int
+
+            @classmethod
+            def type_id(cls):
+                return "test/slotted"
+
+            @classmethod
+            def from_json(cls, value):
+                return cls(value=value.get("value"))
+
+        output = JsonEncoder().encode(SessionLog(log_entries=[SlottedEntry(value=1)]))
+
+        assert output == '{"log_entries": [{"value": 1, "type_id": "test/slotted"}], "metadata": null}'
+
     def test__output_all_personal_info(self):
         options = JsonEncoder.Options.default()
         options.output_user_name = True
@@ -130,3 +190,23 @@ class TestJsonDecoder:
                     pseudo_user_name=PseudoUserName("E.HOBA Pseudo")
                 )
             ])
+
+    def test__read(self, monkeypatch):
+        decoder = JsonDecoder()
+        decoder_input = (
+            '{"log_entries": [{"timestamp": 1646430619.0, "user_name": "E.HOBA", '
+            '"pseudo_user_name": "E.HOBA Pseudo", "type_id": "vrc/player_join"}, '
+            '{"timestamp": 1646430619.0, "user_name": "E.HOBA", "pseudo_user_name": '
+            '"E.HOBA Pseudo", "type_id": "vrc/player_join"}], "metadata": {"title": "some title"}}')
+
+        # Small chunks to split values across chunks
+        monkeypatch.setattr(_JsonStreamReader, "CHUNK_SIZE", 7)
+        output = decoder.read(io.StringIO(decoder_input))
+
+        assert output == decoder.decode(decoder_input)
+        assert output.metadata == {"title": "some title"}
+
+    def test__read__empty(self):
+        output = JsonDecoder().read(io.StringIO(' { "log_entries" : [ ] , "metadata" : 12 } '))
+
+        assert output == SessionLog(log_entries=[], metadata=12)
@@ -0,0 +1,135 @@
+import io
+import json
+
+from yaiba.log.session_log import SessionLog
+from yaiba.log.session_log_json import JsonDecoder, JsonEncoder, _JsonStreamReader
+from yaiba.log.types import PseudoUserName, Timestamp, UserName, VRCPlayerId
+from yaiba.log.vrc.entries.builtin import VRCPlayerJoinEntry
+from yaiba.log.vrc.entries.player_position import VRCYAIBAPlayerPositionEntry
+from yaiba.log.vrc.utils import parse_timestamp
+
+
+def _position_entry(timestamp: Timestamp, user_name: str, location_x: float, velocity=None):
+    return VRCYAIBAPlayerPositionEntry(
+        timestamp=timestamp,
+        player_id=VRCPlayerId(13),
+        user_name=UserName(user_name),
+        pseudo_user_name=PseudoUserName("pseudo " + user_name),
+        location_x=location_x,
+        location_y=1.637101,
+        location_z=1.937101,
+        rotation_1=230.3723,
+        rotation_2=-3.32147,
+        rotation_3=-2.619154,
+        velocity_x=velocity,
+        velocity_y=velocity,
+        velocity_z=velocity,
+        is_vr=True,
+    )
+
+
+def _new_session_log() -> SessionLog:
+    start = parse_timestamp("2022.03.04 21:50:19").timestamp()
+    entries = [
+        VRCPlayerJoinEntry(
+            timestamp=Timestamp.from_json(start),
+            user_name=UserName("E.HOBA"),
+            pseudo_user_name=PseudoUserName("pseudo E.HOBA"),
+        ),
+    ]
+    for second in range(30):
+        timestamp = Timestamp.from_json(start + second)
+        # E.HOBA stands still, A.HOBA moves
+        entries.append(_position_entry(timestamp, "E.HOBA", -1.622916))
+        entries.append(_position_entry(timestamp, "A.HOBA", float(second), velocity=0.5))
+    entries.append(_position_entry(Timestamp.from_json(start + 30.25), "E.HOBA", -0.0))
+    entries.append(VRCPlayerJoinEntry(
+        timestamp=Timestamp.from_json(start + 31),
+        user_name=UserName("B.HOBA"),
+        pseudo_user_name=PseudoUserName("pseudo B.HOBA"),
+    ))
+    entries.append(_position_entry(Timestamp.from_json(start + 31), "E.HOBA", 0.0))
+    return SessionLog(log_entries=entries, metadata={"title": "some title"})
+
+
+class TestCompactPlayerPositions:
+    def test__round_trip(self):
+        session_log = _new_session_log()
+        options = JsonEncoder.Options.export_all()
+        options.compact_player_positions = True
+
+        output = JsonEncoder(options).encode(session_log)
+
+        assert JsonDecoder().decode(output) == session_log
+        assert JsonDecoder().read(io.StringIO(output)) == session_log
+        assert len(output) < len(JsonEncoder.export_all().encode(session_log)) / 3
+
+    def test__round_trip__same_json_values(self):
+        session_log = _new_session_log()
+        session_log.log_entries = [
+            e for e in session_log.log_entries
+            if isinstance(e, VRCYAIBAPlayerPositionEntry)
+        ]
+        options = JsonEncoder.Options.pseudonymized()
+        compact_options = JsonEncoder.Options.pseudonymized()
+        compact_options.compact_player_positions = True
+
+        output = JsonDecoder().decode(JsonEncoder(compact_options).encode(session_log))
+
+        assert json.loads(JsonEncoder(options).encode(output)) == json.loads(JsonEncoder(options).encode(session_log))
+
+    def test__run_length(self):
+        session_log = _new_session_log()
+        options = JsonEncoder.Options.export_all()
+        options.compact_player_positions = True
+
+        output = json.loads(JsonEncoder(options).encode(session_log))
+
+        streams = output["player_position_streams"]
+        assert [s["key"]["user_name"] for s in streams] == ["E.HOBA", "A.HOBA"]
+        # first sample, 29 unchanged samples, and 2 changed samples with a fractional timestamp
+        assert [s[1] if isinstance(s[1], int) else "changed" for s in streams[0]["samples"]] == [
+            "changed", 29, "changed", "changed"]
+
+    def test__write(self, monkeypatch):
+        monkeypatch.setattr(JsonEncoder, "ENTRY_BATCH_SIZE", 4)
+        session_log = _new_session_log()
+        options = JsonEncoder.Options.export_all()
+        options.compact_player_positions = True
+        encoder = JsonEncoder(options)
+
+        fp = io.StringIO()
+        encoder.write(session_log, fp)
+
+        assert fp.getvalue() == encoder.encode(session_log)
+
+    def test__read__many_chunks(self, monkeypatch):
+        start = parse_timestamp("2022.03.04 21:50:19").timestamp()
+        session_log = SessionLog(log_entries=[
+            _position_entry(Timestamp.from_json(start + i * 0.5), f"\\{i % 3}\"", i * 0.25, velocity=0.5)
+            for i in range(6000)
+        ])
+        options = JsonEncoder.Options.export_all()
+        options.compact_player_positions = True
+        output = JsonEncoder(options).encode(session_log)
+        monkeypatch.setattr(_JsonStreamReader, "CHUNK_SIZE", 1000)
+        assert len(output) > 100 * _JsonStreamReader.CHUNK_SIZE
+
+        # Counts characters decoded, which grows quadratically if a value is decoded from its start after each chunk
+        decoded_lengths = []
+        raw_decode = json.JSONDecoder.raw_decode
+
+        def counting_raw_decode(decoder, s, idx=0):
+            try:
+                value, end = raw_decode(decoder, s, idx)
+            except json.JSONDecodeError as e:
+                decoded_lengths.append(e.pos - idx)
+                raise
+            decoded_lengths.append(end - idx)
+            return value, end
+
+        monkeypatch.setattr(json.JSONDecoder, "raw_decode", counting_raw_decode)
+        output_session_log = JsonDecoder().read(io.StringIO(output))
+
+        assert output_session_log == session_log
+        assert sum(decoded_lengths) < 3 * len(output)
@@ -0,0 +1,77 @@
+import io
+import pickle
+
+from yaiba.log import JsonDecoder, JsonEncoder, Stats, VRCLogParser
+from yaiba.log.pseudonymizer import Pseudonymizer
+from yaiba.log.session_log_csv import CsvEncoder
+from yaiba.log.vrc.entries.player_position import VRCYAIBAPlayerPositionEntry
+
+LOG = """2022.03.04 21:50:19 Log        -  [Behaviour] Entering Room: FirstRoom
+2022.03.04 21:50:22 Log        -  [Behaviour] OnPlayerJoined E.HOBA
+2022.03.04 21:50:23 Log        -  [Player Position Version]1.0.0
+2022.03.04 21:50:31 Log        -  [Player Position]13,"E.HOBA",-6.329126,-0.3207326,-0.3207326,272.0943,-0.009579957,-0.01711023,0.0004068119,-0.06890159,-0.007717842,True
+2022.03.04 21:50:32 Log        -  [Player Position]13,"E.HOBA",-6.329126,-0.3207326,-0.3207326,272.0943,-0.009579957,-0.01711023,0.0004068119,-0.06890159,-0.007717842,True
+2022.03.04 21:50:33 Log        -  Unknown
+"""
+
+
+class TestStats:
+    def test__parser(self):
+        stats = Stats()
+        parser = VRCLogParser(VRCLogParser.Config(pseudonymizer=Pseudonymizer(b'salt'), stats=stats))
+
+        session_log = parser.parse(LOG)
+
+        assert len(session_log.log_entries) == 5
+        assert stats.counters["parser.raw_entries"] == 6
+        assert stats.counters["parser.unmatched"] == 1
+        assert stats.counters["entries.vrc/player_join"] == 1
+        assert stats.counters[f"entries.{VRCYAIBAPlayerPositionEntry.type_id()}"] == 2
+        assert stats.counters["pseudonymizer.cache_misses"] == 1
+        assert stats.counters["pseudonymizer.cache_hits"] == 2
+        assert "parse.YAIBAPlayerPositionEntryParser" in stats.timings_sec
+        assert "position.regex" in stats.timings_sec
+
+    def test__parser__same_entries_without_stats(self):
+        config = VRCLogParser.Config(pseudonymizer=Pseudonymizer(b'salt'))
+        instrumented_config = VRCLogParser.Config(pseudonymizer=Pseudonymizer(b'salt'), stats=Stats())
+
+        assert VRCLogParser(config).parse(LOG) == VRCLogParser(instrumented_config).parse(LOG)
+
+    def test__encoders(self):
+        session_log = VRCLogParser(VRCLogParser.Config(pseudonymizer=Pseudonymizer(b'salt'))).parse(LOG)
+        stats = Stats()
+
+        text = JsonEncoder(JsonEncoder.Options.pseudonymized(), stats=stats).encode(session_log)
+        JsonDecoder(stats=stats).decode(text)
+        CsvEncoder(VRCYAIBAPlayerPositionEntry, stats=stats).write(session_log, io.StringIO())
+
+        assert stats.counters["json_encoder.entries"] == 5
+        assert stats.counters["json_decoder.entries"] == 5
+        assert stats.counters["csv_encoder.rows"] == 2
+        assert set(stats.timings_sec) == {"json_encoder.encode", "json_decoder.decode", "csv_encoder.write"}
+
+    def test__hook(self):
+        calls = []
+        stats = Stats(hook=lambda name, value: calls.append((name, value)))
+
+        stats.count("a", 2)
+        with stats.time("b"):
+            pass
+
+        assert calls[0] == ("a", 2)
+        assert calls[1][0] == "b"
+        assert calls[1][1] >= 0.0
+
+    def test__merge_and_pickle(self):
+        stats = Stats(hook=lambda name, value: None)
+        stats.count("a")
+        stats.add_time("b", 1.5)
+
+        restored = pickle.loads(pickle.dumps(stats))
+        restored.merge(stats)
+
+        assert restored.hook is None
+        assert restored.counters == {"a": 2}
+        assert restored.timings_sec == {"b": 3.0}
+        assert "b" in restored.report()
@@ -4,7 +4,7 @@ import re
 from dataclasses import dataclass
 from typing import Any, ClassVar, Dict, Optional
 
-from yaiba.log.pseudonymizer import Pseudonymizer
+from yaiba.log.pseudonymizer import Pseudonymizer, PseudoUserNameField
 from yaiba.log.session_log import Entry, EntryParser
 from yaiba.log.types import PseudoUserName, RawEntry, Timestamp, UserName
 from yaiba.log.vrc.utils import VRC_REGEX_LOG_PREFIX, create_timestamp_from_match
@@ -31,7 +31,7 @@ class VRCEnteringRoomEntry(Entry):
 class VRCPlayerJoinEntry(Entry):
     timestamp: Timestamp
     user_name: Optional[UserName]
-    pseudo_user_name: PseudoUserName
+    pseudo_user_name: PseudoUserName = PseudoUserNameField()
 
     @classmethod
     def type_id(cls):
@@ -50,7 +50,7 @@ class VRCPlayerJoinEntry(Entry):
 class VRCPlayerLeftEntry(Entry):
     timestamp: Timestamp
     user_name: Optional[UserName]
-    pseudo_user_name: PseudoUserName
+    pseudo_user_name: PseudoUserName = PseudoUserNameField()
 
     @classmethod
     def type_id(cls):
@@ -79,8 +79,9 @@ class VRCBuiltinEntryParser(EntryParser):
         r'\[Behaviour] OnPlayerLeft (?P<user_name>.+)$'
     )
 
-    def __init__(self, pseudonymizer: Pseudonymizer):
+    def __init__(self, pseudonymizer: Pseudonymizer, lazy_pseudonymization: bool = False):
         self.pseudonymizer = pseudonymizer
+        self.lazy_pseudonymization = lazy_pseudonymization
 
     def parse(self, log_entry: RawEntry) -> Optional[Entry]:
         for func in [
@@ -110,7 +111,7 @@ class VRCBuiltinEntryParser(EntryParser):
         return VRCPlayerJoinEntry(
             timestamp=create_timestamp_from_match(match),
             user_name=user_name,
-            pseudo_user_name=self.pseudonymizer.pseudonymize_user_name(user_name),
+            pseudo_user_name=self._pseudonymize_user_name(user_name),
         )
 
     def _try_to_parse_player_left(self, log_entry: RawEntry) -> Optional[VRCPlayerLeftEntry]:
@@ -121,5 +122,10 @@ class VRCBuiltinEntryParser(EntryParser):
         return VRCPlayerLeftEntry(
             timestamp=create_timestamp_from_match(match),
             user_name=user_name,
-            pseudo_user_name=self.pseudonymizer.pseudonymize_user_name(user_name),
+            pseudo_user_name=self._pseudonymize_user_name(user_name),
         )
+
+    def _pseudonymize_user_name(self, user_name: UserName):
+        if self.lazy_pseudonymization:
+            return self.pseudonymizer.pseudonymize_user_name_lazily(user_name)
+        return self.pseudonymizer.pseudonymize_user_name(user_name)
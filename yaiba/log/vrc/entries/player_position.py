@@ -1,11 +1,16 @@
 import logging
+import math
 import re
+import time
+from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
 
-from yaiba.log.pseudonymizer import Pseudonymizer
-from yaiba.log.session_log import Entry, EntryParser
+from yaiba.log.pseudonymizer import Pseudonymizer, PseudoUserNameField
+from yaiba.log.session_log import DROPPED_ENTRY, Entry, EntryParser
+from yaiba.log.stats import Stats
 from yaiba.log.types import PseudoUserName, RawEntry, Timestamp, UserName, VRCPlayerId
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry, VRCPlayerLeftEntry
 from yaiba.log.vrc.utils import VRC_REGEX_LOG_PREFIX, create_timestamp_from_match
 
 logger = logging.getLogger(__name__)
@@ -46,7 +51,7 @@ class VRCYAIBAPlayerPositionEntry(Entry):
     player_id: VRCPlayerId
 
     user_name: Optional[UserName]
-    pseudo_user_name: PseudoUserName
+    pseudo_user_name: PseudoUserName = PseudoUserNameField()
 
     location_x: float
     location_y: Optional[float]
@@ -89,6 +94,57 @@ class VRCYAIBAPlayerPositionEntry(Entry):
         )
 
 
+class PositionSamplingPolicy(ABC):
+    """
+    Decides whether to keep a player position sample while parsing. Applied per player (user name); the first sample
+    of each player is always kept.
+    """
+
+    @abstractmethod
+    def should_keep(
+            self,
+            last_kept: VRCYAIBAPlayerPositionEntry,
+            timestamp: Timestamp,
+            get_location: Callable[[], Tuple[float, Optional[float], float]],
+    ) -> bool:
+        """
+        :param last_kept: The last kept sample of the player.
+        :param get_location: Returns (location_x, location_y, location_z) of the sample. location_y is None for v0.
+            Call only when needed, since it converts strings to floats.
+        """
+        pass
+
+
+@dataclass(frozen=True)
+class IntervalSamplingPolicy(PositionSamplingPolicy):
+    """
+    Keeps one sample per player every `interval_sec` seconds.
+    """
+    interval_sec: float
+
+    def should_keep(self, last_kept, timestamp, get_location) -> bool:
+        return (timestamp - last_kept.timestamp).total_seconds() >= self.interval_sec
+
+
+@dataclass(frozen=True)
+class DistanceSamplingPolicy(PositionSamplingPolicy):
+    """
+    Keeps a sample only when the player moved more than `min_distance` (meters) from the last kept sample.
+    """
+    min_distance: float
+
+    def should_keep(self, last_kept, timestamp, get_location) -> bool:
+        location_x, location_y, location_z = get_location()
+        distance_y = 0.0
+        if location_y is not None and last_kept.location_y is not None:
+            distance_y = location_y - last_kept.location_y
+        return math.hypot(
+            location_x - last_kept.location_x,
+            distance_y,
+            location_z - last_kept.location_z,
+        ) > self.min_distance
+
+
 class YAIBAPlayerPositionEntryParser(EntryParser):
     """
     Note: This parser may not work for some locales that uses a comma as a decimal point. 
@@ -117,9 +173,22 @@ class YAIBAPlayerPositionEntryParser(EntryParser):
         r'(?P<is_vr>[^,]*)'
     )
 
-    def __init__(self, pseudonymizer: Pseudonymizer):
+    def __init__(
+            self,
+            pseudonymizer: Pseudonymizer,
+            lazy_pseudonymization: bool = False,
+            sampling_policy: Optional[PositionSamplingPolicy] = None,
+            stats: Optional[Stats] = None,
+    ):
+        """
+        :param stats: Measures "position.regex" and "position.float" (conversion of fields) if not None.
+        """
         self.regex_entry_used = self.regex_entry_v0
         self.pseudonymizer = pseudonymizer
+        self.lazy_pseudonymization = lazy_pseudonymization
+        self.sampling_policy = sampling_policy
+        self.stats = stats
+        self.last_kept_entry_by_user_name: Dict[UserName, VRCYAIBAPlayerPositionEntry] = {}
 
     def parse(self, raw_log: RawEntry) -> Optional[Entry]:
         # Tries to parse as a position entry
@@ -136,6 +205,13 @@ class YAIBAPlayerPositionEntryParser(EntryParser):
                 logger.warning(f"unexpected version is applied: {version}. Fallback to latest one")
             return version
 
+    def observe(self, entry: Entry):
+        # A player who rejoins (even in another room) is sampled afresh
+        if isinstance(entry, VRCPlayerLeftEntry):
+            self.last_kept_entry_by_user_name.pop(entry.user_name, None)
+        elif isinstance(entry, VRCEnteringRoomEntry):
+            self.last_kept_entry_by_user_name.clear()
+
     def _try_to_parse_version(self, log_entry: RawEntry) -> Optional[VRCYAIBAPlayerPositionVersionEntry]:
         match = self.regex_version.match(log_entry)
         if match is None:
@@ -152,22 +228,35 @@ class YAIBAPlayerPositionEntryParser(EntryParser):
         )
 
     def _try_to_parse_entry(self, log_entry: RawEntry) -> Optional[VRCYAIBAPlayerPositionEntry]:
+        stats = self.stats
+        if stats is not None:
+            start = time.perf_counter()
         match = self.regex_entry_used.match(log_entry)
+        if stats is not None:
+            stats.add_time("position.regex", time.perf_counter() - start)
         if match is None:
             return None
 
         timestamp = create_timestamp_from_match(match)
-        player_id = VRCPlayerId(match.group('player_id'))
 
         user_name = match.group('user_name').replace('""', '"')  # Following CSV Escape
         user_name = UserName(user_name)
-        p_user_name = self.pseudonymizer.pseudonymize_user_name(user_name)
 
-        location_x = float(match.group('location_x'))
-        location_y = match.groupdict().get("location_y", None)  # missing in v0. Return None.
-        if location_y is not None:
-            location_y = float(location_y)
-        location_z = float(match.group('location_z'))
+        if self.sampling_policy is not None:
+            last_kept = self.last_kept_entry_by_user_name.get(user_name)
+            if last_kept is not None and not self.sampling_policy.should_keep(
+                    last_kept, timestamp, lambda: self._parse_location(match)):
+                return DROPPED_ENTRY
+
+        player_id = VRCPlayerId(match.group('player_id'))
+        if self.lazy_pseudonymization:
+            p_user_name = self.pseudonymizer.pseudonymize_user_name_lazily(user_name)
+        else:
+            p_user_name = self.pseudonymizer.pseudonymize_user_name(user_name)
+
+        if stats is not None:
+            start = time.perf_counter()
+        location_x, location_y, location_z = self._parse_location(match)
         rotation_1 = float(match.group('rotation_1'))
         rotation_2 = float(match.group('rotation_2'))
         rotation_3 = float(match.group('rotation_3'))
@@ -177,8 +266,10 @@ class YAIBAPlayerPositionEntryParser(EntryParser):
         velocity_z = float(match.group("velocity_z"))
 
         is_vr = match.group('is_vr').lower() == "true"
+        if stats is not None:
+            stats.add_time("position.float", time.perf_counter() - start)
 
-        return VRCYAIBAPlayerPositionEntry(
+        entry = VRCYAIBAPlayerPositionEntry(
             timestamp=timestamp,
             player_id=player_id,
 
@@ -199,3 +290,15 @@ class YAIBAPlayerPositionEntryParser(EntryParser):
 
             is_vr=is_vr,
         )
+        if self.sampling_policy is not None:
+            self.last_kept_entry_by_user_name[user_name] = entry
+        return entry
+
+    @staticmethod
+    def _parse_location(match: re.Match) -> Tuple[float, Optional[float], float]:
+        location_x = float(match.group('location_x'))
+        location_y = match.groupdict().get("location_y", None)  # missing in v0. Return None.
+        if location_y is not None:
+            location_y = float(location_y)
+        location_z = float(match.group('location_z'))
+        return location_x, location_y, location_z
@@ -57,6 +57,21 @@ class TestVRCPlayerJoinEntry:
             pseudo_user_name=PseudoUserName("pseudonymized E.HOBA"),
         )
 
+    def test__parse__lazy_pseudonymization(self):
+        pseudonymizer = new_pseudonymizer(return_value="pseudonymized E.HOBA")
+        parser = VRCBuiltinEntryParser(pseudonymizer, lazy_pseudonymization=True)
+
+        input = RawEntry('2022.03.04 21:50:22 Log        -  [Behaviour] OnPlayerJoined E.HOBA')
+        output = parser.parse(input)
+
+        assert pseudonymizer.pseudonymize_user_name.call_count == 0
+        assert isinstance(output.pseudo_user_name, PseudoUserName)
+        assert output == VRCPlayerJoinEntry(
+            timestamp=parse_timestamp('2022.03.04 21:50:22'),
+            user_name=UserName('E.HOBA'),
+            pseudo_user_name=PseudoUserName("pseudonymized E.HOBA"),
+        )
+
     def test__from_json(self):
         entry = VRCPlayerJoinEntry(
             timestamp=parse_timestamp('2022.03.04 21:50:22'),
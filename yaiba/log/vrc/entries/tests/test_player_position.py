@@ -1,9 +1,11 @@
 import pytest
 
+from yaiba.log.session_log import DROPPED_ENTRY
 from yaiba.log.test_utils import encode_and_then_decode, new_pseudonymizer
 from yaiba.log.types import PseudoUserName, RawEntry, UserName, VRCPlayerId
-from yaiba.log.vrc.entries.player_position import VRCYAIBAPlayerPositionEntry, VRCYAIBAPlayerPositionVersionEntry, \
-    YAIBAPlayerPositionEntryParser
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry, VRCPlayerLeftEntry
+from yaiba.log.vrc.entries.player_position import DistanceSamplingPolicy, IntervalSamplingPolicy, \
+    VRCYAIBAPlayerPositionEntry, VRCYAIBAPlayerPositionVersionEntry, YAIBAPlayerPositionEntryParser
 from yaiba.log.vrc.utils import parse_timestamp
 
 
@@ -160,3 +162,59 @@ class TestYAIBAPlayerPositionEntry:
         assert isinstance(entry.user_name, UserName)
         assert isinstance(entry.player_id, VRCPlayerId)
         assert isinstance(entry.pseudo_user_name, PseudoUserName)
+
+
+def _position_raw_entry(timestamp: str, user_name: str, location_x: float) -> RawEntry:
+    return RawEntry(
+        f'{timestamp} Log        -  [Player Position]13,"{user_name}",{location_x},1.637101,1.937101,230.3723,'
+        '-3.32147,-2.619154,-0.03742229,-0.007943284,0.0001138111,True'
+    )
+
+
+class TestPositionSamplingPolicy:
+    @staticmethod
+    def _new_parser(sampling_policy) -> YAIBAPlayerPositionEntryParser:
+        parser = YAIBAPlayerPositionEntryParser(new_pseudonymizer(), sampling_policy=sampling_policy)
+        parser.parse(RawEntry("2022.03.04 21:50:19 Log        -  [Player Position Version]1.0.0"))
+        return parser
+
+    def test__interval(self):
+        parser = self._new_parser(IntervalSamplingPolicy(interval_sec=10))
+
+        outputs = [
+            parser.parse(_position_raw_entry("2022.03.04 21:57:53", "E.HOBA", 0.0)),
+            parser.parse(_position_raw_entry("2022.03.04 21:57:53", "A.HOBA", 0.0)),
+            parser.parse(_position_raw_entry("2022.03.04 21:57:54", "E.HOBA", 1.0)),
+            parser.parse(_position_raw_entry("2022.03.04 21:58:02", "E.HOBA", 2.0)),
+            parser.parse(_position_raw_entry("2022.03.04 21:58:03", "E.HOBA", 3.0)),
+            parser.parse(_position_raw_entry("2022.03.04 21:58:03", "A.HOBA", 3.0)),
+        ]
+
+        assert [o is DROPPED_ENTRY for o in outputs] == [False, False, True, True, False, False]
+        assert outputs[4].location_x == 3.0
+
+    def test__distance(self):
+        parser = self._new_parser(DistanceSamplingPolicy(min_distance=1.0))
+
+        outputs = [
+            parser.parse(_position_raw_entry("2022.03.04 21:57:53", "E.HOBA", 0.0)),
+            parser.parse(_position_raw_entry("2022.03.04 21:57:54", "E.HOBA", 0.5)),
+            parser.parse(_position_raw_entry("2022.03.04 21:57:55", "E.HOBA", 1.5)),
+            parser.parse(_position_raw_entry("2022.03.04 21:57:56", "E.HOBA", 2.0)),
+        ]
+
+        assert [o is DROPPED_ENTRY for o in outputs] == [False, True, False, True]
+
+    def test__reset_on_leave_and_entering_room(self):
+        parser = self._new_parser(DistanceSamplingPolicy(min_distance=1.0))
+        timestamp = parse_timestamp("2022.03.04 21:57:54")
+
+        outputs = [parser.parse(_position_raw_entry("2022.03.04 21:57:53", "E.HOBA", 0.0))]
+        parser.observe(VRCPlayerLeftEntry(timestamp, user_name=UserName("E.HOBA"), pseudo_user_name=None))
+        # Rejoined at the same point
+        outputs.append(parser.parse(_position_raw_entry("2022.03.04 21:57:55", "E.HOBA", 0.0)))
+        parser.observe(VRCEnteringRoomEntry(timestamp, room_name="SecondRoom"))
+        outputs.append(parser.parse(_position_raw_entry("2022.03.04 21:57:56", "E.HOBA", 0.0)))
+        outputs.append(parser.parse(_position_raw_entry("2022.03.04 21:57:57", "E.HOBA", 0.0)))
+
+        assert [o is DROPPED_ENTRY for o in outputs] == [False, False, False, True]
@@ -1,7 +1,12 @@
+import json
+from unittest.mock import patch
+
+from yaiba.log import JsonDecoder, JsonEncoder, SessionLog
 from yaiba.log.test_utils import encode_and_then_decode
 from yaiba.log.types import RawEntry, VRCPlayerId
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry
 from yaiba.log.vrc.entries.yodokoro_tag_marker import TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY, VRCYodokoroTagMarkerEntry, \
-    YodokoroTagMarkerEntryParser
+    YodokoroTagMarkerEntryParser, expand_tag_bits
 from yaiba.log.vrc.utils import parse_timestamp
 
 
@@ -116,3 +121,111 @@ class TestYodokoroTagMarkerEntry:
         output = encode_and_then_decode(entry)
         assert output == entry
         assert all(isinstance(k, VRCPlayerId) for k in output.tag_names_for_player_id.keys())
+
+    def test__parse__tag_bits(self):
+        parser = YodokoroTagMarkerEntryParser(tag_names=TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY)
+        output = parser.parse(RawEntry(
+            "2022.03.05 00:31:57 Log        -  [Yodo][Dump][0,-1,00000000],[1,9,00000008],[2,10,0000000a],"
+        ))
+
+        assert output.tag_bits_for_player_id == {9: 0x8, 10: 0xa}
+        assert output.tag_names_for_player_id == {9: ['物理学'], 10: ['電気系工学', '物理学']}
+
+    def test__parse__changes_only(self):
+        parser = YodokoroTagMarkerEntryParser(tag_names=TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY, changes_only=True)
+
+        outputs = [
+            parser.parse(RawEntry(
+                "2022.03.05 00:31:57 Log        -  [Yodo][Dump][0,-1,00000000],[1,9,00000008],[2,10,00000008],")),
+            parser.parse(RawEntry(
+                "2022.03.05 00:32:07 Log        -  [Yodo][Dump][0,-1,00000000],[1,9,00000008],[2,10,00000001],")),
+            parser.parse(RawEntry(
+                "2022.03.05 00:32:17 Log        -  [Yodo][Dump][0,11,00000002],[1,9,00000008],[2,-1,00000000],")),
+        ]
+
+        assert [o.tag_bits_for_player_id for o in outputs] == [
+            {9: 0x8, 10: 0x8},
+            {10: 0x1},
+            {11: 0x2, 10: None},
+        ]
+        assert outputs[2].tag_names_for_player_id == {11: ['電気系工学'], 10: None}
+
+        tag_bits = {}
+        for output in outputs:
+            tag_bits = output.update_tag_bits(tag_bits)
+        assert tag_bits == {9: 0x8, 11: 0x2}
+
+    def test__parse__changes_only__reset_on_entering_room(self):
+        parser = YodokoroTagMarkerEntryParser(tag_names=TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY, changes_only=True)
+        raw_entry = "2022.03.05 00:31:57 Log        -  [Yodo][Dump][0,9,00000008],[1,10,00000008],"
+
+        parser.parse(RawEntry(raw_entry))
+        parser.observe(VRCEnteringRoomEntry(parse_timestamp("2022.03.05 00:32:00"), room_name="SecondRoom"))
+        output = parser.parse(RawEntry(raw_entry))
+
+        # Same player ids in another instance are different players
+        assert output.tag_bits_for_player_id == {9: 0x8, 10: 0x8}
+
+    def test__get_tag_bits_for_player_id__from_tag_names(self):
+        entry = VRCYodokoroTagMarkerEntry(
+            timestamp=parse_timestamp("2022.03.05 00:31:57"),
+            tag_names_for_player_id={8: [], 9: ['物理学', '化学']},
+        )
+
+        assert entry.get_tag_bits_for_player_id() == {8: 0, 9: 0b11000}
+
+    def test__from_json__tag_bits(self):
+        entries = [
+            VRCYodokoroTagMarkerEntry(
+                timestamp=parse_timestamp(timestamp),
+                tag_bits_for_player_id={VRCPlayerId(9): 0x8, VRCPlayerId(10): None},
+                tag_names=TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY,
+                changes_only=True,
+            )
+            for timestamp in ["2022.03.05 00:31:57", "2022.03.05 00:32:07"]
+        ]
+        options = JsonEncoder.Options.export_all()
+        options.compact_yodokoro_tags = True
+
+        encoded = JsonEncoder(options).encode(SessionLog(log_entries=entries))
+        outputs = JsonDecoder().decode(encoded).log_entries
+
+        # Tag names are stored once
+        assert encoded.count('"tag_names"') == 1
+        assert outputs == entries
+        assert [o.tag_bits_for_player_id for o in outputs] == [e.tag_bits_for_player_id for e in entries]
+        assert outputs[1].tag_names == TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY
+        assert all(isinstance(k, VRCPlayerId) for k in outputs[0].tag_bits_for_player_id.keys())
+
+    def test__to_json__tag_names_by_default(self):
+        entry = VRCYodokoroTagMarkerEntry(
+            timestamp=parse_timestamp("2022.03.05 00:31:57"),
+            tag_bits_for_player_id={VRCPlayerId(9): 0x8},
+            tag_names=TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY,
+        )
+
+        encoded = json.loads(JsonEncoder.export_all().encode(SessionLog(log_entries=[entry])))
+
+        # Same as older versions
+        assert encoded["log_entries"][0] == {
+            "timestamp": entry.timestamp.timestamp(),
+            "tag_names_for_player_id": {"9": ['物理学']},
+            "type_id": "yodokoro/tag_marker",
+        }
+
+    def test__tag_names_for_player_id__expanded_once(self):
+        entry = VRCYodokoroTagMarkerEntry(
+            timestamp=parse_timestamp("2022.03.05 00:31:57"),
+            tag_bits_for_player_id={VRCPlayerId(9): 0x8},
+            tag_names=TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY,
+        )
+
+        with patch("yaiba.log.vrc.entries.yodokoro_tag_marker.expand_tag_bits", wraps=expand_tag_bits) as expand:
+            assert entry.tag_names_for_player_id == {9: ['物理学']}
+            assert entry.tag_names_for_player_id == {9: ['物理学']}
+
+        assert expand.call_count == 1
+
+    def test__expand_tag_bits(self):
+        assert expand_tag_bits(0b101, ["a", "b", "c"]) == ["a", "c"]
+        assert expand_tag_bits(0b1001, ["a", "b", "c"]) == ["a", None]
@@ -4,13 +4,13 @@ Parse log entries outputted by "ヨドコロちゃんのタグマーカー" (htt
 See https://booth.pm/ja/items/3109716 for detailed format of the log entry. 
 """
 
-import itertools
 import re
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
 from yaiba.log.session_log import Entry, EntryParser
 from yaiba.log.types import RawEntry, Timestamp, VRCPlayerId
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry
 from yaiba.log.vrc.utils import VRC_REGEX_LOG_PREFIX, create_timestamp_from_match
 
 TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY = [
@@ -39,10 +39,103 @@ TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY = [
 ]
 
 
-@dataclass
+class _TagNamesField:
+    """
+    Descriptor of `VRCYodokoroTagMarkerEntry.tag_names_for_player_id`. Expands tag bits to tag names on the first read,
+    and keeps them, unless tag names are given directly.
+    """
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            # Default value for dataclass
+            return None
+        tag_names_for_player_id = obj.__dict__[self.name]
+        if tag_names_for_player_id is None and obj.tag_bits_for_player_id is not None:
+            tag_names_for_player_id = {
+                player_id: expand_tag_bits(tag_bits, obj.tag_names) if tag_bits is not None else None
+                for player_id, tag_bits in obj.tag_bits_for_player_id.items()
+            }
+            obj.__dict__[self.name] = tag_names_for_player_id
+        return tag_names_for_player_id
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+
+
+@dataclass(eq=False)
 class VRCYodokoroTagMarkerEntry(Entry):
+    """
+    Tags of players are stored as either of:
+
+    * `tag_bits_for_player_id` with `tag_names`: Raw bitmask per player, as parsed. `tag_names_for_player_id` is
+      expanded from it on the first read. Stored as is in json only with `JsonEncoder.Options.compact_yodokoro_tags`.
+    * `tag_names_for_player_id`: Tag names per player (ex. json files saved by older versions).
+
+    If `changes_only` is True, only players whose tags changed since the previous dump in the same room are stored, and
+    players who disappeared from the dump map to None. Use `update_tag_bits` to get tags of all players, starting from
+    `{}` again after each `VRCEnteringRoomEntry`.
+    """
     timestamp: Timestamp
-    tag_names_for_player_id: Dict[VRCPlayerId, List[str]]
+    tag_names_for_player_id: Optional[Dict[VRCPlayerId, Optional[List[str]]]] = _TagNamesField()
+    tag_bits_for_player_id: Optional[Dict[VRCPlayerId, Optional[int]]] = None
+    tag_names: Optional[List[str]] = None
+    changes_only: bool = False
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (
+                self.timestamp == other.timestamp and
+                self.tag_names_for_player_id == other.tag_names_for_player_id and
+                self.changes_only == other.changes_only
+        )
+
+    def get_tag_bits_for_player_id(
+            self,
+            tag_names: Optional[List[str]] = None,
+    ) -> Dict[VRCPlayerId, Optional[int]]:
+        """
+        :param tag_names: Used to convert tag names to bits, only when the entry has tag names instead of bits.
+            Unknown tag names are ignored. Default: `TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY`.
+        """
+        if self.tag_bits_for_player_id is not None:
+            return self.tag_bits_for_player_id
+        if tag_names is None:
+            tag_names = TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY
+        bit_for_tag_name = {
+            tag_name: 1 << i
+            for i, tag_name in enumerate(tag_names)
+        }
+        return {
+            player_id: sum(bit_for_tag_name.get(n, 0) for n in set(names)) if names is not None else None
+            for player_id, names in self.tag_names_for_player_id.items()
+        }
+
+    def update_tag_bits(
+            self,
+            tag_bits_for_player_id: Dict[VRCPlayerId, int],
+            tag_names: Optional[List[str]] = None,
+    ) -> Dict[VRCPlayerId, int]:
+        """
+        Returns tag bits of all players after this dump.
+
+        :param tag_bits_for_player_id: Tag bits of all players after the previous dump, or `{}` for the first dump
+            after a `VRCEnteringRoomEntry`. Not modified.
+        :param tag_names: See `get_tag_bits_for_player_id`.
+        """
+        tag_bits = self.get_tag_bits_for_player_id(tag_names)
+        if not self.changes_only:
+            return dict(tag_bits)
+        updated = dict(tag_bits_for_player_id)
+        for player_id, bits in tag_bits.items():
+            if bits is None:
+                updated.pop(player_id, None)
+            else:
+                updated[player_id] = bits
+        return updated
 
     @classmethod
     def type_id(cls):
@@ -50,22 +143,44 @@ class VRCYodokoroTagMarkerEntry(Entry):
 
     @classmethod
     def from_json(cls, value: Dict[str, Any]) -> Entry:
-        tag_names_for_player_id = value.get('tag_names_for_player_id')
-        if isinstance(tag_names_for_player_id, dict):
-            tag_names_for_player_id = {
-                VRCPlayerId(k): v
-                for k, v in
-                tag_names_for_player_id.items()
-            }
         return cls(
             timestamp=Timestamp.from_json(value.get('timestamp')),
-            tag_names_for_player_id=tag_names_for_player_id,
+            tag_names_for_player_id=_player_id_keys(value.get('tag_names_for_player_id')),
+            tag_bits_for_player_id=_player_id_keys(value.get('tag_bits_for_player_id')),
+            tag_names=value.get('tag_names'),
+            changes_only=value.get('changes_only', False),
         )
 
 
+def _player_id_keys(value: Optional[Dict[str, Any]]) -> Optional[Dict[VRCPlayerId, Any]]:
+    if not isinstance(value, dict):
+        return value
+    return {
+        VRCPlayerId(k): v
+        for k, v in value.items()
+    }
+
+
+def expand_tag_bits(tag_bits: int, tag_names: List[str]) -> List[str]:
+    """
+    Tag names of set bits, from the lowest bit. A set bit without a name is expanded to None.
+    """
+    names = []
+    i = 0
+    while tag_bits:
+        if tag_bits & 1:
+            names.append(tag_names[i] if i < len(tag_names) else None)
+        tag_bits >>= 1
+        i += 1
+    return names
+
+
 class YodokoroTagMarkerEntryParser(EntryParser):
     """
     See https://booth.pm/ja/items/3109716 for detailed format of the log entry.
+
+    Tags are stored as bitmasks (see `VRCYodokoroTagMarkerEntry`). If `changes_only` is True, each entry only stores
+    players whose tags changed since the previous dump.
     """
 
     regex_pattern = re.compile(
@@ -73,10 +188,12 @@ class YodokoroTagMarkerEntryParser(EntryParser):
         r'\[Yodo]\[Dump](?P<tags_for_all_players>.+)'
     )
 
-    regex_one_tag = re.compile(r'\[(?P<index>\d+),(?P<player_id>\d+),(?P<tags_hex>\d+)],')
+    regex_one_tag = re.compile(r'\[(?P<index>\d+),(?P<player_id>\d+),(?P<tags_hex>[0-9A-Fa-f]+)],')
 
-    def __init__(self, tag_names: List[str]):
+    def __init__(self, tag_names: List[str], changes_only: bool = False):
         self.tag_names = tag_names
+        self.changes_only = changes_only
+        self.last_tag_bits_for_player_id: Dict[VRCPlayerId, int] = {}
 
     def parse(self, raw_log: RawEntry) -> Optional[Entry]:
         match = self.regex_pattern.match(raw_log)
@@ -84,14 +201,26 @@ class YodokoroTagMarkerEntryParser(EntryParser):
             return None
 
         timestamp = create_timestamp_from_match(match)
-        tag_names_for_player_id = self._parse_tags_for_all_players(match.group("tags_for_all_players"))
+        tag_bits_for_player_id = self._parse_tags_for_all_players(match.group("tags_for_all_players"))
+
+        if self.changes_only:
+            all_tag_bits_for_player_id = tag_bits_for_player_id
+            tag_bits_for_player_id = self._diff(self.last_tag_bits_for_player_id, all_tag_bits_for_player_id)
+            self.last_tag_bits_for_player_id = all_tag_bits_for_player_id
 
         return VRCYodokoroTagMarkerEntry(
             timestamp=timestamp,
-            tag_names_for_player_id=tag_names_for_player_id,
+            tag_bits_for_player_id=tag_bits_for_player_id,
+            tag_names=self.tag_names,
+            changes_only=self.changes_only,
         )
 
-    def _parse_tags_for_all_players(self, value: str) -> Dict[VRCPlayerId, List[str]]:
+    def observe(self, entry: Entry):
+        # Player ids restart per instance, so the first dump in a room is not diffed against the previous room
+        if self.changes_only and isinstance(entry, VRCEnteringRoomEntry):
+            self.last_tag_bits_for_player_id = {}
+
+    def _parse_tags_for_all_players(self, value: str) -> Dict[VRCPlayerId, int]:
         """
         :param value: Ex. "[0,00000030],[1,00000030],[2,00000030],...[81,00000030]," 
         :return: parsed value.
@@ -101,14 +230,20 @@ class YodokoroTagMarkerEntryParser(EntryParser):
             player_id = VRCPlayerId(match.group('player_id'))
             if player_id == -1:
                 continue
-            tags = self._parse_tags(match.group('tags_hex'))
-            tags_for_player_id[player_id] = tags
+            tags_for_player_id[player_id] = int(match.group('tags_hex'), 16)
         return tags_for_player_id
 
-    def _parse_tags(self, tags_hex: str) -> List[str]:
-        tags_bin = bin(int(tags_hex, 16))[2:]  # to drop "0b"
-        return [
-            tag_name
-            for tag_name, has_tag in itertools.zip_longest(self.tag_names, reversed(tags_bin))
-            if has_tag == '1'
-        ]
+    @staticmethod
+    def _diff(
+            last: Dict[VRCPlayerId, int],
+            current: Dict[VRCPlayerId, int],
+    ) -> Dict[VRCPlayerId, Optional[int]]:
+        diff: Dict[VRCPlayerId, Optional[int]] = {
+            player_id: tag_bits
+            for player_id, tag_bits in current.items()
+            if last.get(player_id) != tag_bits
+        }
+        for player_id in last.keys():
+            if player_id not in current:
+                diff[player_id] = None
+        return diff
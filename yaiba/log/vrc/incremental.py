@@ -0,0 +1,60 @@
+"""
+Incremental parsing of a VRChat log which is still being written.
+"""
+from __future__ import annotations
+
+import typing
+from typing import List, Optional
+
+from yaiba.log.session_log import Entry, SessionLog
+from yaiba.log.vrc.parser import VRC_TIMESTAMP_REGEX, VRCLogParser
+
+ENCODING = "utf-8"
+
+
+class IncrementalVRCLogParser:
+    """
+    Parses only the bytes appended to a log file since the previous call, keeping the state of the parser (ex. the
+    player position version) between calls.
+
+    A log entry may span several lines, so the last entry of the appended bytes is held back until the next entry
+    starts, or until `final` is set (ex. when the file has stopped growing). Incomplete lines are never parsed.
+    """
+
+    def __init__(self, config: Optional[VRCLogParser.Config] = None):
+        self.parser = VRCLogParser(config)
+        self.session_log = SessionLog([])
+        # Bytes of the file which have been parsed
+        self.offset = 0
+
+    def feed(self, fp: typing.BinaryIO, final: bool = False) -> List[Entry]:
+        """
+        :param fp: The log file, opened in binary mode. Read from `self.offset`.
+        :return: New entries, which are also appended to `self.session_log`.
+        """
+        fp.seek(self.offset)
+        appended = fp.read()
+        end = appended.rfind(b"\n") + 1  # 0 if there is no complete line
+        if not final:
+            end = self._start_of_last_entry(appended, end)
+        if end == 0:
+            return []
+
+        text = appended[:end].decode(ENCODING, errors="replace")
+        entries = self.parser.parse(text).log_entries
+        self.session_log.log_entries += entries
+        self.offset += end
+        return entries
+
+    @classmethod
+    def _start_of_last_entry(cls, appended: bytes, end: int) -> int:
+        """
+        The offset of the last line starting with a timestamp in `appended[:end]`, or 0.
+        """
+        line_end = end
+        while line_end > 0:
+            line_start = appended.rfind(b"\n", 0, line_end - 1) + 1
+            if VRC_TIMESTAMP_REGEX.match(appended[line_start:line_end].decode(ENCODING, errors="replace")):
+                return line_start
+            line_end = line_start
+        return 0
@@ -2,15 +2,17 @@ from __future__ import annotations
 
 import io
 import re
+import time
 import typing
 from dataclasses import dataclass, field
 from typing import List, Optional
 
 from yaiba.log.pseudonymizer import Pseudonymizer
-from yaiba.log.session_log import Entry, EntryParser, SessionLog
+from yaiba.log.session_log import DROPPED_ENTRY, Entry, EntryParser, SessionLog
+from yaiba.log.stats import Stats
 from yaiba.log.types import RawEntry
 from yaiba.log.vrc.entries.builtin import VRCBuiltinEntryParser
-from yaiba.log.vrc.entries.player_position import YAIBAPlayerPositionEntryParser
+from yaiba.log.vrc.entries.player_position import PositionSamplingPolicy, YAIBAPlayerPositionEntryParser
 from yaiba.log.vrc.entries.questionnaire import YAIBAQuestionnaireAnswerEntryParser
 from yaiba.log.vrc.entries.yodokoro_tag_marker import TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY, YodokoroTagMarkerEntryParser
 
@@ -30,10 +32,32 @@ class VRCLogParser:
         yodokoro_tag_marker_names: List[str] = field(
             default_factory=lambda: TAG_NAMES_USED_IN_SCIENCE_ASSEMBLY,
         )
+
+        """
+        If True, each Yodokoro tag marker entry only stores players whose tags changed since the previous dump.
+
+        This field is ignored when parser_list is not none.
+        """
+        yodokoro_tag_marker_changes_only: bool = False
         pseudonymizer: Pseudonymizer = field(
             default_factory=lambda: Pseudonymizer.new_random(),
         )
 
+        """
+        If True, `pseudo_user_name` of entries is computed when it is read (or serialized) first time.
+
+        This field is ignored when parser_list is not none.
+        """
+        lazy_pseudonymization: bool = False
+
+        """
+        Downsamples player positions per player while parsing (ex. `IntervalSamplingPolicy(10)`). If None, all samples
+        are kept.
+
+        This field is ignored when parser_list is not none.
+        """
+        position_sampling_policy: Optional[PositionSamplingPolicy] = None
+
         """
         The list of parsers. Should be ordered by the frequency of its entry for better performance.
 
@@ -41,6 +65,12 @@ class VRCLogParser:
         """
         parsers: Optional[List[EntryParser]] = field(default=None)
 
+        """
+        Collects counters and stage timings while parsing (ex. `Stats(hook=print)`). If None, nothing is measured.
+        Also set to `pseudonymizer.stats` unless it has its own.
+        """
+        stats: Optional[Stats] = None
+
         @classmethod
         def default(cls) -> VRCLogParser.Config:
             return VRCLogParser.Config()
@@ -51,18 +81,29 @@ class VRCLogParser:
     ):
         if config is None:
             config = VRCLogParser.Config.default()
+        self.stats = config.stats
+        if config.stats is not None and config.pseudonymizer.stats is None:
+            config.pseudonymizer.stats = config.stats
         if config.parsers is not None:
             self.parsers = config.parsers
-            return
         else:
             self.parsers = self._create_default_parsers(config)
+        self.observers = [
+            parser for parser in self.parsers
+            if type(parser).observe is not EntryParser.observe
+        ]
 
     @classmethod
     def _create_default_parsers(cls, config: Config):
         return [
-            YAIBAPlayerPositionEntryParser(config.pseudonymizer),
-            YodokoroTagMarkerEntryParser(config.yodokoro_tag_marker_names),
-            VRCBuiltinEntryParser(config.pseudonymizer),
+            YAIBAPlayerPositionEntryParser(
+                config.pseudonymizer,
+                config.lazy_pseudonymization,
+                config.position_sampling_policy,
+                config.stats,
+            ),
+            YodokoroTagMarkerEntryParser(config.yodokoro_tag_marker_names, config.yodokoro_tag_marker_changes_only),
+            VRCBuiltinEntryParser(config.pseudonymizer, config.lazy_pseudonymization),
             YAIBAQuestionnaireAnswerEntryParser(),
         ]
 
@@ -70,21 +111,81 @@ class VRCLogParser:
         return self.parse_file(io.StringIO(value))
 
     def parse_file(self, fp: typing.TextIO) -> SessionLog:
+        raw_entries = _iter_per_vrc_log_entry(fp)
+        parsers = self.parsers
+        if self.stats is not None:
+            raw_entries = _timed_raw_entries(raw_entries, self.stats)
+            parsers = [_TimedEntryParser(parser, self.stats) for parser in parsers]
+            parsers.append(_UnmatchedEntryCounter(self.stats))
+
         log_entries: List[Entry] = []
-        for raw_entry_str in _iter_per_vrc_log_entry(fp):
-            entry = self._parse_one_entry(RawEntry(raw_entry_str))
+        for raw_entry_str in raw_entries:
+            entry = self._parse_one_entry(RawEntry(raw_entry_str), parsers)
             if entry is not None:
                 log_entries.append(entry)
+                for observer in self.observers:
+                    observer.observe(entry)
         return SessionLog(log_entries)
 
-    def _parse_one_entry(self, raw_entry: RawEntry) -> Optional[Entry]:
-        for parser in self.parsers:
+    def _parse_one_entry(self, raw_entry: RawEntry, parsers: List[EntryParser]) -> Optional[Entry]:
+        for parser in parsers:
             entry = parser.parse(raw_entry)
+            if entry is DROPPED_ENTRY:
+                return None
             if entry is not None:
                 return entry
         return None
 
 
+class _TimedEntryParser(EntryParser):
+    """
+    Measures "parse.<parser class>", and counts "entries.<type id>" and "parser.dropped".
+    """
+
+    def __init__(self, parser: EntryParser, stats: Stats):
+        self.parser = parser
+        self.stats = stats
+        self.timing_name = f"parse.{type(parser).__name__}"
+
+    def parse(self, raw_log: RawEntry) -> Optional[Entry]:
+        start = time.perf_counter()
+        entry = self.parser.parse(raw_log)
+        self.stats.add_time(self.timing_name, time.perf_counter() - start)
+        if entry is DROPPED_ENTRY:
+            self.stats.count("parser.dropped")
+        elif entry is not None:
+            self.stats.count(f"entries.{entry.type_id()}")
+        return entry
+
+
+class _UnmatchedEntryCounter(EntryParser):
+    """
+    Placed after all parsers, counts "parser.unmatched".
+    """
+
+    def __init__(self, stats: Stats):
+        self.stats = stats
+
+    def parse(self, raw_log: RawEntry) -> Optional[Entry]:
+        self.stats.count("parser.unmatched")
+        return None
+
+
+def _timed_raw_entries(raw_entries: typing.Iterator[str], stats: Stats) -> typing.Iterator[str]:
+    """
+    Measures "parser.read" (line splitting), and counts "parser.raw_entries" and "parser.lines".
+    """
+    while True:
+        start = time.perf_counter()
+        raw_entry_str = next(raw_entries, None)
+        stats.add_time("parser.read", time.perf_counter() - start)
+        if raw_entry_str is None:
+            return
+        stats.count("parser.raw_entries")
+        stats.count("parser.lines", raw_entry_str.count("\n") + 1)
+        yield raw_entry_str
+
+
 def _iter_per_vrc_log_entry(fp: typing.TextIO):
     """
     VRC log entries are separated by two empty lines.
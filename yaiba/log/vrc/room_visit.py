@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List
+
+from yaiba.log.session_log import Entry, SessionLog
+from yaiba.log.types import Timestamp
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry
+
+
+@dataclass(repr=False)
+class RoomVisit:
+    """
+    Log entries from a `VRCEnteringRoomEntry` until the next one.
+    """
+    room_name: str
+    timestamp: Timestamp
+
+    """
+    Starts with the `VRCEnteringRoomEntry`.
+    """
+    log_entries: List[Entry]
+
+    def __repr__(self):
+        return (f'RoomVisit(room_name={self.room_name!r}, timestamp={self.timestamp.isoformat()}, '
+                f'log_entries=[{len(self.log_entries)} entries])')
+
+    @classmethod
+    def split(cls, session_log: SessionLog) -> List[RoomVisit]:
+        """
+        Splits log entries per room visit. Entries before the first `VRCEnteringRoomEntry` are ignored.
+        """
+        room_visits: List[RoomVisit] = []
+        start = None
+        for idx, entry in enumerate(session_log.log_entries):
+            if not isinstance(entry, VRCEnteringRoomEntry):
+                continue
+            if start is not None:
+                room_visits.append(cls._from_slice(session_log, start, idx))
+            start = idx
+        if start is not None:
+            room_visits.append(cls._from_slice(session_log, start, len(session_log.log_entries)))
+        return room_visits
+
+    @classmethod
+    def _from_slice(cls, session_log: SessionLog, start: int, end: int) -> RoomVisit:
+        entering: VRCEnteringRoomEntry = session_log.log_entries[start]
+        return cls(
+            room_name=entering.room_name,
+            timestamp=entering.timestamp,
+            log_entries=session_log.log_entries[start:end],
+        )
@@ -0,0 +1,58 @@
+import io
+
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry, VRCPlayerJoinEntry, VRCPlayerLeftEntry
+from yaiba.log.vrc.entries.player_position import VRCYAIBAPlayerPositionEntry, \
+    VRCYAIBAPlayerPositionVersionEntry
+from yaiba.log.vrc.incremental import IncrementalVRCLogParser
+
+LINES = [
+    '2022.03.04 21:50:19 Log        -  [Behaviour] Entering Room: FirstRoom',
+    '2022.03.04 21:50:22 Log        -  [Behaviour] OnPlayerJoined E.HOBA',
+    '2022.03.04 21:50:23 Log        -  [Player Position Version]1.0.0',
+    '2022.03.04 21:50:31 Log        -  [Player Position]13,"E.HOBA",-6.329126,-0.3207326,-0.3207326,272.0943,'
+    '-0.009579957,-0.01711023,0.0004068119,-0.06890159,-0.007717842,True',
+    '2022.03.05 03:13:50 Log        -  [Behaviour] OnPlayerLeft E.HOBA',
+]
+LOG = ('\n'.join(LINES) + '\n').encode("utf-8")
+
+
+class TestIncrementalVRCLogParser:
+    def test__feed(self):
+        parser = IncrementalVRCLogParser()
+
+        # The last entry is held back until the next one starts
+        entries = parser.feed(io.BytesIO(LOG[:len(LINES[0]) + 10]))
+        assert entries == []
+        assert parser.offset == 0
+
+        entries = parser.feed(io.BytesIO(LOG[:len(LINES[0]) + len(LINES[1]) + 10]))
+        assert [type(e) for e in entries] == [VRCEnteringRoomEntry]
+
+        entries = parser.feed(io.BytesIO(LOG))
+        assert [type(e) for e in entries] == [
+            VRCPlayerJoinEntry, VRCYAIBAPlayerPositionVersionEntry, VRCYAIBAPlayerPositionEntry]
+
+        entries = parser.feed(io.BytesIO(LOG), final=True)
+        assert [type(e) for e in entries] == [VRCPlayerLeftEntry]
+        assert parser.offset == len(LOG)
+        assert len(parser.session_log.log_entries) == 5
+
+        assert parser.feed(io.BytesIO(LOG), final=True) == []
+
+    def test__feed__keeps_parser_state(self):
+        parser = IncrementalVRCLogParser()
+        position_start = LOG.index(LINES[3].encode("utf-8"))
+
+        parser.feed(io.BytesIO(LOG[:position_start]), final=True)
+        entries = parser.feed(io.BytesIO(LOG), final=True)
+
+        # Parsed as a v1.0.0 position, from the version entry of the previous call
+        assert entries[0].velocity_x is not None
+
+    def test__feed__incomplete_line(self):
+        parser = IncrementalVRCLogParser()
+
+        entries = parser.feed(io.BytesIO(LOG[:len(LINES[0]) - 5]), final=True)
+
+        assert entries == []
+        assert parser.offset == 0
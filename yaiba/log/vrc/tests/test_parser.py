@@ -1,7 +1,8 @@
 import io
 
 from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry, VRCPlayerJoinEntry, VRCPlayerLeftEntry
-from yaiba.log.vrc.entries.player_position import VRCYAIBAPlayerPositionEntry, VRCYAIBAPlayerPositionVersionEntry
+from yaiba.log.vrc.entries.player_position import IntervalSamplingPolicy, VRCYAIBAPlayerPositionEntry, \
+    VRCYAIBAPlayerPositionVersionEntry
 from yaiba.log.vrc.parser import VRCLogParser, _iter_per_vrc_log_entry
 
 
@@ -48,6 +49,62 @@ class TestVRCLogParser():
         assert isinstance(session_log.log_entries[6], VRCEnteringRoomEntry)
         assert len(session_log.log_entries) == 7
 
+    def test__position_sampling_policy(self):
+        input_data = '\n'.join([
+            '2022.03.04 21:50:19 Log      -  [Behaviour] Entering Room: FirstRoom',
+            "2022.03.04 21:50:23 Log        -  [Player Position Version]1.0.0",
+            '2022.03.04 21:50:31 Log        -  [Player Position]13,"E.HOBA",-6.329126,-0.3207326,-0.3207326,272.0943,'
+            '-0.009579957,-0.01711023,0.0004068119,-0.06890159,-0.007717842,True',
+            # dropped
+            '2022.03.04 21:50:32 Log        -  [Player Position]13,"E.HOBA",-6.336999,-0.3212091,-0.3212091,291.8254,'
+            '-0.01143897,0.03140759,0.0004068119,-0.06890159,-0.007717842,True',
+            '2022.03.04 21:50:41 Log        -  [Player Position]13,"E.HOBA",-6.336999,-0.3212091,-0.3212091,291.8254,'
+            '-0.01143897,0.03140759,0.0004068119,-0.06890159,-0.007717842,True',
+            '2022.03.05 03:13:50 Log        -  [Behaviour] OnPlayerLeft E.HOBA',
+        ])
+        config = VRCLogParser.Config(position_sampling_policy=IntervalSamplingPolicy(interval_sec=10))
+        parser = VRCLogParser(config)
+
+        session_log = parser.parse(input_data)
+
+        assert [type(e) for e in session_log.log_entries] == [
+            VRCEnteringRoomEntry,
+            VRCYAIBAPlayerPositionVersionEntry,
+            VRCYAIBAPlayerPositionEntry,
+            VRCYAIBAPlayerPositionEntry,
+            VRCPlayerLeftEntry,
+        ]
+
+    def test__position_sampling_policy__rejoin(self):
+        position = ('[Player Position]13,"E.HOBA",-6.329126,-0.3207326,-0.3207326,272.0943,'
+                    '-0.009579957,-0.01711023,0.0004068119,-0.06890159,-0.007717842,True')
+        input_data = '\n'.join([
+            '2022.03.04 21:50:19 Log      -  [Behaviour] Entering Room: FirstRoom',
+            "2022.03.04 21:50:23 Log        -  [Player Position Version]1.0.0",
+            f'2022.03.04 21:50:31 Log        -  {position}',
+            '2022.03.04 21:50:32 Log        -  [Behaviour] OnPlayerLeft E.HOBA',
+            # kept although within the interval, since the player rejoined
+            f'2022.03.04 21:50:33 Log        -  {position}',
+            '2022.03.04 21:50:34 Log      -  [Behaviour] Entering Room: SecondRoom',
+            f'2022.03.04 21:50:35 Log        -  {position}',
+            # dropped
+            f'2022.03.04 21:50:36 Log        -  {position}',
+        ])
+        config = VRCLogParser.Config(position_sampling_policy=IntervalSamplingPolicy(interval_sec=10))
+        parser = VRCLogParser(config)
+
+        session_log = parser.parse(input_data)
+
+        assert [type(e) for e in session_log.log_entries] == [
+            VRCEnteringRoomEntry,
+            VRCYAIBAPlayerPositionVersionEntry,
+            VRCYAIBAPlayerPositionEntry,
+            VRCPlayerLeftEntry,
+            VRCYAIBAPlayerPositionEntry,
+            VRCEnteringRoomEntry,
+            VRCYAIBAPlayerPositionEntry,
+        ]
+
     def test__splitter(self):
         input_data = '\n'.join([
             # entity 1
@@ -0,0 +1,27 @@
+from yaiba.log.session_log import SessionLog
+from yaiba.log.types import PseudoUserName, UserName
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry, VRCPlayerJoinEntry
+from yaiba.log.vrc.room_visit import RoomVisit
+from yaiba.log.vrc.utils import parse_timestamp
+
+
+class TestRoomVisit:
+    def test__split(self):
+        join = VRCPlayerJoinEntry(
+            timestamp=parse_timestamp("2022.03.04 21:50:22"),
+            user_name=UserName("E.HOBA"),
+            pseudo_user_name=PseudoUserName("pseudo E.HOBA"),
+        )
+        first_room = VRCEnteringRoomEntry(timestamp=parse_timestamp("2022.03.04 21:50:20"), room_name="FirstRoom")
+        second_room = VRCEnteringRoomEntry(timestamp=parse_timestamp("2022.03.04 22:50:20"), room_name="SecondRoom")
+        session_log = SessionLog(log_entries=[join, first_room, join, join, second_room])
+
+        room_visits = RoomVisit.split(session_log)
+
+        assert [v.room_name for v in room_visits] == ["FirstRoom", "SecondRoom"]
+        assert room_visits[0].timestamp == first_room.timestamp
+        assert room_visits[0].log_entries == [first_room, join, join]
+        assert room_visits[1].log_entries == [second_room]
+
+    def test__split__no_room(self):
+        assert RoomVisit.split(SessionLog(log_entries=[])) == []
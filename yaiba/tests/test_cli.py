@@ -0,0 +1,134 @@
+import os
+
+import pytest
+
+import yaiba
+from yaiba.cli import MANIFEST_FILE_NAME, main
+
+LOG = '\n'.join([
+    '2022.03.04 21:50:19 Log        -  [Behaviour] Entering Room: FirstRoom',
+    '2022.03.04 21:50:22 Log        -  [Behaviour] OnPlayerJoined E.HOBA',
+    '2022.03.04 21:50:23 Log        -  [Player Position Version]1.0.0',
+    '2022.03.04 21:50:31 Log        -  [Player Position]13,"E.HOBA",-6.329126,-0.3207326,-0.3207326,272.0943,'
+    '-0.009579957,-0.01711023,0.0004068119,-0.06890159,-0.007717842,True',
+    '2022.03.05 03:13:50 Log        -  [Behaviour] OnPlayerLeft E.HOBA',
+]) + '\n'
+
+
+def _write_logs(directory, count: int):
+    directory.mkdir()
+    for i in range(count):
+        (directory / f"output_log_{i}.txt").write_text(LOG, encoding="utf-8")
+
+
+def _output_names(output_dir):
+    return sorted(n for n in os.listdir(output_dir) if n != MANIFEST_FILE_NAME)
+
+
+class TestConvert:
+    def test__convert(self, tmp_path, capsys):
+        _write_logs(tmp_path / "in", 3)
+        output_dir = tmp_path / "out"
+
+        exit_code = main(["convert", str(tmp_path / "in"), "-o", str(output_dir), "-j", "2", "--compression", "gzip",
+                          "--salt", "00ff"])
+
+        assert exit_code == 0
+        assert _output_names(output_dir) == [f"output_log_{i}.json.gz" for i in range(3)]
+        session_logs = [yaiba.load_session_log(str(output_dir / f"output_log_{i}.json.gz")) for i in range(3)]
+        assert len(session_logs[0].log_entries) == 5
+        # Pseudonymized with the same salt, without user names
+        assert session_logs[0].log_entries[1].pseudo_user_name == session_logs[2].log_entries[1].pseudo_user_name
+        assert session_logs[0].log_entries[1].user_name is None
+        assert "converted 3, failed 0, skipped 0" in capsys.readouterr().out
+
+    def test__skip_up_to_date(self, tmp_path, capsys):
+        _write_logs(tmp_path / "in", 2)
+        output_dir = tmp_path / "out"
+        main(["convert", str(tmp_path / "in"), "-o", str(output_dir), "-j", "1", "--salt", "00ff"])
+        capsys.readouterr()
+
+        # The first log is newer than its output
+        output_mtime = os.path.getmtime(output_dir / "output_log_0.json")
+        os.utime(tmp_path / "in" / "output_log_0.txt", (output_mtime + 10, output_mtime + 10))
+        main(["convert", str(tmp_path / "in"), "-o", str(output_dir), "-j", "1", "--salt", "00ff"])
+
+        assert "converted 1, failed 0, skipped 1" in capsys.readouterr().out
+
+        main(["convert", str(tmp_path / "in"), "-o", str(output_dir), "-j", "1", "--salt", "00ff", "--force"])
+
+        assert "converted 2, failed 0, skipped 0" in capsys.readouterr().out
+
+    def test__salt_required_for_existing_outputs(self, tmp_path, capsys):
+        _write_logs(tmp_path / "in", 1)
+        output_dir = tmp_path / "out"
+        salt_file = tmp_path / "salt.txt"
+        salt_file.write_text("00ff\n", encoding="utf-8")
+
+        assert main(["convert", str(tmp_path / "in"), "-o", str(output_dir), "-j", "1"]) == 0
+        assert "random salt" in capsys.readouterr().err
+
+        # Outputs converted with another (unknown) salt would give players other pseudo user names
+        assert main(["convert", str(tmp_path / "in"), "-o", str(output_dir), "-j", "1", "--force"]) == 2
+        assert "already has session logs" in capsys.readouterr().err
+
+        assert main(["convert", str(tmp_path / "in"), "-o", str(output_dir), "-j", "1", "--force",
+                     "--salt-file", str(salt_file)]) == 0
+        with pytest.raises(SystemExit):
+            main(["convert", str(tmp_path / "in"), "-o", str(tmp_path), "-j", "1", "--salt-file", str(salt_file)])
+
+    def test__same_file_names(self, tmp_path, capsys):
+        for attendee in ["a", "b"]:
+            _write_logs(tmp_path / attendee, 1)
+        (tmp_path / "b" / "output_log_0.txt").write_text(LOG.replace("FirstRoom", "SecondRoom"), encoding="utf-8")
+        output_dir = tmp_path / "out"
+
+        exit_code = main(["convert", str(tmp_path / "a"), str(tmp_path / "b"), "-o", str(output_dir), "-j", "2"])
+
+        assert exit_code == 0
+        output_names = _output_names(output_dir)
+        assert len(output_names) == 2
+        assert all(n.startswith("output_log_0-") and n.endswith(".json") for n in output_names)
+        room_names = {yaiba.load_session_log(str(output_dir / n)).log_entries[0].room_name for n in output_names}
+        assert room_names == {"FirstRoom", "SecondRoom"}
+        assert "converted 2, failed 0, skipped 0" in capsys.readouterr().out
+
+    def test__same_file_names__separate_runs(self, tmp_path, capsys):
+        for attendee in ["a", "b"]:
+            _write_logs(tmp_path / attendee, 1)
+        (tmp_path / "b" / "output_log_0.txt").write_text(LOG.replace("FirstRoom", "SecondRoom"), encoding="utf-8")
+        # Older than the output of a
+        os.utime(tmp_path / "b" / "output_log_0.txt", (0, 0))
+        output_dir = tmp_path / "out"
+
+        main(["convert", str(tmp_path / "a"), "-o", str(output_dir), "-j", "1", "--salt", "00ff"])
+        capsys.readouterr()
+        main(["convert", str(tmp_path / "b"), "-o", str(output_dir), "-j", "1", "--salt", "00ff"])
+
+        assert "converted 1, failed 0, skipped 0" in capsys.readouterr().out
+        output_names = _output_names(output_dir)
+        assert len(output_names) == 2 and "output_log_0.json" in output_names
+        room_name_by_output_name = {
+            n: yaiba.load_session_log(str(output_dir / n)).log_entries[0].room_name for n in output_names
+        }
+        assert room_name_by_output_name.pop("output_log_0.json") == "FirstRoom"
+        assert list(room_name_by_output_name.values()) == ["SecondRoom"]
+
+        # Each input keeps its name when converted together
+        main(["convert", str(tmp_path / "a"), str(tmp_path / "b"), "-o", str(output_dir), "-j", "1", "--salt", "00ff"])
+
+        assert "converted 0, failed 0, skipped 2" in capsys.readouterr().out
+        assert _output_names(output_dir) == output_names
+
+    def test__bad_file_does_not_abort(self, tmp_path, capsys):
+        _write_logs(tmp_path / "in", 1)
+        output_dir = tmp_path / "out"
+
+        exit_code = main(["convert", str(tmp_path / "missing.txt"), str(tmp_path / "in"), "-o", str(output_dir),
+                          "-j", "1"])
+
+        assert exit_code == 1
+        assert _output_names(output_dir) == ["output_log_0.json"]
+        captured = capsys.readouterr()
+        assert "missing.txt: FAILED FileNotFoundError" in captured.err
+        assert "converted 1, failed 1, skipped 0" in captured.out
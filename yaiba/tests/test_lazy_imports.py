@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+import pytest
+
+import yaiba
+
+
+def _run(script: str) -> str:
+    return subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout.strip()
+
+
+class TestLazyImports:
+    def test__import_yaiba__does_not_import_heavy_modules(self):
+        script = "import yaiba, sys; print([m for m in ['numpy', 'pandas', 'plotly', 'ipywidgets'] if m in sys.modules])"
+
+        assert _run(script) == "[]"
+
+    def test__lazy_attribute(self):
+        pytest.importorskip("plotly")
+        pytest.importorskip("ipywidgets")
+        from yaiba.visualization.vrc import VRCPlayerLocationPlotter
+
+        assert yaiba.VRCPlayerLocationPlotter is VRCPlayerLocationPlotter
+        assert "VRCPlayerLocationPlotter" in dir(yaiba)
+
+    def test__lazy_submodule(self):
+        assert _run("import yaiba, sys; yaiba.analysis; print('yaiba.analysis' in sys.modules)") == "True"
+
+    def test__unknown_attribute(self):
+        with pytest.raises(AttributeError):
+            yaiba.no_such_attribute
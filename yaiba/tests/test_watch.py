@@ -0,0 +1,141 @@
+import json
+import os
+
+import pytest
+
+import yaiba
+from yaiba.cli import ConvertOptions, main
+from yaiba.log.vrc.tests.test_incremental import LINES
+from yaiba.watch import STATE_FILE_NAME, LogWatcher
+
+
+def _append(path, lines):
+    with open(path, "a", encoding="utf-8") as fp:
+        fp.write("".join(line + "\n" for line in lines))
+
+
+def _entry_count(path) -> int:
+    return len(yaiba.load_session_log(str(path)).log_entries)
+
+
+class TestLogWatcher:
+    def test__poll(self, tmp_path):
+        input_dir = tmp_path / "in"
+        input_dir.mkdir()
+        output_path = tmp_path / "out" / "output_log_0.json"
+        watcher = LogWatcher(str(input_dir), str(tmp_path / "out"), ConvertOptions(salt=b"salt"), jobs=2)
+
+        _append(input_dir / "output_log_0.txt", LINES[:2])
+        results = watcher.poll()
+        # The last entry is held back while the file grows
+        assert [r.entry_count for r in results] == [1]
+        assert _entry_count(output_path) == 1
+
+        results = watcher.poll()
+        assert [r.entry_count for r in results] == [1]
+        assert _entry_count(output_path) == 2
+
+        _append(input_dir / "output_log_0.txt", LINES[2:])
+        _append(input_dir / "output_log_1.txt", LINES)
+        watcher.poll()
+        watcher.poll()
+        assert _entry_count(output_path) == 5
+        assert _entry_count(tmp_path / "out" / "output_log_1.json") == 5
+
+        assert watcher.poll() == []
+
+    def test__restart(self, tmp_path):
+        input_dir = tmp_path / "in"
+        input_dir.mkdir()
+        _append(input_dir / "output_log_0.txt", LINES)
+        _append(input_dir / "output_log_1.txt", LINES)
+        main(["watch", str(input_dir), "-o", str(tmp_path / "out"), "--interval", "0", "--max-polls", "2",
+              "--salt", "00ff"])
+        assert os.path.exists(tmp_path / "out" / STATE_FILE_NAME)
+
+        # Unchanged files are skipped after a restart, and grown files are parsed again
+        _append(input_dir / "output_log_1.txt", LINES[:1])
+        watcher = LogWatcher(str(input_dir), str(tmp_path / "out"), ConvertOptions(salt=bytes.fromhex("00ff")))
+        results = watcher.poll() + watcher.poll()
+
+        assert [os.path.basename(r.input_path) for r in results] == ["output_log_1.txt", "output_log_1.txt"]
+        assert _entry_count(tmp_path / "out" / "output_log_1.json") == 6
+
+    def test__restart_with_another_salt(self, tmp_path, capsys):
+        input_dir = tmp_path / "in"
+        input_dir.mkdir()
+        _append(input_dir / "output_log_0.txt", LINES)
+        watcher = LogWatcher(str(input_dir), str(tmp_path / "out"), ConvertOptions(salt=b"salt"))
+        watcher.poll()
+
+        # Neither the salt nor parsed offsets are written next to the outputs
+        with open(tmp_path / "out" / STATE_FILE_NAME, "r", encoding="utf-8") as fp:
+            state = json.load(fp)
+        assert "salt" not in state
+        assert b"salt".hex() not in json.dumps(state)
+        assert list(state["files"]["output_log_0.txt"]) == ["size", "mtime"]
+
+        with pytest.raises(ValueError):
+            LogWatcher(str(input_dir), str(tmp_path / "out"), ConvertOptions(salt=b"other salt"))
+        assert main(["watch", str(input_dir), "-o", str(tmp_path / "out"), "--interval", "0", "--max-polls", "1"]) == 2
+        assert "was watched before" in capsys.readouterr().err
+
+    def test__truncated(self, tmp_path):
+        input_dir = tmp_path / "in"
+        input_dir.mkdir()
+        watcher = LogWatcher(str(input_dir), str(tmp_path / "out"), ConvertOptions(salt=b"salt"))
+        _append(input_dir / "output_log_0.txt", LINES)
+        watcher.poll()
+        watcher.poll()
+
+        with open(input_dir / "output_log_0.txt", "w", encoding="utf-8") as fp:
+            fp.write(LINES[0] + "\n")
+        watcher.poll()
+        watcher.poll()
+
+        assert _entry_count(tmp_path / "out" / "output_log_0.json") == 1
+
+    def test__releases_parser(self, tmp_path):
+        input_dir = tmp_path / "in"
+        input_dir.mkdir()
+        watcher = LogWatcher(str(input_dir), str(tmp_path / "out"), ConvertOptions(salt=b"salt"))
+        _append(input_dir / "output_log_0.txt", LINES[:3])
+        watcher.poll()
+        watcher.poll()
+
+        assert watcher._files["output_log_0.txt"].parser is None
+
+        _append(input_dir / "output_log_0.txt", LINES[3:])
+        watcher.poll()
+        watcher.poll()
+
+        assert watcher._files["output_log_0.txt"].parser is None
+        assert _entry_count(tmp_path / "out" / "output_log_0.json") == 5
+
+    def test__incomplete_last_line(self, tmp_path, monkeypatch):
+        input_dir = tmp_path / "in"
+        input_dir.mkdir()
+        watcher = LogWatcher(str(input_dir), str(tmp_path / "out"), ConvertOptions(salt=b"salt"))
+        with open(input_dir / "output_log_0.txt", "w", encoding="utf-8") as fp:
+            fp.write("\n".join(LINES))
+        watcher.poll()
+        watcher.poll()
+        assert _entry_count(tmp_path / "out" / "output_log_0.json") == 4
+
+        save_count = 0
+
+        def counting_save_state():
+            nonlocal save_count
+            save_count += 1
+
+        monkeypatch.setattr(watcher, "_save_state", counting_save_state)
+        # Nothing to parse until the line is complete
+        assert watcher.poll() == []
+        assert watcher.poll() == []
+        assert save_count == 0
+
+        monkeypatch.undo()
+        _append(input_dir / "output_log_0.txt", [""])
+        watcher.poll()
+        watcher.poll()
+        assert _entry_count(tmp_path / "out" / "output_log_0.json") == 5
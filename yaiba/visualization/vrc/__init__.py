@@ -1,37 +1,47 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import timedelta
-from typing import List, Optional, Tuple
+from typing import Callable, Generic, List, Optional, Tuple, TypeVar
 
-import pandas
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from ipywidgets import Dropdown, HBox, IntSlider, Label, Play, VBox, jslink
+from ipywidgets import Dropdown, HBox, IntRangeSlider, IntSlider, Label, Play, VBox, jslink
 
 from yaiba import SessionLog
+from yaiba.analysis.vrc.presence import PresenceIndex
+from yaiba.log.session_log import Entry
 from yaiba.log.types import PseudoUserName, Timestamp
 from yaiba.log.vrc import VRCEnteringRoomEntry, VRCPlayerLeftEntry, VRCYAIBAPlayerPositionEntry
-
-
-@dataclass
-class PlayerLocation:
-    timestamp: Timestamp
-    pseudo_user_name: PseudoUserName
-    location_x: Optional[float]
-    location_z: Optional[float]
+from yaiba.visualization.vrc.export import (
+    COLORSCALE,
+    build_location_animation,
+    trail_frame_count,
+    trail_opacities,
+)
+from yaiba.visualization.vrc.frames import LocationFrames, LocationPyramid
+from yaiba.visualization.vrc.heatmap import HeatmapTimeline
 
 
 class VRCPlayerLocationPlotter():
     timestamp_start: Timestamp
     timestamp_end: Timestamp
 
-    # timestamp: pseudo_user_name (str), user_id (int), location_x (float), location_z (float)
-    df: Optional[pd.DataFrame]
+    # Location frames of the selected room, at 1 / 10 / 60 second intervals
+    pyramid: Optional[LocationPyramid]
+    frames: Optional[LocationFrames]
     world_boundary: Optional[WorldBoundary]
 
-    def __init__(self, session_log: SessionLog):
+    def __init__(self, session_log: SessionLog, room_cache_size: int = 8, trail_sec: float = 0.0):
+        """
+        :param room_cache_size: The number of recently selected rooms whose data is kept.
+        :param trail_sec: Draws the locations of each player over the last `trail_sec` seconds as a fading trail.
+        """
         self.session_log = session_log
+        self.trail_sec = trail_sec
+        self._room_cache: _RoomCache[_RoomData] = _RoomCache(room_cache_size)
 
         self.room_names = self._get_room_names(session_log)
         default_room_name = self.room_names[0]
@@ -65,8 +75,14 @@ class VRCPlayerLocationPlotter():
         self.scatter = go.Scatter(
             mode='markers',
         )
+        self.trail = go.Scatter(
+            mode='markers',
+            hoverinfo='skip',
+            marker=dict(size=4),
+        )
         self.figure_widget = go.FigureWidget(
-            data=[self.scatter],
+            # The trail first, so that it is drawn under the players, as in `export_location_animation_html`
+            data=[self.trail, self.scatter],
             layout=go.Layout(
                 yaxis=dict(
                     scaleanchor='x'
@@ -94,6 +110,21 @@ class VRCPlayerLocationPlotter():
     def plot(self):
         return self.container
 
+    def export_html(self, file: str, max_frames: int = 300, frame_duration_ms: int = 100):
+        """
+        Writes the selected room as a self-contained HTML animation, which plays in the browser without Python.
+        """
+        if self.frames is None:
+            raise ValueError(f"no player position in {self.room_dropdown.value}")
+        figure = build_location_animation(
+            self.frames,
+            max_frames=max_frames,
+            frame_duration_ms=frame_duration_ms,
+            title=self.room_dropdown.value,
+            trail_sec=self.trail_sec,
+        )
+        figure.write_html(file, include_plotlyjs=True, auto_play=False)
+
     def change_entering_room(self, formatted_entering_room: str):
 
         self.log_idx_slice = self._get_log_entry_slice(self.session_log, formatted_entering_room)
@@ -106,37 +137,110 @@ class VRCPlayerLocationPlotter():
         self.play.min = 0
         self.play.max = duration_sec
 
-        self.df = self._gen_dataframe(self.session_log, self.log_idx_slice)
-        self.world_boundary = self._get_world_boundary(self.df)
+        def build_room_data() -> _RoomData:
+            # Built once per room, so that a slider change is a lookup of one frame
+            pyramid = LocationPyramid.from_entries(
+                self.session_log.log_entries[self.log_idx_slice],
+                start=self.timestamp_start.timestamp(),
+                end=self.timestamp_start.timestamp() + duration_sec,
+            )
+            return _RoomData(self.log_idx_slice, pyramid, self._get_world_boundary(pyramid))
+
+        room_data = self._room_cache.get(formatted_entering_room, build_room_data)
+        self._room_data = room_data
+        self.pyramid = room_data.pyramid
+        self.frames = None if room_data.pyramid is None else room_data.pyramid.finest
+        self.world_boundary = room_data.world_boundary
+
+        with self.figure_widget.batch_update():
+            # Clears the trail of the previous room. It is drawn again when the slider moves.
+            self.figure_widget.data[0].x = []
+            self.figure_widget.data[0].y = []
 
         if self.world_boundary is not None:
             with self.figure_widget.batch_update():
                 self.figure_widget.update_layout(xaxis_range=[self.world_boundary.x_min, self.world_boundary.x_max])
                 self.figure_widget.update_layout(yaxis_range=[self.world_boundary.z_min, self.world_boundary.z_max])
+                # The same color for a player in both traces
+                self.figure_widget.update_traces(
+                    marker=dict(cmin=0, cmax=max(len(self.frames.player_names) - 1, 1), colorscale=COLORSCALE))
+
+    @property
+    def df(self) -> Optional[pd.DataFrame]:
+        """
+        timestamp: pseudo_user_name (str), user_id (int), location_x (float), location_z (float) of the selected room.
+        Built on first access, since drawing only uses the location frames.
+        """
+        room_data = self._room_data
+        if not room_data.is_df_built:
+            room_data.df = self._gen_dataframe(self.session_log, room_data.log_idx_slice)
+            room_data.is_df_built = True
+        return room_data.df
 
     def _on_changed_slider_value(self, values):
         sec_diff = values["new"]
         timestamp = self.timestamp_start + timedelta(seconds=sec_diff)
         self.label_current_timestamp.value = timestamp.isoformat()
 
-        if self.df is None or self.world_boundary is None:
+        if self.pyramid is None or self.world_boundary is None:
             return
 
         with self.figure_widget.batch_update():
             data_x, data_z, data_username, data_user_id = self._calc_scatter_data(timestamp)
-            self.figure_widget.data[0].x = data_x
-            self.figure_widget.data[0].y = data_z
-            self.figure_widget.data[0].text = data_username
-            self.figure_widget.data[0].marker.color = data_user_id
+            self.figure_widget.data[1].x = data_x
+            self.figure_widget.data[1].y = data_z
+            self.figure_widget.data[1].text = data_username
+            self.figure_widget.data[1].marker.color = data_user_id
+            if self.trail_sec > 0:
+                trail_x, trail_z, trail_user_id, trail_opacity = self._calc_trail_data(timestamp)
+                self.figure_widget.data[0].x = trail_x
+                self.figure_widget.data[0].y = trail_z
+                self.figure_widget.data[0].marker.color = trail_user_id
+                self.figure_widget.data[0].marker.opacity = trail_opacity
+
+    def _current_level(self) -> LocationFrames:
+        """
+        The level of detail of the play step and the zoom, for both players and trails. When playing, the slider moves
+        by the step, so a frame of a coarser level is at most one of its intervals before the slider.
+        """
+        return self.pyramid.level_for(self.play.step, self._get_zoom())
 
     def _calc_scatter_data(self, timestamp: Timestamp) -> Tuple[List[float], List[float], List[str], List[int]]:
-        one_shot_data = self.df.loc[:timestamp].groupby("pseudo_user_name").tail(1).dropna()
-        x = one_shot_data["location_x"].tolist()
-        z = one_shot_data["location_z"].tolist()
-        pseudo_user_name = one_shot_data["pseudo_user_name"].tolist()
-        user_id = one_shot_data["user_id"].tolist()
+        return self._gen_scatter_data(self._current_level(), timestamp.timestamp())
+
+    def _calc_trail_data(self, timestamp: Timestamp) -> Tuple[List[float], List[float], List[int], List[float]]:
+        frames = self._current_level()
+        player_indexes, locations, ages = frames.trail(
+            frames.frame_index(timestamp.timestamp()), trail_frame_count(frames, self.trail_sec))
+        x = locations[:, 0].tolist()
+        z = locations[:, 1].tolist()
+        user_id = player_indexes.tolist()
+        opacity = trail_opacities(ages, self.trail_sec).tolist()
+        return (x, z, user_id, opacity)
+
+    @classmethod
+    def _gen_scatter_data(
+            cls,
+            frames: LocationFrames,
+            time: float,
+    ) -> Tuple[List[float], List[float], List[str], List[int]]:
+        player_indexes, locations = frames.frame(frames.frame_index(time))
+        x = locations[:, 0].tolist()
+        z = locations[:, 1].tolist()
+        pseudo_user_name = frames.player_names[player_indexes].tolist()
+        user_id = player_indexes.tolist()
         return (x, z, pseudo_user_name, user_id)
 
+    def _get_zoom(self) -> float:
+        """
+        The visible fraction of the world width.
+        """
+        x_range = self.figure_widget.layout.xaxis.range
+        world_width = self.world_boundary.x_max - self.world_boundary.x_min
+        if x_range is None or world_width <= 0:
+            return 1.0
+        return (x_range[1] - x_range[0]) / world_width
+
     def _on_changed_room_dropdown_value(self, value):
         new_room_name: str = value.get("new")
         self.change_entering_room(new_room_name)
@@ -180,58 +284,291 @@ class VRCPlayerLocationPlotter():
         )
 
     @classmethod
-    def _get_world_boundary(cls, df: pandas.DataFrame) -> Optional[WorldBoundary]:
-        if df is None:
+    def _get_world_boundary(cls, pyramid: Optional[LocationPyramid]) -> Optional[WorldBoundary]:
+        bounds = None if pyramid is None else pyramid.bounds()
+        if bounds is None:
             return None
-        return WorldBoundary(
-            x_min=df["location_x"].min(),
-            x_max=df["location_x"].max(),
-            z_min=df["location_z"].min(),
-            z_max=df["location_z"].max(),
-        )
+        x_min, x_max, z_min, z_max = bounds
+        return WorldBoundary(x_min=x_min, x_max=x_max, z_min=z_min, z_max=z_max)
 
     @classmethod
     def _gen_dataframe(cls, session_log: SessionLog, idx_slice: slice) -> Optional[pd.DataFrame]:
-        raw_entries = session_log.log_entries[idx_slice]
+        timestamps: List[Timestamp] = []
+        pseudo_user_names: List[PseudoUserName] = []
+        locations_x: List[Optional[float]] = []
+        locations_z: List[Optional[float]] = []
 
         has_location_entry = False
-
-        location_entries: List[PlayerLocation] = []
-        for entry in raw_entries:
+        for entry in session_log.log_entries[idx_slice]:
             if isinstance(entry, VRCYAIBAPlayerPositionEntry):
                 has_location_entry = True
-                location_entries.append(
-                    PlayerLocation(
-                        timestamp=entry.timestamp,
-                        pseudo_user_name=entry.pseudo_user_name,
-                        location_x=entry.location_x,
-                        location_z=entry.location_z,
-                    )
-                )
-                continue
-            if isinstance(entry, VRCPlayerLeftEntry):
-                location_entries.append(
-                    PlayerLocation(
-                        timestamp=entry.timestamp,
-                        pseudo_user_name=entry.pseudo_user_name,
-                        location_x=None,
-                        location_z=None,
-                    )
-                )
-                continue
+                timestamps.append(entry.timestamp)
+                pseudo_user_names.append(entry.pseudo_user_name)
+                locations_x.append(entry.location_x)
+                locations_z.append(entry.location_z)
+            elif isinstance(entry, VRCPlayerLeftEntry):
+                timestamps.append(entry.timestamp)
+                pseudo_user_names.append(entry.pseudo_user_name)
+                locations_x.append(None)
+                locations_z.append(None)
 
         if not has_location_entry:
             # No data to be rendered.
             return None
 
-        df = pd.DataFrame(location_entries)
-        df.set_index(["timestamp"], inplace=True)
+        # Codes of the sorted player names
+        user_ids, _ = pd.factorize(np.array(pseudo_user_names, dtype=object), sort=True)
+        return pd.DataFrame(
+            {
+                "pseudo_user_name": pseudo_user_names,
+                "location_x": np.array(locations_x, dtype=np.float64),
+                "location_z": np.array(locations_z, dtype=np.float64),
+                "user_id": user_ids,
+            },
+            index=pd.Index(timestamps, name="timestamp"),
+        )
+
+
+class VRCHeatmapPlotter():
+    """
+    Dwell-time heatmap of a room visit, over a time range selected with a slider. Dwell times are aggregated once per
+    room in time buckets of `bucket_sec`, keeping only the bins with dwell time, so a change of the time range sums the
+    bins of the selected buckets (see `HeatmapTimeline`).
+    """
+    timestamp_start: Timestamp
+    timeline: HeatmapTimeline
+
+    def __init__(
+            self,
+            session_log: SessionLog,
+            bucket_sec: float = 300.0,
+            bin_size: float = 0.5,
+            max_dwell_sec: float = 10.0,
+            room_cache_size: int = 8,
+    ):
+        self.session_log = session_log
+        self.bucket_sec = bucket_sec
+        self.bin_size = bin_size
+        self.max_dwell_sec = max_dwell_sec
+        self._room_cache: _RoomCache[HeatmapTimeline] = _RoomCache(room_cache_size)
+
+        self.room_names = VRCPlayerLocationPlotter._get_room_names(session_log)
+        default_room_name = self.room_names[0]
+
+        # UI components
+        self.room_dropdown = Dropdown(
+            options=self.room_names,
+            value=default_room_name,
+        )
+        self.time_range_slider = IntRangeSlider(step=max(1, int(bucket_sec)))
+
+        self.controllers = VBox(
+            [
+                HBox([
+                    Label("Entering room:"),
+                    self.room_dropdown,
+                ]),
+                HBox([
+                    self.time_range_slider,
+                    Label("(sec)"),
+                ])
+            ]
+        )
+
+        self.figure_widget = go.FigureWidget(
+            data=[go.Heatmap(colorscale='Viridis', colorbar=dict(title="sec"))],
+            layout=go.Layout(
+                yaxis=dict(
+                    scaleanchor='x'
+                ),
+                height=640,
+                width=640,
+            )
+        )
+
+        self.time_range_slider.observe(self._on_changed_time_range_value, names='value')
+        self.room_dropdown.observe(self._on_changed_room_dropdown_value, names='value')
+
+        self.container = VBox([
+            self.controllers,
+            self.figure_widget,
+        ])
+
+        self.change_entering_room(default_room_name)
+
+    def plot(self):
+        return self.container
+
+    def change_entering_room(self, formatted_entering_room: str):
+        log_idx_slice = VRCPlayerLocationPlotter._get_log_entry_slice(self.session_log, formatted_entering_room)
+        log_entries = self.session_log.log_entries[log_idx_slice]
+
+        self.timestamp_start = log_entries[0].timestamp
+        duration_sec = int(log_entries[-1].timestamp.timestamp()) - int(self.timestamp_start.timestamp())
+
+        self.timeline = self._room_cache.get(formatted_entering_room, lambda: HeatmapTimeline.from_entries(
+            log_entries,
+            start=self.timestamp_start.timestamp(),
+            bucket_sec=self.bucket_sec,
+            bin_size=self.bin_size,
+            max_dwell_sec=self.max_dwell_sec,
+        ))
+
+        with self.time_range_slider.hold_trait_notifications():
+            self.time_range_slider.min = 0
+            self.time_range_slider.max = duration_sec
+            self.time_range_slider.value = (0, duration_sec)
+        self._redraw()
 
-        ids = sorted(set(df["pseudo_user_name"].tolist()))
+    def _on_changed_time_range_value(self, values):
+        self._redraw()
 
-        df["user_id"] = df["pseudo_user_name"].apply(lambda t: ids.index(t))
+    def _on_changed_room_dropdown_value(self, value):
+        new_room_name: str = value.get("new")
+        self.change_entering_room(new_room_name)
+
+    def _redraw(self):
+        start = self.timestamp_start.timestamp()
+        range_start, range_end = self.time_range_slider.value
+        heatmap = self.timeline.heatmap(start + range_start, start + range_end)
+        with self.figure_widget.batch_update():
+            self.figure_widget.data[0].z = heatmap.seconds
+            self.figure_widget.data[0].x = (heatmap.x_edges[:-1] + heatmap.x_edges[1:]) / 2
+            self.figure_widget.data[0].y = (heatmap.z_edges[:-1] + heatmap.z_edges[1:]) / 2
+
+
+class VRCPresencePlotter():
+    """
+    Headcount and presence interval of each player in a room visit, from join / left events. Both are computed once
+    per room, and the time range slider only changes the visible range.
+    """
+    timestamp_start: Timestamp
+    presence: _PresenceData
+
+    def __init__(self, session_log: SessionLog, interval_sec: float = 10.0, room_cache_size: int = 8):
+        """
+        :param interval_sec: Interval of the headcount series.
+        """
+        self.session_log = session_log
+        self.interval_sec = interval_sec
+        self._room_cache: _RoomCache[_PresenceData] = _RoomCache(room_cache_size)
+
+        self.room_names = VRCPlayerLocationPlotter._get_room_names(session_log)
+        default_room_name = self.room_names[0]
+
+        # UI components
+        self.room_dropdown = Dropdown(
+            options=self.room_names,
+            value=default_room_name,
+        )
+        self.time_range_slider = IntRangeSlider()
+
+        self.controllers = VBox(
+            [
+                HBox([
+                    Label("Entering room:"),
+                    self.room_dropdown,
+                ]),
+                HBox([
+                    self.time_range_slider,
+                    Label("(sec)"),
+                ])
+            ]
+        )
+
+        self.figure_widget = go.FigureWidget(
+            data=[
+                go.Scatter(mode='lines', line_shape='hv', name="headcount", yaxis='y'),
+                go.Scatter(mode='lines', name="presence", yaxis='y2', line=dict(width=6)),
+            ],
+            layout=go.Layout(
+                xaxis=dict(title="sec"),
+                yaxis=dict(domain=[0.75, 1.0], title="headcount"),
+                yaxis2=dict(domain=[0.0, 0.7], autorange='reversed'),
+                showlegend=False,
+                height=640,
+                width=960,
+            )
+        )
+
+        self.time_range_slider.observe(self._on_changed_time_range_value, names='value')
+        self.room_dropdown.observe(self._on_changed_room_dropdown_value, names='value')
+
+        self.container = VBox([
+            self.controllers,
+            self.figure_widget,
+        ])
+
+        self.change_entering_room(default_room_name)
+
+    def plot(self):
+        return self.container
+
+    def change_entering_room(self, formatted_entering_room: str):
+        log_idx_slice = VRCPlayerLocationPlotter._get_log_entry_slice(self.session_log, formatted_entering_room)
+        log_entries = self.session_log.log_entries[log_idx_slice]
+
+        self.timestamp_start = log_entries[0].timestamp
+        duration_sec = int(log_entries[-1].timestamp.timestamp()) - int(self.timestamp_start.timestamp())
 
-        return df
+        self.presence = self._room_cache.get(formatted_entering_room, lambda: self._gen_presence_data(
+            log_entries,
+            start=self.timestamp_start.timestamp(),
+            end=self.timestamp_start.timestamp() + duration_sec,
+            interval_sec=self.interval_sec,
+        ))
+
+        with self.figure_widget.batch_update():
+            self.figure_widget.data[0].x = self.presence.times_sec
+            self.figure_widget.data[0].y = self.presence.headcounts
+            self.figure_widget.data[1].x = self.presence.interval_x
+            self.figure_widget.data[1].y = self.presence.interval_y
+            self.figure_widget.layout.yaxis2.tickvals = list(range(len(self.presence.player_names)))
+            self.figure_widget.layout.yaxis2.ticktext = self.presence.player_names.tolist()
+
+        with self.time_range_slider.hold_trait_notifications():
+            self.time_range_slider.min = 0
+            self.time_range_slider.max = duration_sec
+            self.time_range_slider.value = (0, duration_sec)
+        self._redraw()
+
+    def _on_changed_time_range_value(self, values):
+        self._redraw()
+
+    def _on_changed_room_dropdown_value(self, value):
+        new_room_name: str = value.get("new")
+        self.change_entering_room(new_room_name)
+
+    def _redraw(self):
+        self.figure_widget.update_layout(xaxis_range=list(self.time_range_slider.value))
+
+    @classmethod
+    def _gen_presence_data(
+            cls,
+            log_entries: List[Entry],
+            start: float,
+            end: float,
+            interval_sec: float,
+    ) -> _PresenceData:
+        presence_index = PresenceIndex.from_entries(log_entries)
+        times, headcounts = presence_index.headcount_series(interval_sec=interval_sec, start=start, end=end)
+
+        intervals = presence_index.intervals
+        player_names, player_indexes = np.unique(
+            np.array([i.player_name for i in intervals], dtype=object), return_inverse=True)
+        starts = np.array([i.start for i in intervals], dtype=np.float64) - start
+        ends = np.minimum(np.array([i.end for i in intervals], dtype=np.float64), end) - start
+
+        # One line per interval, separated by NaN
+        interval_x = np.column_stack([starts, ends, np.full(len(intervals), np.nan)]).reshape(-1)
+        interval_y = np.column_stack([player_indexes, player_indexes, np.full(len(intervals), np.nan)]).reshape(-1)
+        return _PresenceData(
+            times_sec=times - start,
+            headcounts=headcounts,
+            player_names=player_names,
+            interval_x=interval_x,
+            interval_y=interval_y,
+        )
 
 
 @dataclass
@@ -240,3 +577,44 @@ class WorldBoundary:
     x_max: float
     z_min: float
     z_max: float
+
+
+@dataclass
+class _RoomData:
+    log_idx_slice: slice
+    pyramid: Optional[LocationPyramid]
+    world_boundary: Optional[WorldBoundary]
+    df: Optional[pd.DataFrame] = None
+    is_df_built: bool = False
+
+
+@dataclass
+class _PresenceData:
+    times_sec: np.ndarray  # seconds from the start of the room
+    headcounts: np.ndarray
+    player_names: np.ndarray  # sorted
+    interval_x: np.ndarray  # (start, end, NaN) of each presence interval
+    interval_y: np.ndarray  # (player index, player index, NaN) of each presence interval
+
+
+T = TypeVar('T')
+
+
+class _RoomCache(Generic[T]):
+    """
+    Data of the recently selected rooms, evicting the least recently selected one.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._items: OrderedDict[str, T] = OrderedDict()
+
+    def get(self, formatted_entering_room: str, build: Callable[[], T]) -> T:
+        item = self._items.pop(formatted_entering_room, None)
+        if item is None:
+            item = build()
+        # The most recently selected room is the last one
+        self._items[formatted_entering_room] = item
+        while len(self._items) > self.size:
+            self._items.popitem(last=False)
+        return item
@@ -0,0 +1,152 @@
+"""
+Self-contained HTML animations of player locations, played entirely in the browser.
+"""
+from __future__ import annotations
+
+import os
+from typing import List, Optional, Union
+
+import numpy as np
+import plotly.graph_objects as go
+
+from yaiba.log.vrc.room_visit import RoomVisit
+from yaiba.visualization.vrc.frames import LocationFrames
+
+# Coordinates are rounded in the exported figure, to keep the HTML small.
+COORDINATE_DECIMALS = 2
+# Opacity of the newest point of a trail, fading to 0 at the end of the trail.
+TRAIL_MAX_OPACITY = 0.5
+COLORSCALE = 'Turbo'
+
+
+def build_location_animation(
+        frames: LocationFrames,
+        max_frames: int = 300,
+        frame_duration_ms: int = 100,
+        title: Optional[str] = None,
+        trail_sec: float = 0.0,
+) -> go.Figure:
+    """
+    Builds a `go.Figure` with Plotly frames, decimated to at most `max_frames` evenly spaced frames, so that the
+    figure size depends on the number of frames and players, not on the number of samples.
+
+    :param trail_sec: Draws the locations of each player over the last `trail_sec` seconds as a fading trail.
+        The trail is from the original frames, not the decimated ones.
+    """
+    frame_indexes = np.unique(np.linspace(0, len(frames) - 1, min(len(frames), max_frames)).round().astype(np.int64))
+    player_count = len(frames.player_names)
+
+    def scatter(index: int) -> go.Scatter:
+        player_indexes, locations = frames.frame(index)
+        locations = locations.astype(np.float64).round(COORDINATE_DECIMALS)
+        return go.Scatter(
+            x=locations[:, 0],
+            y=locations[:, 1],
+            text=frames.player_names[player_indexes],
+            mode='markers',
+            marker=dict(color=player_indexes, cmin=0, cmax=max(player_count - 1, 1), colorscale=COLORSCALE),
+        )
+
+    def traces(index: int) -> List[go.Scatter]:
+        if trail_sec <= 0:
+            return [scatter(index)]
+        player_indexes, locations, ages = frames.trail(index, trail_frame_count(frames, trail_sec))
+        locations = locations.astype(np.float64).round(COORDINATE_DECIMALS)
+        trail = go.Scatter(
+            x=locations[:, 0],
+            y=locations[:, 1],
+            mode='markers',
+            hoverinfo='skip',
+            marker=dict(
+                color=player_indexes,
+                cmin=0,
+                cmax=max(player_count - 1, 1),
+                colorscale=COLORSCALE,
+                size=4,
+                opacity=trail_opacities(ages, trail_sec).round(2),
+            ),
+        )
+        return [trail, scatter(index)]
+
+    # Seconds from the start, as the slider of the plotter
+    labels = [f"{i * frames.interval_sec:g}" for i in frame_indexes.tolist()]
+    plotly_frames = [
+        go.Frame(data=traces(i), name=label)
+        for i, label in zip(frame_indexes.tolist(), labels)
+    ]
+
+    x_range, z_range = _ranges(frames)
+    play_args = dict(frame=dict(duration=frame_duration_ms, redraw=False), transition=dict(duration=0),
+                     fromcurrent=True)
+    pause_args = dict(frame=dict(duration=0, redraw=False), mode='immediate', transition=dict(duration=0))
+    return go.Figure(
+        data=traces(int(frame_indexes[0])),
+        frames=plotly_frames,
+        layout=go.Layout(
+            title=title,
+            xaxis=dict(range=x_range),
+            yaxis=dict(range=z_range, scaleanchor='x'),
+            height=640,
+            width=640,
+            updatemenus=[dict(
+                type='buttons',
+                showactive=False,
+                buttons=[
+                    dict(label='Play', method='animate', args=[None, play_args]),
+                    dict(label='Pause', method='animate', args=[[None], pause_args]),
+                ],
+            )],
+            sliders=[dict(
+                currentvalue=dict(prefix="sec: "),
+                steps=[
+                    dict(label=label, method='animate', args=[[label], pause_args])
+                    for label in labels
+                ],
+            )],
+        ),
+    )
+
+
+def export_location_animation_html(
+        room_visit: RoomVisit,
+        file: Union[str, os.PathLike],
+        max_frames: int = 300,
+        frame_duration_ms: int = 100,
+        include_plotlyjs: Union[bool, str] = True,
+        trail_sec: float = 0.0,
+):
+    """
+    Writes an HTML animation of a room visit (see `RoomVisit.split`).
+
+    :param include_plotlyjs: True embeds plotly.js, so the file works offline. "cdn" loads it from the CDN instead.
+    """
+    start = room_visit.timestamp.timestamp()
+    end = room_visit.log_entries[-1].timestamp.timestamp()
+    frames = LocationFrames.from_entries(room_visit.log_entries, start=start, end=max(start, end))
+    if frames is None:
+        raise ValueError(f"no player position in the room visit: {room_visit!r}")
+
+    figure = build_location_animation(
+        frames,
+        max_frames=max_frames,
+        frame_duration_ms=frame_duration_ms,
+        title=f"{room_visit.timestamp.isoformat()} : {room_visit.room_name}",
+        trail_sec=trail_sec,
+    )
+    figure.write_html(os.fspath(file), include_plotlyjs=include_plotlyjs, auto_play=False)
+
+
+def trail_frame_count(frames: LocationFrames, trail_sec: float) -> int:
+    return max(int(np.ceil(trail_sec / frames.interval_sec)), 1)
+
+
+def trail_opacities(ages: np.ndarray, trail_sec: float) -> np.ndarray:
+    return TRAIL_MAX_OPACITY * np.clip(1.0 - ages / trail_sec, 0.0, 1.0)
+
+
+def _ranges(frames: LocationFrames):
+    if np.isnan(frames.locations).all():
+        return None, None
+    low = np.nanmin(frames.locations, axis=(0, 1)).astype(np.float64)
+    high = np.nanmax(frames.locations, axis=(0, 1)).astype(np.float64)
+    return [low[0], high[0]], [low[1], high[1]]
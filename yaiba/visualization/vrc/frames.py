@@ -0,0 +1,159 @@
+"""
+Precomputed animation frames of player locations.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from yaiba.analysis.vrc.positions import PlayerPositions
+from yaiba.analysis.vrc.trajectory import INTERPOLATION_PREVIOUS, resample_tracks
+from yaiba.log.session_log import Entry
+
+# Intervals of the levels of `LocationPyramid`, in multiples of the finest interval.
+LOD_FACTORS = (1, 10, 60)
+
+
+@dataclass
+class LocationFrames:
+    """
+    Location of every player at each frame, forward-filled from the latest sample, as `df.loc[:t].tail(1)` would
+    give. Locations are NaN when the player has no sample yet or has left.
+    """
+    start: float  # epoch seconds of frames[0]
+    interval_sec: float
+    player_names: np.ndarray  # (P,) object, sorted
+    locations: np.ndarray  # (T, P, 2) float32, location_x and location_z
+
+    def __len__(self):
+        return len(self.locations)
+
+    @classmethod
+    def from_entries(
+            cls,
+            entries: Iterable[Entry],
+            start: float,
+            end: float,
+            interval_sec: float = 1.0,
+    ) -> Optional[LocationFrames]:
+        """
+        :return: None if there is no position entry.
+        """
+        positions = PlayerPositions.from_entries(entries)
+        if len(positions) == 0:
+            return None
+        tracks = resample_tracks(
+            positions,
+            rate_hz=1.0 / interval_sec,
+            interpolation=INTERPOLATION_PREVIOUS,
+            max_gap_sec=np.inf,
+            start=start,
+            end=end,
+        )
+        return cls(
+            start=start,
+            interval_sec=interval_sec,
+            player_names=tracks.player_names,
+            locations=tracks.locations[:, :, [0, 2]].astype(np.float32),
+        )
+
+    def frame_index(self, time: float) -> int:
+        """
+        Index of the latest frame at or before `time`, clipped to the frames.
+        """
+        index = int(np.floor((time - self.start) / self.interval_sec + 1e-9))
+        return min(max(index, 0), len(self.locations) - 1)
+
+    def frame(self, index: int):
+        """
+        :return: (player indexes, locations (K, 2)) of the players with a location.
+        """
+        locations = self.locations[index]
+        player_indexes = np.flatnonzero(~np.isnan(locations).any(axis=1))
+        return player_indexes, locations[player_indexes]
+
+    def trail(self, index: int, frame_count: int):
+        """
+        Locations of each player over the `frame_count` frames up to `index`, sliced from the frames in
+        O(players * frame_count).
+
+        :return: (player indexes (M,), locations (M, 2), ages (M,) in seconds before the frame), sorted by player and
+            time, of the frames where the player has a location.
+        """
+        first = max(index - frame_count + 1, 0)
+        window = self.locations[first:index + 1].transpose(1, 0, 2)  # (P, L, 2)
+        player_indexes, offsets = np.nonzero(~np.isnan(window).any(axis=2))
+        ages = (index - first - offsets) * self.interval_sec
+        return player_indexes, window[player_indexes, offsets], ages
+
+
+@dataclass
+class LocationPyramid:
+    """
+    Location frames at several resolutions, finest first. A coarser level takes every `factor`-th finest frame (a view,
+    not a copy), so that each of its frames is the actual state at its time: a player is never shown before their
+    first position or after leaving, nor between two real positions.
+    """
+    levels: List[LocationFrames]
+
+    @classmethod
+    def from_frames(cls, frames: LocationFrames, factors: Sequence[int] = LOD_FACTORS) -> LocationPyramid:
+        levels = []
+        for factor in sorted(factors):
+            if factor == 1:
+                levels.append(frames)
+                continue
+            levels.append(LocationFrames(
+                start=frames.start,
+                interval_sec=frames.interval_sec * factor,
+                player_names=frames.player_names,
+                locations=frames.locations[::factor],
+            ))
+        return cls(levels)
+
+    @classmethod
+    def from_entries(
+            cls,
+            entries: Iterable[Entry],
+            start: float,
+            end: float,
+            interval_sec: float = 1.0,
+            factors: Sequence[int] = LOD_FACTORS,
+    ) -> Optional[LocationPyramid]:
+        """
+        :return: None if there is no position entry.
+        """
+        frames = LocationFrames.from_entries(entries, start, end, interval_sec)
+        return None if frames is None else cls.from_frames(frames, factors)
+
+    @property
+    def finest(self) -> LocationFrames:
+        return self.levels[0]
+
+    def level_for(self, step_sec: float, zoom: float = 1.0) -> LocationFrames:
+        """
+        The coarsest level whose interval is at most `step_sec * zoom`, or the finest level.
+
+        :param step_sec: Seconds between two displayed frames.
+        :param zoom: The visible fraction of the world width. Zooming in selects finer levels.
+        """
+        max_interval_sec = step_sec * min(max(zoom, 0.0), 1.0)
+        selected = self.levels[0]
+        for level in self.levels[1:]:
+            if level.interval_sec > max_interval_sec + 1e-9:
+                break
+            selected = level
+        return selected
+
+    def bounds(self) -> Optional[Tuple[float, float, float, float]]:
+        """
+        :return: (x_min, x_max, z_min, z_max) over the finest level, or None if no player has a location.
+        """
+        locations = self.finest.locations
+        if np.isnan(locations).all():
+            return None
+        low = np.nanmin(locations, axis=(0, 1))
+        high = np.nanmax(locations, axis=(0, 1))
+        return float(low[0]), float(high[0]), float(low[1]), float(high[1])
@@ -0,0 +1,93 @@
+"""
+Dwell-time heatmaps over time ranges of a room visit.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, List
+
+import numpy as np
+
+from yaiba.analysis.vrc.heatmap import Heatmap, HeatmapAccumulator
+from yaiba.log.session_log import Entry
+
+
+@dataclass
+class HeatmapTimeline:
+    """
+    Dwell time per bin and per time bucket. Only the bins with dwell time are kept for each bucket, so that memory is
+    bounded by the number of position samples, not by the extent of the world (ex. with one outlying position) times
+    the number of buckets. The heatmap of a range of buckets sums their bins. A position sample counts for the bucket of
+    its timestamp.
+    """
+    start: float  # epoch seconds of the first bucket
+    bucket_sec: float
+
+    """
+    Bins of bucket `b` are `bucket_offsets[b]:bucket_offsets[b + 1]`.
+    """
+    bucket_offsets: np.ndarray  # (B + 1,) int64
+    bin_indexes: np.ndarray  # (N,) int64, flat indexes into (Z, X)
+    seconds: np.ndarray  # (N,) float64
+    x_edges: np.ndarray  # (X + 1,)
+    z_edges: np.ndarray  # (Z + 1,)
+
+    @property
+    def bucket_count(self) -> int:
+        return len(self.bucket_offsets) - 1
+
+    @classmethod
+    def from_entries(
+            cls,
+            entries: Iterable[Entry],
+            start: float,
+            bucket_sec: float = 300.0,
+            bin_size: float = 0.5,
+            max_dwell_sec: float = 10.0,
+    ) -> HeatmapTimeline:
+        accumulator = HeatmapAccumulator(
+            bin_size=bin_size,
+            max_dwell_sec=max_dwell_sec,
+            group_by=lambda e: max(int((e.timestamp.timestamp() - start) // bucket_sec), 0),
+        ).add_entries(entries)
+
+        total = accumulator.total()
+        buckets = set(accumulator.groups)
+        bucket_count = max(buckets, default=-1) + 1
+        bucket_offsets = np.zeros(bucket_count + 1, dtype=np.int64)
+        bin_indexes: List[np.ndarray] = []
+        seconds: List[np.ndarray] = []
+        for bucket in range(bucket_count):
+            if bucket in buckets:
+                # Heatmaps of an accumulator have the same extent
+                bucket_seconds = accumulator.heatmap(bucket).seconds.ravel()
+                bucket_bin_indexes = np.flatnonzero(bucket_seconds)
+                bin_indexes.append(bucket_bin_indexes)
+                seconds.append(bucket_seconds[bucket_bin_indexes])
+                bucket_offsets[bucket + 1] = len(bucket_bin_indexes)
+        np.cumsum(bucket_offsets, out=bucket_offsets)
+        return cls(
+            start=start,
+            bucket_sec=bucket_sec,
+            bucket_offsets=bucket_offsets,
+            bin_indexes=np.concatenate(bin_indexes) if len(bin_indexes) > 0 else np.zeros(0, dtype=np.int64),
+            seconds=np.concatenate(seconds) if len(seconds) > 0 else np.zeros(0, dtype=np.float64),
+            x_edges=total.x_edges,
+            z_edges=total.z_edges,
+        )
+
+    def heatmap(self, a: float, b: float) -> Heatmap:
+        """
+        Heatmap of the buckets overlapping [a, b), in epoch seconds.
+        """
+        first = int(np.clip(np.floor((a - self.start) / self.bucket_sec), 0, self.bucket_count))
+        last = int(np.clip(np.ceil((b - self.start) / self.bucket_sec), first, self.bucket_count))
+        selected = slice(self.bucket_offsets[first], self.bucket_offsets[last])
+        shape = (max(len(self.z_edges) - 1, 0), max(len(self.x_edges) - 1, 0))
+        seconds = np.bincount(
+            self.bin_indexes[selected], weights=self.seconds[selected], minlength=shape[0] * shape[1])
+        return Heatmap(
+            seconds=seconds.reshape(shape),
+            x_edges=self.x_edges,
+            z_edges=self.z_edges,
+        )
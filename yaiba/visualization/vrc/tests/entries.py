@@ -0,0 +1,36 @@
+"""
+Entries shared by the tests of this package.
+"""
+from yaiba.log.types import PseudoUserName, UserName, VRCPlayerId
+from yaiba.log.vrc.entries.builtin import VRCPlayerLeftEntry
+from yaiba.log.vrc.entries.player_position import VRCYAIBAPlayerPositionEntry
+from yaiba.log.vrc.utils import parse_timestamp
+
+
+def position_entry(second: int, user_name: str, x: float) -> VRCYAIBAPlayerPositionEntry:
+    return VRCYAIBAPlayerPositionEntry(
+        parse_timestamp(f"2022.03.04 21:50:{second:02d}"),
+        player_id=VRCPlayerId(7),
+        user_name=UserName(user_name),
+        pseudo_user_name=PseudoUserName(user_name),
+        location_x=x,
+        location_y=0.0,
+        location_z=1.0,
+        rotation_1=0.0,
+        rotation_2=0.0,
+        rotation_3=0.0,
+        velocity_x=None,
+        velocity_y=None,
+        velocity_z=None,
+        is_vr=False,
+    )
+
+
+ENTRIES = [
+    position_entry(0, "A", 0.0),
+    position_entry(1, "B", 10.0),
+    position_entry(3, "A", 3.0),
+    VRCPlayerLeftEntry(
+        parse_timestamp("2022.03.04 21:50:04"), user_name=UserName("B"), pseudo_user_name=PseudoUserName("B")),
+]
+T0 = ENTRIES[0].timestamp.timestamp()
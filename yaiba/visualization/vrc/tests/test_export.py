@@ -0,0 +1,63 @@
+from dataclasses import replace
+from datetime import timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("plotly")
+pytest.importorskip("ipywidgets")
+
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry
+from yaiba.log.vrc.room_visit import RoomVisit
+from yaiba.log.vrc.utils import parse_timestamp
+from yaiba.visualization.vrc.export import build_location_animation, export_location_animation_html
+from yaiba.visualization.vrc.frames import LocationFrames
+from yaiba.visualization.vrc.tests.entries import ENTRIES, T0
+
+
+class TestBuildLocationAnimation:
+    def test__decimated(self):
+        frames = LocationFrames.from_entries(ENTRIES, start=T0, end=T0 + 1000)
+
+        figure = build_location_animation(frames, max_frames=10)
+
+        assert len(figure.frames) == 10
+        assert len(figure.layout.sliders[0].steps) == 10
+        # The first and the last frames are kept
+        assert list(figure.frames[0].data[0].x) == [0.0]
+        assert list(figure.frames[-1].data[0].text) == ["A"]
+
+    def test__fewer_frames_than_max(self):
+        frames = LocationFrames.from_entries(ENTRIES, start=T0, end=T0 + 4)
+
+        figure = build_location_animation(frames, max_frames=10)
+
+        assert len(figure.frames) == 5
+        assert list(figure.frames[2].data[0].text) == ["A", "B"]
+        assert list(figure.frames[2].data[0].marker.color) == [0, 1]
+
+    def test__trail(self):
+        frames = LocationFrames.from_entries(ENTRIES, start=T0, end=T0 + 4)
+
+        figure = build_location_animation(frames, max_frames=10, trail_sec=2)
+
+        trail, scatter = figure.frames[3].data
+        assert list(trail.x) == [0.0, 3.0, 10.0, 10.0]
+        assert list(trail.marker.color) == [0, 0, 1, 1]
+        assert list(trail.marker.opacity) == [0.25, 0.5, 0.25, 0.5]
+        assert list(scatter.text) == ["A", "B"]
+        assert len(figure.data) == 2
+
+
+class TestExportLocationAnimationHtml:
+    def test__size_bounded_by_frames(self, tmp_path):
+        def write(duration_sec: int) -> int:
+            entering = VRCEnteringRoomEntry(parse_timestamp("2022.03.04 21:50:00"), room_name="Room")
+            late = replace(ENTRIES[0], timestamp=entering.timestamp + timedelta(seconds=duration_sec))
+            path = tmp_path / f"{duration_sec}.html"
+            export_location_animation_html(
+                RoomVisit("Room", entering.timestamp, [entering, *ENTRIES, late]), path,
+                max_frames=20, include_plotlyjs=False)
+            return path.stat().st_size
+
+        assert abs(write(1000) - write(10000)) < 200
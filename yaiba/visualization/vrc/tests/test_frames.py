@@ -0,0 +1,100 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("plotly")
+pytest.importorskip("ipywidgets")
+
+from yaiba.visualization.vrc.frames import LocationFrames, LocationPyramid
+from yaiba.visualization.vrc.tests.entries import ENTRIES, T0
+
+
+class TestLocationFrames:
+    def test__from_entries(self):
+        frames = LocationFrames.from_entries(ENTRIES, start=T0, end=T0 + 30)
+
+        assert len(frames) == 31
+        assert frames.player_names.tolist() == ["A", "B"]
+        # Forward-filled without a time limit, until the player leaves
+        assert frames.locations[:, 0, 0].tolist()[:5] == [0.0, 0.0, 0.0, 3.0, 3.0]
+        assert frames.locations[30, 0].tolist() == [3.0, 1.0]
+        assert np.isnan(frames.locations[[0, 4], 1, 0]).all()
+
+    def test__frame(self):
+        frames = LocationFrames.from_entries(ENTRIES, start=T0, end=T0 + 30)
+
+        player_indexes, locations = frames.frame(frames.frame_index(T0 + 1.5))
+
+        assert player_indexes.tolist() == [0, 1]
+        assert locations[:, 0].tolist() == [0.0, 10.0]
+        assert frames.frame_index(T0 + 100) == 30
+
+    def test__no_position(self):
+        assert LocationFrames.from_entries(ENTRIES[3:], start=T0, end=T0 + 30) is None
+
+
+class TestLocationPyramid:
+    def test__from_frames(self):
+        frames = LocationFrames.from_entries(ENTRIES, start=T0, end=T0 + 30)
+
+        pyramid = LocationPyramid.from_frames(frames, factors=(1, 2, 10))
+
+        assert [len(level) for level in pyramid.levels] == [31, 16, 4]
+        assert [level.interval_sec for level in pyramid.levels] == [1.0, 2.0, 10.0]
+        assert pyramid.finest is frames
+        # Every factor-th finest frame
+        assert pyramid.levels[1].locations[:3, 0, 0].tolist() == [0.0, 0.0, 3.0]
+        assert pyramid.levels[1].locations[1, 1, 0] == 10.0
+        assert np.isnan(pyramid.levels[1].locations[[0, 2], 1, 0]).all()
+        assert pyramid.levels[2].locations[3, 0].tolist() == [3.0, 1.0]
+
+    def test__from_frames__never_shows_absent_players(self):
+        frames = LocationFrames.from_entries(ENTRIES, start=T0, end=T0 + 30)
+        pyramid = LocationPyramid.from_frames(frames, factors=(1, 2, 10))
+
+        for level in pyramid.levels:
+            for index in range(len(level)):
+                time = level.start + index * level.interval_sec
+                shown, _ = level.frame(index)
+                present, _ = frames.frame(frames.frame_index(time))
+                assert set(shown.tolist()) <= set(present.tolist())
+        # B's first position is at 1 s, so B is not shown at 0 s, which a mean over [0, 10) would do
+        assert pyramid.levels[2].frame(0)[0].tolist() == [0]
+
+    def test__level_for(self):
+        pyramid = LocationPyramid.from_entries(ENTRIES, start=T0, end=T0 + 300)
+
+        assert pyramid.level_for(1).interval_sec == 1.0
+        assert pyramid.level_for(10).interval_sec == 10.0
+        assert pyramid.level_for(30).interval_sec == 10.0
+        assert pyramid.level_for(600).interval_sec == 60.0
+        # Zoomed in to a tenth of the world
+        assert pyramid.level_for(600, zoom=0.1).interval_sec == 60.0
+        assert pyramid.level_for(100, zoom=0.1).interval_sec == 10.0
+        assert pyramid.level_for(10, zoom=0.5).interval_sec == 1.0
+
+    def test__bounds(self):
+        pyramid = LocationPyramid.from_entries(ENTRIES, start=T0, end=T0 + 30)
+
+        assert pyramid.bounds() == (0.0, 10.0, 1.0, 1.0)
+        assert LocationPyramid.from_entries(ENTRIES[3:], start=T0, end=T0 + 30) is None
+
+
+class TestLocationFramesTrail:
+    def test__trail(self):
+        frames = LocationFrames.from_entries(ENTRIES, start=T0, end=T0 + 30)
+
+        player_indexes, locations, ages = frames.trail(3, 3)
+
+        assert player_indexes.tolist() == [0, 0, 0, 1, 1, 1]
+        assert locations[:, 0].tolist() == [0.0, 0.0, 3.0, 10.0, 10.0, 10.0]
+        assert ages.tolist() == [2.0, 1.0, 0.0, 2.0, 1.0, 0.0]
+        # B left at frame 4
+        assert frames.trail(6, 3)[0].tolist() == [0, 0, 0]
+
+    def test__trail__clipped_at_the_first_frame(self):
+        frames = LocationFrames.from_entries(ENTRIES, start=T0, end=T0 + 30)
+
+        player_indexes, locations, ages = frames.trail(1, 10)
+
+        assert player_indexes.tolist() == [0, 0, 1]
+        assert ages.tolist() == [1.0, 0.0, 0.0]
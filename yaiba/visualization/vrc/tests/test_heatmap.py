@@ -0,0 +1,50 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("plotly")
+pytest.importorskip("ipywidgets")
+
+from yaiba.visualization.vrc.heatmap import HeatmapTimeline
+from yaiba.visualization.vrc.tests.entries import ENTRIES, T0, position_entry
+
+
+class TestHeatmapTimeline:
+    def test__heatmap(self):
+        timeline = HeatmapTimeline.from_entries(ENTRIES, start=T0, bucket_sec=2.0, bin_size=1.0)
+
+        # A: 3 sec at x=0 (bucket 0). B: 3 sec at x=10 (bucket 0).
+        assert timeline.bucket_count == 1
+        assert timeline.heatmap(T0, T0 + 2).seconds.sum() == 6.0
+        assert timeline.x_edges[[0, -1]].tolist() == [0.0, 11.0]
+
+        whole = timeline.heatmap(T0, T0 + 100)
+        assert whole.seconds[0, 0] == 3.0
+        assert whole.seconds[0, 10] == 3.0
+
+    def test__buckets(self):
+        timeline = HeatmapTimeline.from_entries(ENTRIES, start=T0 - 1, bucket_sec=1.0, bin_size=1.0)
+
+        # A at t=0 is in bucket 1, B at t=1 is in bucket 2
+        assert timeline.bucket_count == 3
+        assert timeline.heatmap(T0, T0 + 1).seconds[0, 0] == 3.0
+        assert timeline.heatmap(T0, T0 + 1).seconds[0, 10] == 0.0
+        assert timeline.heatmap(T0 + 1, T0 + 2).seconds[0, 10] == 3.0
+        assert timeline.heatmap(T0 - 100, T0).seconds.sum() == 0.0
+
+    def test__no_position(self):
+        timeline = HeatmapTimeline.from_entries(ENTRIES[3:], start=T0)
+
+        assert timeline.bucket_count == 0
+        assert timeline.heatmap(T0, T0 + 100).seconds.shape == (0, 0)
+
+    def test__sparse_with_an_outlier(self):
+        entries = [position_entry(0, "A", 0.0), position_entry(1, "A", 500.0), position_entry(2, "A", 0.0)]
+
+        timeline = HeatmapTimeline.from_entries(entries, start=T0, bucket_sec=1.0, bin_size=0.5)
+
+        # Only the bins with dwell time are stored, not the (buckets, Z, X) extent
+        assert timeline.seconds.tolist() == [1.0, 1.0]
+        heatmap = timeline.heatmap(T0, T0 + 2)
+        assert heatmap.seconds.shape == (1, 1001)
+        assert heatmap.seconds[0, [0, 1000]].tolist() == [1.0, 1.0]
+        assert timeline.heatmap(T0 + 1, T0 + 2).seconds.sum() == 1.0
@@ -0,0 +1,84 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+pytest.importorskip("plotly")
+pytest.importorskip("ipywidgets")
+
+from yaiba.log.session_log import SessionLog
+from yaiba.log.types import PseudoUserName, UserName
+from yaiba.log.vrc.entries.builtin import VRCEnteringRoomEntry, VRCPlayerJoinEntry, VRCPlayerLeftEntry
+from yaiba.log.vrc.utils import parse_timestamp
+from yaiba.visualization.vrc import VRCPlayerLocationPlotter, VRCPresencePlotter, _RoomCache
+from yaiba.visualization.vrc.frames import LocationPyramid
+from yaiba.visualization.vrc.tests.entries import ENTRIES, T0
+
+
+class TestVRCPlayerLocationPlotter:
+    def test__gen_dataframe(self):
+        session_log = SessionLog(log_entries=ENTRIES, metadata={})
+
+        df = VRCPlayerLocationPlotter._gen_dataframe(session_log, slice(None))
+
+        assert df.index.name == "timestamp"
+        assert df.index.tolist() == [e.timestamp for e in ENTRIES]
+        assert df["pseudo_user_name"].tolist() == ["A", "B", "A", "B"]
+        assert df["user_id"].tolist() == [0, 1, 0, 1]
+        assert df["location_x"].tolist()[:3] == [0.0, 10.0, 3.0]
+        assert np.isnan(df["location_x"].iloc[3])
+
+    def test__gen_dataframe__no_position(self):
+        session_log = SessionLog(log_entries=ENTRIES[3:], metadata={})
+
+        assert VRCPlayerLocationPlotter._gen_dataframe(session_log, slice(None)) is None
+
+    def test__gen_scatter_data__level_of_detail(self):
+        pyramid = LocationPyramid.from_entries(ENTRIES, start=T0, end=T0 + 30, factors=(1, 10))
+
+        fine = VRCPlayerLocationPlotter._gen_scatter_data(pyramid.level_for(10, zoom=0.1), T0 + 1.5)
+        coarse = VRCPlayerLocationPlotter._gen_scatter_data(pyramid.level_for(10), T0 + 1.5)
+
+        # Zoomed out, the 10 second level shows the frame at 0 sec, before B's first position
+        assert fine[2] == ["A", "B"]
+        assert coarse[2] == ["A"]
+        assert len(coarse[0]) < len(fine[0])
+
+
+class TestVRCPresencePlotter:
+    def test__gen_presence_data(self):
+        def timestamp(second: int):
+            return parse_timestamp(f"2022.03.04 21:50:{second:02d}")
+
+        log_entries = [
+            VRCEnteringRoomEntry(timestamp(0), room_name="Room"),
+            VRCPlayerJoinEntry(timestamp(0), user_name=UserName("B"), pseudo_user_name=PseudoUserName("B")),
+            VRCPlayerJoinEntry(timestamp(10), user_name=UserName("A"), pseudo_user_name=PseudoUserName("A")),
+            VRCPlayerLeftEntry(timestamp(20), user_name=UserName("B"), pseudo_user_name=PseudoUserName("B")),
+        ]
+        start = log_entries[0].timestamp.timestamp()
+
+        presence = VRCPresencePlotter._gen_presence_data(log_entries, start, start + 30, interval_sec=10)
+
+        assert presence.times_sec.tolist() == [0.0, 10.0, 20.0, 30.0]
+        assert presence.headcounts.tolist() == [1, 2, 1, 1]
+        assert presence.player_names.tolist() == ["A", "B"]
+        # B from 0 to 20, A from 10 until the end of the room
+        assert presence.interval_x[[0, 1, 3, 4]].tolist() == [0.0, 20.0, 10.0, 30.0]
+        assert presence.interval_y[[0, 1, 3, 4]].tolist() == [1, 1, 0, 0]
+        assert np.isnan(presence.interval_x[[2, 5]]).all()
+
+
+class TestRoomCache:
+    def test__get(self):
+        built = []
+
+        def build(room: str):
+            built.append(room)
+            return room.upper()
+
+        cache = _RoomCache(2)
+        for room in ["a", "b", "a", "c", "b", "a"]:
+            assert cache.get(room, lambda: build(room)) == room.upper()
+
+        # "b" is evicted by "c", since "a" was selected more recently
+        assert built == ["a", "b", "c", "b", "a"]
@@ -0,0 +1,176 @@
+"""
+Converts VRChat logs in a directory as they are written.
+"""
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from yaiba.cli import (
+    VRCHAT_LOG_PATTERN,
+    ConvertOptions,
+    ConvertResult,
+    output_path_of,
+    parser_config,
+    save_converted,
+)
+from yaiba.log.vrc.incremental import IncrementalVRCLogParser
+
+# Written in the output directory
+STATE_FILE_NAME = ".yaiba-watch.json"
+
+
+@dataclass
+class _WatchedFile:
+    # None if the output is up to date from a previous run or fully parsed, until the file changes
+    parser: Optional[IncrementalVRCLogParser]
+    size: int  # at the previous poll
+    mtime: float  # at the previous poll
+    # Whether the last entry was parsed, so that the file is not parsed again until it changes, even if it ends with an
+    # incomplete line
+    final: bool = False
+
+
+class LogWatcher:
+    """
+    Polls `input_dir` for new or grown VRChat logs, and writes the corresponding session logs to `output_dir`.
+
+    Only bytes appended since the previous poll are parsed, by an `IncrementalVRCLogParser` kept per file while it
+    grows. Once a file stops growing and is parsed to the end, its parser is released, and the file is parsed again from
+    the start if it grows again. The whole session log of a changed file is written again, since compressed outputs
+    cannot be appended to. Changed files are processed by `jobs` threads, which overlap reading and writing (and
+    compression) of files. Parsing holds the GIL, so it does not run in parallel.
+
+    The size and mtime of converted files are persisted in `STATE_FILE_NAME`, so that after a restart, unchanged files
+    are skipped. A file which grew while not watched is parsed again from the start, since the state of its parser is
+    not persisted. Only a fingerprint of the salt is persisted, never the salt: a restart with another salt raises
+    `ValueError`, since pseudo user names of skipped files would differ from those of converted ones.
+    """
+
+    def __init__(self, input_dir: str, output_dir: str, options: ConvertOptions, jobs: int = 4):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.options = options
+        self.jobs = jobs
+        self._files: Dict[str, _WatchedFile] = {}
+
+        os.makedirs(output_dir, exist_ok=True)
+        self._state_path = os.path.join(output_dir, STATE_FILE_NAME)
+        self._saved_files: Dict[str, dict] = {}
+        if os.path.exists(self._state_path):
+            with open(self._state_path, "r", encoding="utf-8") as fp:
+                state = json.load(fp)
+            if state.get("salt_fingerprint") != _salt_fingerprint(options.salt):
+                raise ValueError(f"the salt differs from the one {output_dir} was converted with")
+            self._saved_files = state.get("files", {})
+
+    @classmethod
+    def has_state(cls, output_dir: str) -> bool:
+        """
+        Whether a previous run watched into `output_dir`, so that the same salt must be given.
+        """
+        return os.path.exists(os.path.join(output_dir, STATE_FILE_NAME))
+
+    def poll(self) -> List[ConvertResult]:
+        """
+        Converts new content of all logs once.
+
+        :return: Results of the files with new entries or errors.
+        """
+        tasks = []
+        for input_path in sorted(glob.glob(os.path.join(self.input_dir, VRCHAT_LOG_PATTERN))):
+            stat = os.stat(input_path)
+            name = os.path.basename(input_path)
+            output_path = output_path_of(input_path, self.output_dir, self.options.compression)
+
+            watched = self._files.get(name)
+            if watched is None:
+                saved = self._saved_files.get(name)
+                is_saved = saved is not None and saved["size"] == stat.st_size and saved["mtime"] == stat.st_mtime \
+                    and os.path.exists(output_path)
+                watched = _WatchedFile(parser=None, size=stat.st_size if is_saved else -1, mtime=stat.st_mtime)
+                self._files[name] = watched
+                if is_saved:
+                    continue
+
+            grew = stat.st_size != watched.size or stat.st_mtime != watched.mtime
+            watched.size = stat.st_size
+            watched.mtime = stat.st_mtime
+            if watched.parser is None or stat.st_size < watched.parser.offset:
+                if not grew and watched.parser is None:
+                    continue
+                # New, truncated, or changed since a previous run
+                watched.parser = IncrementalVRCLogParser(parser_config(self.options))
+            # The last entry is parsed when the file stops growing
+            if grew or not watched.final:
+                tasks.append((input_path, output_path, watched, not grew))
+                watched.final = not grew
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            results = list(executor.map(lambda task: self._convert(*task), tasks))
+
+        if len(tasks) > 0:
+            self._save_state()
+        for _, _, watched, final in tasks:
+            # A file which grows again is parsed from the start, as after a restart
+            if final and watched.parser.offset == watched.size:
+                watched.parser = None
+        return [r for r in results if r.entry_count > 0 or r.error is not None]
+
+    def run(self, interval_sec: float = 5.0, max_polls: Optional[int] = None):
+        """
+        Polls every `interval_sec`, and prints results.
+        """
+        poll_count = 0
+        while max_polls is None or poll_count < max_polls:
+            if poll_count > 0:
+                time.sleep(interval_sec)
+            for result in self.poll():
+                if result.error is not None:
+                    print(f"{result.input_path}: FAILED {result.error}", file=sys.stderr)
+                else:
+                    print(f"{result.input_path} -> {result.output_path}: +{result.entry_count} entries, "
+                          f"+{result.input_bytes} bytes in {result.seconds:.2f} s")
+            poll_count += 1
+
+    def _convert(self, input_path: str, output_path: str, watched: _WatchedFile, final: bool) -> ConvertResult:
+        result = ConvertResult(input_path=input_path, output_path=output_path)
+        start = time.perf_counter()
+        parser = watched.parser
+        try:
+            offset = parser.offset
+            with open(input_path, "rb") as fp:
+                entries = parser.feed(fp, final=final)
+            result.entry_count = len(entries)
+            result.input_bytes = parser.offset - offset
+            if len(entries) > 0 or not os.path.exists(output_path):
+                save_converted(parser.session_log, output_path, self.options)
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def _save_state(self):
+        files = dict(self._saved_files)
+        for name, watched in self._files.items():
+            if watched.parser is not None:
+                # Up to date only when all bytes are parsed
+                files[name] = {"size": watched.parser.offset, "mtime": watched.mtime}
+        self._saved_files = files
+
+        temporary_path = self._state_path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as fp:
+            json.dump({"salt_fingerprint": _salt_fingerprint(self.options.salt), "files": files}, fp, indent=2)
+        os.replace(temporary_path, self._state_path)
+
+
+def _salt_fingerprint(salt: bytes) -> str:
+    # Tells salts apart without revealing them
+    return hashlib.sha256(b"yaiba watch salt\0" + salt).hexdigest()[:16]